@@ -8,12 +8,35 @@
 #include <string>
 #include <cfloat>
 #include <fstream>
+#include <cmath>
+#include <cstring>
+#include <cstdio>
+#include <stack>
+#include <sstream>
+#include <chrono>
+#include <stdexcept>
+#include <cstdint>
+#include <fcntl.h>
+#include <sys/mman.h>
+#include <sys/stat.h>
+#include <unistd.h>
 
 
 using namespace std;
 
-#define ROW 64
-#define COL 64
+// Grid size, set from the map header by load_map
+int ROW = 0;
+int COL = 0;
+
+// Characters that mark a passable cell in a Moving-AI .map file
+const string PASSABLE = ".GS";
+
+// Work done by the last search: nodes taken off and put on the open list
+long nodesExpanded = 0;
+long nodesPushed = 0;
+
+// Cost of the path found by the last search, or -1 if there was none
+double pathCost = -1;
 
 // Creating a shortcut for int, int pair type
 typedef pair<int, int> Pair;
@@ -21,6 +44,41 @@ typedef pair<int, int> Pair;
 // Creating a shortcut for pair<int, pair<int, int>> type
 typedef pair<double, pair<int, int> > pPair;
 
+// The map, sized from its header: grid[row][col] is 1 for passable cells, 0
+// for blocked. The cells are stored row by row, either parsed from a text map
+// into storage or memory-mapped straight from a binary .grid file
+struct Grid {
+    const unsigned char* cells = nullptr;
+    int cols = 0;
+    vector<unsigned char> storage;
+
+    const unsigned char* operator[](int row) const
+    {
+        return cells + (size_t)row * cols;
+    }
+};
+
+// Binary map (.grid) files: the magic, the height and width as little-endian
+// uint32, then one byte per cell
+const char GRID_MAGIC[4] = { 'G', 'R', 'I', 'D' };
+const size_t GRID_HEADER_SIZE = 12;
+
+// Connected-component index (.comp) files: the magic, the same header, then
+// one little-endian int32 label per cell. Cells with different labels have no
+// path between them (diagonal moves never cut corners, so this holds for 4- and
+// 8-connected movement alike)
+const char COMP_MAGIC[4] = { 'C', 'O', 'M', 'P' };
+
+// The labels of the loaded map, or nullptr if it has no component index
+const int32_t* components = nullptr;
+
+const double SQRT2 = sqrt(2.0);
+
+// Moves as {d_row, d_col}: North, South, East, West, then the four
+// diagonals that are only used in 8-connected mode
+const int DIRECTIONS[8][2] = { { -1, 0 }, { 1, 0 }, { 0, 1 }, { 0, -1 },
+                               { -1, 1 }, { -1, -1 }, { 1, 1 }, { 1, -1 } };
+
 // A structure to hold the necessary parameters
 struct cell {
     // Row and Column index of its parent
@@ -42,7 +100,7 @@ bool isValid(int row, int col)
 
 // A Utility Function to check whether the given cell is
 // blocked or not
-bool isUnBlocked(int grid[][COL], int row, int col)
+bool isUnBlocked(const Grid& grid, int row, int col)
 {
     // Returns true if the cell is not blocked else false
     if (grid[row][col] == 1)
@@ -77,11 +135,39 @@ double calculateHValue1(int row, int col, Pair dest)
     abs(row - dest.first) + abs(col - dest.second));
 
 }
+// Octile distance: the cost of the best path on an empty 8-connected grid
+double calculateHValue2(int row, int col, Pair dest)
+{
+    int dRow = abs(row - dest.first);
+    int dCol = abs(col - dest.second);
+    return (dRow + dCol) + (SQRT2 - 2.0) * min(dRow, dCol);
+}
+// Chebyshev distance: as octile, but with diagonal moves counted as 1
+double calculateHValue3(int row, int col, Pair dest)
+{
+    return (double)max(abs(row - dest.first), abs(col - dest.second));
+}
+
+// The heuristic selected on the command line: 0 Euclidean, 1 Manhattan,
+// 2 octile, 3 Chebyshev. Any other number means Manhattan
+double heuristicValue(int row, int col, Pair dest, int heuristic)
+{
+    switch (heuristic) {
+    case 0:
+        return calculateHValue(row, col, dest);
+    case 2:
+        return calculateHValue2(row, col, dest);
+    case 3:
+        return calculateHValue3(row, col, dest);
+    default:
+        return calculateHValue1(row, col, dest);
+    }
+}
 
 
 // A Utility Function to trace the path from the source
 // to destination
-void tracePath(cell cellDetails[][COL], Pair dest)
+int tracePath(const vector<vector<cell> >& cellDetails, Pair dest)
 {
     //printf("\nThe Path is ");
     int row = dest.first;
@@ -106,26 +192,31 @@ void tracePath(cell cellDetails[][COL], Pair dest)
         Path.pop();
         //printf("-> (%d,%d) ", p.first, p.second);
     }
-    cout << pathlength << endl;
-    
-    return;
+    return pathlength;
 }
 
 // A Function to find the shortest path between
 // a given source cell to a destination cell according
-// to A* Search Algorithm
-void aStarSearch(int grid[][COL], Pair src, Pair dest, int heuristic)
+// to A* Search Algorithm. Returns the number of cells on the
+// path, or -1 if there is none. moves is 4 (straight moves
+// only) or 8 (diagonals too, at cost sqrt(2), without
+// cutting corners)
+int aStarSearch(const Grid& grid, Pair src, Pair dest, int heuristic, int moves)
 {
+    nodesExpanded = 0;
+    nodesPushed = 0;
+    pathCost = -1;
+
     // If the source is out of range
     if (isValid(src.first, src.second) == false) {
         //printf("Source is invalid\n");
-        return;
+        return -1;
     }
 
     // If the destination is out of range
     if (isValid(dest.first, dest.second) == false) {
         //printf("Destination is invalid\n");
-        return;
+        return -1;
     }
 
     // Either the source or the destination is blocked
@@ -133,25 +224,33 @@ void aStarSearch(int grid[][COL], Pair src, Pair dest, int heuristic)
         || isUnBlocked(grid, dest.first, dest.second)
                == false) {
         //printf("Source or the destination is blocked\n");
-        return;
+        return -1;
+    }
+
+    // The source and destination are in different connected components
+    if (components != nullptr
+        && components[src.first * COL + src.second]
+               != components[dest.first * COL + dest.second]) {
+        return -1;
     }
 
     // If the destination cell is the same as source cell
     if (isDestination(src.first, src.second, dest)
         == true) {
         //printf("We are already at the destination\n");
-        return;
+        pathCost = 0;
+        return 1;
     }
 
     // Create a closed list and initialise it to false which
     // means that no cell has been included yet This closed
     // list is implemented as a boolean 2D array
-    bool closedList[ROW][COL];
-    memset(closedList, false, sizeof(closedList));
+    vector<vector<bool> > closedList(ROW, vector<bool>(COL, false));
 
     // Declare a 2D array of structure to hold the details
-    // of that cell
-    cell cellDetails[ROW][COL];
+    // of that cell. Both live on the heap so large maps
+    // do not overflow the stack
+    vector<vector<cell> > cellDetails(ROW, vector<cell>(COL));
 
     int i, j;
 
@@ -186,290 +285,652 @@ void aStarSearch(int grid[][COL], Pair src, Pair dest, int heuristic)
     // Put the starting cell on the open list and set its
     // 'f' as 0
     openList.insert(make_pair(0.0, make_pair(i, j)));
+    nodesPushed++;
 
     // We set this boolean value as false as initially
     // the destination is not reached.
     bool foundDest = false;
 
+    int numMoves = moves == 8 ? 8 : 4;
+
     while (!openList.empty()) {
         pPair p = *openList.begin();
 
         // Remove this vertex from the open list
         openList.erase(openList.begin());
 
-        // Add this vertex to the closed list
         i = p.second.first;
         j = p.second.second;
-        closedList[i][j] = true;
 
-        // To store the 'g', 'h' and 'f' of the 8 successors
-        double gNew, hNew, fNew;
-
-        //----------- 1st Successor (North) ------------
-
-        // Only process this cell if this is a valid one
-        if (isValid(i - 1, j) == true) {
-            // If the destination cell is the same as the
-            // current successor
-            if (isDestination(i - 1, j, dest) == true) {
-                // Set the Parent of the destination cell
-                cellDetails[i - 1][j].parent_i = i;
-                cellDetails[i - 1][j].parent_j = j;
-                //printf("The destination cell is found\n");
-                tracePath(cellDetails, dest);
-                foundDest = true;
-                return;
-            }
-            // If the successor is already on the closed
-            // list or if it is blocked, then ignore it.
-            // Else do the following
-            else if (closedList[i - 1][j] == false
-                     && isUnBlocked(grid, i - 1, j)
-                            == true) {
-                gNew = cellDetails[i][j].g + 1.0;
-                if(heuristic == 0){
-                    hNew = calculateHValue(i - 1, j, dest);
-                }
-                else{
-                    hNew = calculateHValue1(i - 1, j, dest);
-                }
-                fNew = gNew + hNew;
-
-                // If it isn’t on the open list, add it to
-                // the open list. Make the current square
-                // the parent of this square. Record the
-                // f, g, and h costs of the square cell
-                //                OR
-                // If it is on the open list already, check
-                // to see if this path to that square is
-                // better, using 'f' cost as the measure.
-                if (cellDetails[i - 1][j].f == FLT_MAX
-                    || cellDetails[i - 1][j].f > fNew) {
-                    openList.insert(make_pair(
-                        fNew, make_pair(i - 1, j)));
-
-                    // Update the details of this cell
-                    cellDetails[i - 1][j].f = fNew;
-                    cellDetails[i - 1][j].g = gNew;
-                    cellDetails[i - 1][j].h = hNew;
-                    cellDetails[i - 1][j].parent_i = i;
-                    cellDetails[i - 1][j].parent_j = j;
-                }
-            }
+        // A cell can be on the open list more than once; skip
+        // the stale copies
+        if (closedList[i][j])
+            continue;
+
+        // The destination is tested when it is popped rather
+        // than when it is generated, so the path is the
+        // cheapest one even with diagonal costs
+        if (isDestination(i, j, dest) == true) {
+            //printf("The destination cell is found\n");
+            foundDest = true;
+            pathCost = cellDetails[i][j].g;
+            return tracePath(cellDetails, dest);
         }
 
-        //----------- 2nd Successor (South) ------------
-
-        // Only process this cell if this is a valid one
-        if (isValid(i + 1, j) == true) {
-            // If the destination cell is the same as the
-            // current successor
-            if (isDestination(i + 1, j, dest) == true) {
-                // Set the Parent of the destination cell
-                cellDetails[i + 1][j].parent_i = i;
-                cellDetails[i + 1][j].parent_j = j;
-                //printf("The destination cell is found\n");
-                tracePath(cellDetails, dest);
-                foundDest = true;
-                return;
+        // Add this vertex to the closed list
+        closedList[i][j] = true;
+        nodesExpanded++;
+
+        /*
+         Generating the successors of this cell
+
+             N.W   N   N.E
+               \   |   /
+                \  |  /
+             W----Cell----E
+                  / | \
+                /   |  \
+             S.W    S   S.E
+
+         N, S, E and W are always generated; the diagonals
+         only in 8-connected mode.*/
+        for (int d = 0; d < numMoves; d++) {
+            int ni = i + DIRECTIONS[d][0];
+            int nj = j + DIRECTIONS[d][1];
+
+            // If the successor is off the map, blocked or
+            // already on the closed list, ignore it
+            if (isValid(ni, nj) == false
+                || isUnBlocked(grid, ni, nj) == false
+                || closedList[ni][nj] == true)
+                continue;
+
+            // A diagonal move may not cut the corner of a
+            // blocked cell
+            if (d >= 4
+                && (isUnBlocked(grid, ni, j) == false
+                    || isUnBlocked(grid, i, nj) == false))
+                continue;
+
+            // To store the 'g', 'h' and 'f' of the successor
+            double gNew = cellDetails[i][j].g + (d < 4 ? 1.0 : SQRT2);
+            double hNew = heuristicValue(ni, nj, dest, heuristic);
+            double fNew = gNew + hNew;
+
+            // If it isn’t on the open list, add it to
+            // the open list. Make the current square
+            // the parent of this square. Record the
+            // f, g, and h costs of the square cell
+            //                OR
+            // If it is on the open list already, check
+            // to see if this path to that square is
+            // better, using 'f' cost as the measure.
+            if (cellDetails[ni][nj].f == FLT_MAX
+                || cellDetails[ni][nj].f > fNew) {
+                openList.insert(make_pair(fNew, make_pair(ni, nj)));
+                nodesPushed++;
+
+                // Update the details of this cell
+                cellDetails[ni][nj].f = fNew;
+                cellDetails[ni][nj].g = gNew;
+                cellDetails[ni][nj].h = hNew;
+                cellDetails[ni][nj].parent_i = i;
+                cellDetails[ni][nj].parent_j = j;
             }
-            // If the successor is already on the closed
-            // list or if it is blocked, then ignore it.
-            // Else do the following
-            else if (closedList[i + 1][j] == false
-                     && isUnBlocked(grid, i + 1, j)
-                            == true) {
-                gNew = cellDetails[i][j].g + 1.0;
-                if(heuristic == 0){
-                    hNew = calculateHValue(i - 1, j, dest);
-                }
-                else{
-                    hNew = calculateHValue1(i - 1, j, dest);
-                }
-                fNew = gNew + hNew;
-
-                // If it isn’t on the open list, add it to
-                // the open list. Make the current square
-                // the parent of this square. Record the
-                // f, g, and h costs of the square cell
-                //                OR
-                // If it is on the open list already, check
-                // to see if this path to that square is
-                // better, using 'f' cost as the measure.
-                if (cellDetails[i + 1][j].f == FLT_MAX
-                    || cellDetails[i + 1][j].f > fNew) {
-                    openList.insert(make_pair(
-                        fNew, make_pair(i + 1, j)));
-                    // Update the details of this cell
-                    cellDetails[i + 1][j].f = fNew;
-                    cellDetails[i + 1][j].g = gNew;
-                    cellDetails[i + 1][j].h = hNew;
-                    cellDetails[i + 1][j].parent_i = i;
-                    cellDetails[i + 1][j].parent_j = j;
-                }
+        }
+    }
+    //if (foundDest == false)
+        //printf("Failed to find the Destination Cell\n");
+
+    return -1;
+}
+
+// Search algorithms selectable with "--engine": plain A*, Jump Point Search
+// and bidirectional A*
+enum SearchEngine { ENGINE_ASTAR, ENGINE_JPS, ENGINE_BIDIR };
+
+// A cell a search may enter: on the map and not blocked
+bool isOpen(const Grid& grid, int row, int col)
+{
+    return isValid(row, col) && isUnBlocked(grid, row, col);
+}
+
+// The checks every search makes before it starts: 1 if src is dest, -1 if
+// there can be no path, 0 if there is something to search
+int checkEndpoints(const Grid& grid, Pair src, Pair dest)
+{
+    nodesExpanded = 0;
+    nodesPushed = 0;
+    pathCost = -1;
+    if (!isOpen(grid, src.first, src.second)
+        || !isOpen(grid, dest.first, dest.second))
+        return -1;
+    if (components != nullptr
+        && components[src.first * COL + src.second]
+               != components[dest.first * COL + dest.second])
+        return -1;
+    if (isDestination(src.first, src.second, dest)) {
+        pathCost = 0;
+        return 1;
+    }
+    return 0;
+}
+
+// Jump Point Search: follow a straight move from (row, col) until it reaches
+// dest or a jump point, a cell where an optimal path may have to turn.
+// Returns whether it found one, and stores it in jumpPoint
+bool jumpStraight(const Grid& grid, int row, int col, int dRow, int dCol,
+                  Pair dest, int moves, Pair& jumpPoint)
+{
+    // The two cells beside the line of the move
+    int sideRow = dCol != 0 ? 1 : 0;
+    int sideCol = dRow != 0 ? 1 : 0;
+    while (true) {
+        row += dRow;
+        col += dCol;
+        if (!isOpen(grid, row, col))
+            return false;
+        jumpPoint = make_pair(row, col);
+        if (isDestination(row, col, dest))
+            return true;
+
+        // A side cell that could only be reached through this one
+        for (int s = -1; s <= 1; s += 2) {
+            int r = row + s * sideRow;
+            int c = col + s * sideCol;
+            if (isOpen(grid, r, c) && !isOpen(grid, r - dRow, c - dCol))
+                return true;
+        }
+
+        // Without diagonals, a vertical jump stops where a horizontal one
+        // would find something
+        Pair found;
+        if (moves == 4 && dRow != 0
+            && (jumpStraight(grid, row, col, 0, 1, dest, moves, found)
+                || jumpStraight(grid, row, col, 0, -1, dest, moves, found)))
+            return true;
+    }
+}
+
+// As jumpStraight, for any of the eight directions. A diagonal jump stops
+// where one of its two straight parts would find a jump point; like a single
+// diagonal move it may not cut the corner of a blocked cell
+bool jump(const Grid& grid, int row, int col, int dRow, int dCol, Pair dest,
+          int moves, Pair& jumpPoint)
+{
+    if (dRow == 0 || dCol == 0)
+        return jumpStraight(grid, row, col, dRow, dCol, dest, moves, jumpPoint);
+    while (true) {
+        if (!isOpen(grid, row + dRow, col) || !isOpen(grid, row, col + dCol)
+            || !isOpen(grid, row + dRow, col + dCol))
+            return false;
+        row += dRow;
+        col += dCol;
+        jumpPoint = make_pair(row, col);
+        if (isDestination(row, col, dest))
+            return true;
+        Pair found;
+        if (jumpStraight(grid, row, col, dRow, 0, dest, moves, found)
+            || jumpStraight(grid, row, col, 0, dCol, dest, moves, found))
+            return true;
+    }
+}
+
+int sign(int value)
+{
+    return (value > 0) - (value < 0);
+}
+
+// Jump Point Search (Harabor and Grastien), with the rules for movement
+// without corner cutting. The open list only ever holds jump points, so
+// nodesExpanded and nodesPushed count those; paths and costs are A*'s, and
+// the returned length counts every cell between the jump points
+int jpsSearch(const Grid& grid, Pair src, Pair dest, int heuristic, int moves)
+{
+    int trivial = checkEndpoints(grid, src, dest);
+    if (trivial != 0)
+        return trivial;
+
+    vector<vector<bool> > closedList(ROW, vector<bool>(COL, false));
+    vector<vector<cell> > cellDetails(ROW, vector<cell>(COL));
+    for (int i = 0; i < ROW; i++) {
+        for (int j = 0; j < COL; j++) {
+            cellDetails[i][j].f = FLT_MAX;
+            cellDetails[i][j].g = FLT_MAX;
+            cellDetails[i][j].h = FLT_MAX;
+            cellDetails[i][j].parent_i = -1;
+            cellDetails[i][j].parent_j = -1;
+        }
+    }
+    cell& start = cellDetails[src.first][src.second];
+    start.f = start.g = start.h = 0.0;
+    start.parent_i = src.first;
+    start.parent_j = src.second;
+
+    set<pPair> openList;
+    openList.insert(make_pair(0.0, src));
+    nodesPushed++;
+
+    int numMoves = moves == 8 ? 8 : 4;
+    vector<Pair> successors;
+
+    while (!openList.empty()) {
+        pPair p = *openList.begin();
+        openList.erase(openList.begin());
+        int i = p.second.first;
+        int j = p.second.second;
+        if (closedList[i][j])
+            continue;
+
+        if (isDestination(i, j, dest)) {
+            pathCost = cellDetails[i][j].g;
+            int length = 1;
+            while (!(cellDetails[i][j].parent_i == i && cellDetails[i][j].parent_j == j)) {
+                int pi = cellDetails[i][j].parent_i;
+                int pj = cellDetails[i][j].parent_j;
+                length += max(abs(i - pi), abs(j - pj));
+                i = pi;
+                j = pj;
             }
+            return length;
         }
 
-        //----------- 3rd Successor (East) ------------
-
-        // Only process this cell if this is a valid one
-        if (isValid(i, j + 1) == true) {
-            // If the destination cell is the same as the
-            // current successor
-            if (isDestination(i, j + 1, dest) == true) {
-                // Set the Parent of the destination cell
-                cellDetails[i][j + 1].parent_i = i;
-                cellDetails[i][j + 1].parent_j = j;
-                //printf("The destination cell is found\n");
-                tracePath(cellDetails, dest);
-                foundDest = true;
-                return;
+        closedList[i][j] = true;
+        nodesExpanded++;
+
+        // The directions worth jumping in, given the one this jump point was
+        // reached from: straight on, plus the turns an optimal path could take
+        successors.clear();
+        int dRow = sign(i - cellDetails[i][j].parent_i);
+        int dCol = sign(j - cellDetails[i][j].parent_j);
+        if (dRow == 0 && dCol == 0) {
+            for (int d = 0; d < numMoves; d++)
+                successors.push_back(make_pair(DIRECTIONS[d][0], DIRECTIONS[d][1]));
+        } else if (dRow != 0 && dCol != 0) {
+            successors.push_back(make_pair(dRow, 0));
+            successors.push_back(make_pair(0, dCol));
+            successors.push_back(make_pair(dRow, dCol));
+        } else {
+            successors.push_back(make_pair(dRow, dCol));
+            for (int s = -1; s <= 1; s += 2) {
+                successors.push_back(make_pair(dRow == 0 ? s : 0, dCol == 0 ? s : 0));
+                if (numMoves == 8)
+                    successors.push_back(make_pair(dRow == 0 ? s : dRow, dCol == 0 ? s : dCol));
             }
+        }
 
-            // If the successor is already on the closed
-            // list or if it is blocked, then ignore it.
-            // Else do the following
-            else if (closedList[i][j + 1] == false
-                     && isUnBlocked(grid, i, j + 1)
-                            == true) {
-                gNew = cellDetails[i][j].g + 1.0;
-                if(heuristic == 0){
-                    hNew = calculateHValue(i - 1, j, dest);
-                }
-                else{
-                    hNew = calculateHValue1(i - 1, j, dest);
-                }
-                fNew = gNew + hNew;
-
-                // If it isn’t on the open list, add it to
-                // the open list. Make the current square
-                // the parent of this square. Record the
-                // f, g, and h costs of the square cell
-                //                OR
-                // If it is on the open list already, check
-                // to see if this path to that square is
-                // better, using 'f' cost as the measure.
-                if (cellDetails[i][j + 1].f == FLT_MAX
-                    || cellDetails[i][j + 1].f > fNew) {
-                    openList.insert(make_pair(
-                        fNew, make_pair(i, j + 1)));
-
-                    // Update the details of this cell
-                    cellDetails[i][j + 1].f = fNew;
-                    cellDetails[i][j + 1].g = gNew;
-                    cellDetails[i][j + 1].h = hNew;
-                    cellDetails[i][j + 1].parent_i = i;
-                    cellDetails[i][j + 1].parent_j = j;
-                }
+        for (const Pair& d : successors) {
+            Pair next;
+            if (!jump(grid, i, j, d.first, d.second, dest, moves, next)
+                || closedList[next.first][next.second])
+                continue;
+
+            // A jump is straight or exactly diagonal: its octile length is its cost
+            int stepsRow = abs(next.first - i);
+            int stepsCol = abs(next.second - j);
+            double gNew = cellDetails[i][j].g + (stepsRow + stepsCol)
+                + (SQRT2 - 2.0) * min(stepsRow, stepsCol);
+            double hNew = heuristicValue(next.first, next.second, dest, heuristic);
+            cell& details = cellDetails[next.first][next.second];
+            if (details.f == FLT_MAX || details.f > gNew + hNew) {
+                openList.insert(make_pair(gNew + hNew, next));
+                nodesPushed++;
+                details.f = gNew + hNew;
+                details.g = gNew;
+                details.h = hNew;
+                details.parent_i = i;
+                details.parent_j = j;
             }
         }
+    }
+    return -1;
+}
 
-        //----------- 4th Successor (West) ------------
-
-        // Only process this cell if this is a valid one
-        if (isValid(i, j - 1) == true) {
-            // If the destination cell is the same as the
-            // current successor
-            if (isDestination(i, j - 1, dest) == true) {
-                // Set the Parent of the destination cell
-                cellDetails[i][j - 1].parent_i = i;
-                cellDetails[i][j - 1].parent_j = j;
-                //printf("The destination cell is found\n");
-                tracePath(cellDetails, dest);
-                foundDest = true;
-                return;
+// One direction of a bidirectional search: its own cell details, closed and
+// open lists, and the cell it heads for
+struct SearchSide {
+    vector<vector<cell> > cellDetails;
+    vector<vector<bool> > closedList;
+    set<pPair> openList;
+    Pair goal;
+
+    SearchSide(Pair start, Pair goal)
+        : cellDetails(ROW, vector<cell>(COL)),
+          closedList(ROW, vector<bool>(COL, false)), goal(goal)
+    {
+        for (int i = 0; i < ROW; i++) {
+            for (int j = 0; j < COL; j++) {
+                cellDetails[i][j].f = FLT_MAX;
+                cellDetails[i][j].g = FLT_MAX;
+                cellDetails[i][j].h = FLT_MAX;
+                cellDetails[i][j].parent_i = -1;
+                cellDetails[i][j].parent_j = -1;
             }
+        }
+        cell& first = cellDetails[start.first][start.second];
+        first.f = first.g = first.h = 0.0;
+        first.parent_i = start.first;
+        first.parent_j = start.second;
+        openList.insert(make_pair(0.0, start));
+    }
+};
 
-            // If the successor is already on the closed
-            // list or if it is blocked, then ignore it.
-            // Else do the following
-            else if (closedList[i][j - 1] == false
-                     && isUnBlocked(grid, i, j - 1)
-                            == true) {
-                gNew = cellDetails[i][j].g + 1.0;
-                if(heuristic == 0){
-                    hNew = calculateHValue(i - 1, j, dest);
-                }
-                else{
-                    hNew = calculateHValue1(i - 1, j, dest);
-                }
-                fNew = gNew + hNew;
-
-                // If it isn’t on the open list, add it to
-                // the open list. Make the current square
-                // the parent of this square. Record the
-                // f, g, and h costs of the square cell
-                //                OR
-                // If it is on the open list already, check
-                // to see if this path to that square is
-                // better, using 'f' cost as the measure.
-                if (cellDetails[i][j - 1].f == FLT_MAX
-                    || cellDetails[i][j - 1].f > fNew) {
-                    openList.insert(make_pair(
-                        fNew, make_pair(i, j - 1)));
-
-                    // Update the details of this cell
-                    cellDetails[i][j - 1].f = fNew;
-                    cellDetails[i][j - 1].g = gNew;
-                    cellDetails[i][j - 1].h = hNew;
-                    cellDetails[i][j - 1].parent_i = i;
-                    cellDetails[i][j - 1].parent_j = j;
+// Bidirectional A*: one search forward from src towards dest and one backward
+// from dest towards src, expanding whichever has the shorter open list. Every
+// cell reached by both gives a candidate path; the search stops once the best
+// candidate is no dearer than the smallest f on either open list, which no
+// path left to find can beat while the heuristic is admissible
+int bidirectionalSearch(const Grid& grid, Pair src, Pair dest, int heuristic, int moves)
+{
+    int trivial = checkEndpoints(grid, src, dest);
+    if (trivial != 0)
+        return trivial;
+
+    SearchSide forward(src, dest);
+    SearchSide backward(dest, src);
+    nodesPushed = 2;
+
+    int numMoves = moves == 8 ? 8 : 4;
+    double best = FLT_MAX;
+    Pair meeting = make_pair(-1, -1);
+
+    while (!forward.openList.empty() && !backward.openList.empty()) {
+        if (best <= max(forward.openList.begin()->first, backward.openList.begin()->first))
+            break;
+        bool forwardTurn = forward.openList.size() <= backward.openList.size();
+        SearchSide& side = forwardTurn ? forward : backward;
+        SearchSide& other = forwardTurn ? backward : forward;
+
+        pPair p = *side.openList.begin();
+        side.openList.erase(side.openList.begin());
+        int i = p.second.first;
+        int j = p.second.second;
+        if (side.closedList[i][j])
+            continue;
+        side.closedList[i][j] = true;
+        nodesExpanded++;
+
+        for (int d = 0; d < numMoves; d++) {
+            int ni = i + DIRECTIONS[d][0];
+            int nj = j + DIRECTIONS[d][1];
+            if (!isOpen(grid, ni, nj) || side.closedList[ni][nj])
+                continue;
+            if (d >= 4 && (!isUnBlocked(grid, ni, j) || !isUnBlocked(grid, i, nj)))
+                continue;
+
+            double gNew = side.cellDetails[i][j].g + (d < 4 ? 1.0 : SQRT2);
+            cell& details = side.cellDetails[ni][nj];
+            if (details.g == FLT_MAX || gNew < details.g) {
+                double hNew = heuristicValue(ni, nj, side.goal, heuristic);
+                side.openList.insert(make_pair(gNew + hNew, make_pair(ni, nj)));
+                nodesPushed++;
+                details.f = gNew + hNew;
+                details.g = gNew;
+                details.h = hNew;
+                details.parent_i = i;
+                details.parent_j = j;
+
+                double otherG = other.cellDetails[ni][nj].g;
+                if (otherG != FLT_MAX && gNew + otherG < best) {
+                    best = gNew + otherG;
+                    meeting = make_pair(ni, nj);
                 }
             }
         }
     }
-    if (foundDest == false)
-        //printf("Failed to find the Destination Cell\n");
 
-    return;
+    if (meeting.first < 0)
+        return -1;
+    pathCost = best;
+    return tracePath(forward.cellDetails, meeting)
+        + tracePath(backward.cellDetails, meeting) - 1;
+}
+
+// Map a file read-only for the life of the process, or return nullptr if it
+// cannot be opened
+const unsigned char* map_file_readonly(const string& filename, size_t& size) {
+    int fd = open(filename.c_str(), O_RDONLY);
+    if (fd < 0) {
+        return nullptr;
+    }
+    struct stat st;
+    if (fstat(fd, &st) != 0) {
+        close(fd);
+        return nullptr;
+    }
+    void* data = mmap(nullptr, st.st_size, PROT_READ, MAP_PRIVATE, fd, 0);
+    close(fd);
+    if (data == MAP_FAILED) {
+        throw runtime_error(filename + ": cannot map the file");
+    }
+    size = st.st_size;
+    return static_cast<const unsigned char*>(data);
 }
-void load_map(const string& filename, int grid[][COL]) {
-    ifstream file(filename);
+
+uint32_t read_uint32_le(const unsigned char* bytes) {
+    return bytes[0] | bytes[1] << 8 | bytes[2] << 16 | (uint32_t)bytes[3] << 24;
+}
+
+// Map a .grid file read-only into grid
+void load_binary_map(const string& filename, Grid& grid) {
+    size_t size = 0;
+    const unsigned char* bytes = map_file_readonly(filename, size);
+    if (bytes == nullptr) {
+        throw runtime_error(filename + ": cannot open map file");
+    }
+
+    // The size must cover the header before height and width are read from it
+    if (size < GRID_HEADER_SIZE) {
+        throw runtime_error(filename + ": not a complete .grid file");
+    }
+    uint32_t height = read_uint32_le(bytes + 4);
+    uint32_t width = read_uint32_le(bytes + 8);
+    if (size < GRID_HEADER_SIZE + (size_t)height * width) {
+        throw runtime_error(filename + ": not a complete .grid file");
+    }
+
+    grid.cells = bytes + GRID_HEADER_SIZE;
+    grid.cols = width;
+    ROW = height;
+    COL = width;
+}
+
+// Load a Moving-AI .map file into grid: a header ("type", "height", "width", "map")
+// followed by one line per row. Passable cells become 1, everything else 0.
+// A binary .grid file is recognised by its magic and memory-mapped instead
+void load_map(const string& filename, Grid& grid) {
+    ifstream file(filename, ios::binary);
+    if (!file) {
+        throw runtime_error(filename + ": cannot open map file");
+    }
+    char magic[4] = { 0 };
+    if (file.read(magic, 4) && memcmp(magic, GRID_MAGIC, 4) == 0) {
+        load_binary_map(filename, grid);
+        return;
+    }
+    file.clear();
+    file.seekg(0);
+
     string line;
-    int line_count = 0;
-    
-    // Skip the first 4 lines
-    while (line_count < 4 && getline(file, line)) {
-        line_count++;
+    int height = -1;
+    int width = -1;
+
+    // Read the header up to the "map" line
+    while (getline(file, line)) {
+        istringstream in(line);
+        string key;
+        in >> key;
+        if (key == "height") {
+            in >> height;
+        } else if (key == "width") {
+            in >> width;
+        } else if (key == "map") {
+            break;
+        }
+    }
+    if (height < 0 || width < 0) {
+        throw runtime_error(filename + ": missing height/width in the map header");
     }
-    
+
     // Read the map into the grid
-    int row = 0;
-    while (getline(file, line)) {
-        for (int col = 0; col < line.size(); col++) {
-            if (line[col] == '.') {
-                grid[row][col] = 1;  // Good space
-            } else if (line[col] == 'T' || line[col] == '@') {
-                grid[row][col] = 0;  // Bad space
-            }
+    grid.storage.assign((size_t)height * width, 0);
+    for (int row = 0; row < height; row++) {
+        if (!getline(file, line) || (int)line.size() < width) {
+            throw runtime_error(filename + ": row " + to_string(row)
+                                + " is shorter than the declared width");
+        }
+        for (int col = 0; col < width; col++) {
+            grid.storage[(size_t)row * width + col]
+                = PASSABLE.find(line[col]) != string::npos ? 1 : 0;
+        }
+    }
+
+    grid.cells = grid.storage.data();
+    grid.cols = width;
+    ROW = height;
+    COL = width;
+}
+
+// Map the component index next to the loaded map file (same name, .comp
+// extension) into components, if there is one. The labels are read in place,
+// so this assumes a little-endian machine
+void load_components(const string& map_file) {
+    size_t dot = map_file.find_last_of('.');
+    size_t slash = map_file.find_last_of('/');
+    bool has_extension = dot != string::npos && (slash == string::npos || dot > slash);
+    string comp_file = (has_extension ? map_file.substr(0, dot) : map_file) + ".comp";
+
+    size_t size = 0;
+    const unsigned char* bytes = map_file_readonly(comp_file, size);
+    if (bytes == nullptr) {
+        return;
+    }
+    if (size < GRID_HEADER_SIZE + 4 * (size_t)ROW * COL || memcmp(bytes, COMP_MAGIC, 4) != 0
+        || read_uint32_le(bytes + 4) != (uint32_t)ROW || read_uint32_le(bytes + 8) != (uint32_t)COL) {
+        throw runtime_error(comp_file + ": not a component index for this map");
+    }
+    components = reinterpret_cast<const int32_t*>(bytes + GRID_HEADER_SIZE);
+}
+
+// Run one query and print "<path_length> <search_seconds> <expanded> <pushed> <path_cost>", timing
+// only the search itself with the monotonic high-resolution clock
+void runQuery(const Grid& grid, Pair src, Pair dest, int heuristic, int moves,
+              SearchEngine engine)
+{
+    auto search_start = chrono::steady_clock::now();
+    int length;
+    switch (engine) {
+    case ENGINE_JPS:
+        length = jpsSearch(grid, src, dest, heuristic, moves);
+        break;
+    case ENGINE_BIDIR:
+        length = bidirectionalSearch(grid, src, dest, heuristic, moves);
+        break;
+    default:
+        length = aStarSearch(grid, src, dest, heuristic, moves);
+    }
+    chrono::duration<double> search_time
+        = chrono::steady_clock::now() - search_start;
+    printf("%d %.9f %ld %ld %.9f\n", length, search_time.count(), nodesExpanded,
+           nodesPushed, pathCost);
+    fflush(stdout);
+}
+
+// Persistent mode: the map is already loaded, answer one query per stdin
+// line of the form "<start_row> <start_col> <goal_row> <goal_col> <heuristic> [<moves>]"
+void serve(const Grid& grid, SearchEngine engine)
+{
+    string line;
+    while (getline(cin, line)) {
+        istringstream in(line);
+        string first;
+        if (!(in >> first)) {
+            continue;
+        }
+        if (first == "quit") {
+            break;
         }
-        row++;
+        // A query needs five integers and may add a sixth for the moves; a
+        // malformed one can name no cell, so it has no path, as an
+        // out-of-range one has
+        auto query_start = chrono::steady_clock::now();
+        istringstream fields(line);
+        int start_row, start_col, goal_row, goal_col, heuristic, moves;
+        bool valid = static_cast<bool>(fields >> start_row >> start_col >> goal_row >> goal_col >> heuristic);
+        if (valid && !(fields >> moves)) {
+            valid = fields.eof();
+            moves = 4;
+        }
+        if (!valid) {
+            chrono::duration<double> parse_time = chrono::steady_clock::now() - query_start;
+            printf("-1 %.9f 0 0 %.9f\n", parse_time.count(), -1.0);
+            fflush(stdout);
+            continue;
+        }
+        runQuery(grid, make_pair(start_row, start_col),
+                 make_pair(goal_row, goal_col), heuristic, moves, engine);
     }
 }
 
 int main(int argc, char* argv[]) {
-    if (argc != 8) {
-        cerr << "Usage: " << argv[0] << " <lang> <map_file> <start_x> <start_y> <goal_x> <goal_y>" << endl;
+    // "--engine astar|jps|bidir" may appear anywhere on the command line
+    vector<string> args(argv + 1, argv + argc);
+    SearchEngine engine = ENGINE_ASTAR;
+    bool engine_ok = true;
+    auto engine_arg = find(args.begin(), args.end(), "--engine");
+    if (engine_arg != args.end()) {
+        string name = engine_arg + 1 != args.end() ? *(engine_arg + 1) : "";
+        if (name == "jps")
+            engine = ENGINE_JPS;
+        else if (name == "bidir")
+            engine = ENGINE_BIDIR;
+        else
+            engine_ok = name == "astar";
+        args.erase(engine_arg, engine_arg + 1 != args.end() ? engine_arg + 2 : engine_arg + 1);
+    }
+
+    bool serve_mode = args.size() == 3 && args[2] == "--serve";
+    if ((args.size() != 7 && args.size() != 8 && !serve_mode) || !engine_ok) {
+        cerr << "Usage: " << argv[0] << " [--engine astar|jps|bidir] <lang> <map_file> <start_row> <start_col> <goal_row> <goal_col> <heuristic> [<moves>]" << endl;
+        cerr << "       " << argv[0] << " [--engine astar|jps|bidir] <lang> <map_file> --serve" << endl;
         return 1;
     }
 
     // Read command-line arguments
-    string lang = argv[1];  // Language (could be ignored if not needed)
-    string map_file = argv[2];
-    int start_x = stoi(argv[3]);
-    int start_y = stoi(argv[4]);
-    int goal_x = stoi(argv[5]);
-    int goal_y = stoi(argv[6]);
-    int heuristic = stoi(argv[7]);
-
-    // Load the map from the file
-    int grid[64][COL];
-    load_map(map_file, grid);
+    string lang = args[0];  // Language (could be ignored if not needed)
+    string map_file = args[1];
+
+    // Load the map from the file, reporting how long it took
+    auto load_start = chrono::steady_clock::now();
+    Grid grid;
+    try {
+        load_map(map_file, grid);
+        load_components(map_file);
+    } catch (const exception& e) {
+        cerr << e.what() << endl;
+        return 1;
+    }
+    chrono::duration<double> load_time
+        = chrono::steady_clock::now() - load_start;
+    printf("READY %.9f\n", load_time.count());
+    fflush(stdout);
+
+    if (serve_mode) {
+        serve(grid, engine);
+        return 0;
+    }
+
+    int start_row = stoi(args[2]);
+    int start_col = stoi(args[3]);
+    int goal_row = stoi(args[4]);
+    int goal_col = stoi(args[5]);
+    int heuristic = stoi(args[6]);
+    int moves = args.size() > 7 ? stoi(args[7]) : 4;
 
     // Run the A* algorithm
-    Pair src = make_pair(start_x, start_y);
-    Pair dest = make_pair(goal_x, goal_y);
-    aStarSearch(grid, src, dest, heuristic);
+    Pair src = make_pair(start_row, start_col);
+    Pair dest = make_pair(goal_row, goal_col);
+    runQuery(grid, src, dest, heuristic, moves, engine);
 
     return 0;
-}
\ No newline at end of file
+}
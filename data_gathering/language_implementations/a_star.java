@@ -2,9 +2,17 @@
 import java.io.BufferedReader;
 import java.io.FileReader;
 import java.io.IOException;
+import java.io.InputStreamReader;
+import java.nio.ByteOrder;
+import java.nio.MappedByteBuffer;
+import java.nio.channels.FileChannel;
+import java.nio.file.Files;
+import java.nio.file.Path;
+import java.nio.file.Paths;
+import java.nio.file.StandardOpenOption;
 import java.util.ArrayList;
 import java.util.Collections;
-import java.util.HashMap;
+import java.util.Arrays;
 import java.util.LinkedHashMap;
 import java.util.List;
 import java.util.Map;
@@ -23,67 +31,349 @@ class Cell {
     }
 }
 
+// The open list: an indexed binary min-heap of cell ids (row * COL + col).
+// pos[id] is the cell's place in the heap, or -1 if it is not on it, so a
+// cell that is reached by a cheaper path has its key lowered in place
+// (decrease-key) instead of being added a second time. Ties on f go to the
+// larger g, then to the smaller id, so the order of expansion is fully
+// determined
+class OpenList {
+    private final int[] heap;
+    private final int[] pos;
+    private final double[] f;
+    private final double[] g;
+    private int size = 0;
+
+    OpenList(int capacity)
+    {
+        heap = new int[capacity];
+        pos = new int[capacity];
+        Arrays.fill(pos, -1);
+        f = new double[capacity];
+        g = new double[capacity];
+    }
+
+    boolean isEmpty()
+    {
+        return size == 0;
+    }
+
+    private boolean less(int a, int b)
+    {
+        if (f[a] != f[b]) {
+            return f[a] < f[b];
+        }
+        if (g[a] != g[b]) {
+            return g[a] > g[b];
+        }
+        return a < b;
+    }
+
+    // Add a cell, or lower its key if it is already on the list
+    void push(int id, double fValue, double gValue)
+    {
+        f[id] = fValue;
+        g[id] = gValue;
+        if (pos[id] == -1) {
+            heap[size] = id;
+            pos[id] = size;
+            size++;
+        }
+        siftUp(pos[id]);
+    }
+
+    // Remove and return the id with the smallest key
+    int pop()
+    {
+        int top = heap[0];
+        pos[top] = -1;
+        size--;
+        if (size > 0) {
+            heap[0] = heap[size];
+            pos[heap[0]] = 0;
+            siftDown(0);
+        }
+        return top;
+    }
+
+    private void siftUp(int index)
+    {
+        int id = heap[index];
+        while (index > 0) {
+            int parent = (index - 1) >> 1;
+            if (!less(id, heap[parent])) {
+                break;
+            }
+            heap[index] = heap[parent];
+            pos[heap[index]] = index;
+            index = parent;
+        }
+        heap[index] = id;
+        pos[id] = index;
+    }
+
+    private void siftDown(int index)
+    {
+        int id = heap[index];
+        while (true) {
+            int child = 2 * index + 1;
+            if (child >= size) {
+                break;
+            }
+            if (child + 1 < size && less(heap[child + 1], heap[child])) {
+                child++;
+            }
+            if (!less(heap[child], id)) {
+                break;
+            }
+            heap[index] = heap[child];
+            pos[heap[index]] = index;
+            index = child;
+        }
+        heap[index] = id;
+        pos[id] = index;
+    }
+}
+
 public class a_star {
 
-    private static final int ROW = 64;
-    private static final int COL = 64;
+    // Grid size, set from the map header by loadMap
+    private static int ROW = 0;
+    private static int COL = 0;
+
+    // Characters that mark a passable cell in a Moving-AI .map file
+    private static final String PASSABLE = ".GS";
+
+    // Binary map (.grid) files: the magic, the height and width as little-endian
+    // uint32, then one byte per cell row by row, 1 for passable and 0 for blocked
+    private static final int GRID_MAGIC = 0x44495247; // "GRID" read as a little-endian int
+    private static final int GRID_HEADER_SIZE = 12;
+
+    // Connected-component index (.comp) files: the magic, the same header, then
+    // one little-endian int32 label per cell. Cells with different labels have no
+    // path between them (diagonal moves never cut corners, so this holds for 4- and
+    // 8-connected movement alike)
+    private static final int COMP_MAGIC = 0x504d4f43; // "COMP" read as a little-endian int
+
+    // The memory-mapped component index of the loaded map, or null if it has none
+    private static MappedByteBuffer components = null;
+
+    // Work done by the last search: nodes taken off and put on the open list
+    private static long nodesExpanded = 0;
+    private static long nodesPushed = 0;
+
+    // Cost of the path found by the last search, or -1 if there was none
+    private static double pathCost = -1;
+
+    private static final double SQRT2 = Math.sqrt(2);
+
+    // Moves as {d_row, d_col}: North, South, East, West, then the four
+    // diagonals that are only used in 8-connected mode
+    private static final int[][] DIRECTIONS = {
+        { -1, 0 }, { 1, 0 }, { 0, 1 }, { 0, -1 },
+        { -1, 1 }, { -1, -1 }, { 1, 1 }, { 1, -1 }
+    };
 
     public static void main(String[] args)
     {
-        if (args.length != 7) {
-            System.err.println("Usage: java AStar <lang> <map_file> <start_x> <start_y> <goal_x> <goal_y>");
+        boolean serveMode = args.length == 3 && args[2].equals("--serve");
+        if (args.length != 7 && args.length != 8 && !serveMode) {
+            System.err.println("Usage: java a_star <lang> <map_file> <start_row> <start_col> <goal_row> <goal_col> <heuristic> [<moves>]");
+            System.err.println("       java a_star <lang> <map_file> --serve");
             return;
         }
 
         // Read command-line arguments
         String lang = args[0]; // Language (could be ignored if not needed)
         String mapFile = args[1];
-        int startX = Integer.parseInt(args[2]);
-        int startY = Integer.parseInt(args[3]);
-        int goalX = Integer.parseInt(args[4]);
-        int goalY = Integer.parseInt(args[5]);
-        int heuristic = Integer.parseInt(args[6]);
 
-        // Define the grid
-        int[][] grid = new int[ROW][COL]; // Adjust the number of rows and columns as needed
+        int[][] grid;
 
+        long loadStart = System.nanoTime();
         try {
             // Load the map from the file
-            loadMap(mapFile, grid);
+            grid = loadMap(mapFile);
+            components = loadComponents(mapFile);
         } catch (IOException e) {
             e.printStackTrace();
             return;
         }
+        System.out.printf("READY %.9f%n", (System.nanoTime() - loadStart) / 1e9);
+        System.out.flush();
+
+        if (serveMode) {
+            try {
+                serve(grid);
+            } catch (IOException e) {
+                e.printStackTrace();
+            }
+            return;
+        }
+
+        int startRow = Integer.parseInt(args[2]);
+        int startCol = Integer.parseInt(args[3]);
+        int goalRow = Integer.parseInt(args[4]);
+        int goalCol = Integer.parseInt(args[5]);
+        int heuristic = Integer.parseInt(args[6]);
+        int moves = args.length > 7 ? Integer.parseInt(args[7]) : 4;
 
         // Run the A* algorithm
-        int[] start = { startX, startY };
-        int[] goal = { goalX, goalY };
-        aStarSearch(grid, start, goal, heuristic);
+        int[] start = { startRow, startCol };
+        int[] goal = { goalRow, goalCol };
+        runQuery(grid, start, goal, heuristic, moves);
+    }
+
+    // Run one query and print "<path_length> <search_seconds> <expanded> <pushed> <path_cost>", timing
+    // only the search itself with the monotonic high-resolution clock
+    private static void runQuery(int[][] grid, int[] start, int[] goal,
+                                 int heuristic, int moves)
+    {
+        long searchStart = System.nanoTime();
+        int length = aStarSearch(grid, start, goal, heuristic, moves);
+        long searchTime = System.nanoTime() - searchStart;
+        System.out.printf("%d %.9f %d %d %.9f%n", length, searchTime / 1e9,
+                          nodesExpanded, nodesPushed, pathCost);
+        System.out.flush();
     }
 
-    public static void loadMap(String filename, int[][] grid) throws IOException {
-        BufferedReader reader = new BufferedReader(new FileReader(filename));
+    // Persistent mode: the map is already loaded, answer one query per stdin
+    // line of the form "<start_row> <start_col> <goal_row> <goal_col> <heuristic> [<moves>]"
+    private static void serve(int[][] grid) throws IOException
+    {
+        BufferedReader reader = new BufferedReader(new InputStreamReader(System.in));
         String line;
-        int lineCount = 0;
+        while ((line = reader.readLine()) != null) {
+            String[] parts = line.trim().split("\\s+");
+            if (parts[0].isEmpty()) {
+                continue;
+            }
+            if (parts[0].equals("quit")) {
+                break;
+            }
+            // Five integers, then the moves if there is a sixth field. A line
+            // that does not parse gets the no-path answer rather than ending
+            // the runner
+            long queryStart = System.nanoTime();
+            int[] fields = new int[Math.min(parts.length, 6)];
+            try {
+                for (int i = 0; i < fields.length; i++) {
+                    fields[i] = Integer.parseInt(parts[i]);
+                }
+            } catch (NumberFormatException e) {
+                fields = new int[0];
+            }
+            if (fields.length < 5) {
+                System.out.printf("-1 %.9f 0 0 %.9f%n", (System.nanoTime() - queryStart) / 1e9, -1.0);
+                System.out.flush();
+                continue;
+            }
+            int[] start = { fields[0], fields[1] };
+            int[] goal = { fields[2], fields[3] };
+            int moves = fields.length > 5 ? fields[5] : 4;
+            runQuery(grid, start, goal, fields[4], moves);
+        }
+    }
 
-        // Skip the first 4 lines
-        while (lineCount < 4 && (line = reader.readLine()) != null) {
-            lineCount++;
+    // Load a Moving-AI .map file: a header ("type", "height", "width", "map")
+    // followed by one line per row. Passable cells become 1, everything else 0.
+    // A binary .grid file is recognised by its magic and read with loadBinaryMap
+    public static int[][] loadMap(String filename) throws IOException {
+        try (FileChannel channel = FileChannel.open(Paths.get(filename), StandardOpenOption.READ)) {
+            if (channel.size() >= GRID_HEADER_SIZE) {
+                MappedByteBuffer buffer = channel.map(FileChannel.MapMode.READ_ONLY, 0, channel.size());
+                buffer.order(ByteOrder.LITTLE_ENDIAN);
+                if (buffer.getInt(0) == GRID_MAGIC) {
+                    return loadBinaryMap(filename, buffer);
+                }
+            }
         }
 
-        // Read the map into the grid
-        int row = 0;
-        while ((line = reader.readLine()) != null) {
-            for (int col = 0; col < line.length(); col++) {
-                if (line.charAt(col) == '.') {
-                    grid[row][col] = 1; // Good space
-                } else if (line.charAt(col) == 'T' || line.charAt(col) == '@') {
-                    grid[row][col] = 0; // Bad space
+        try (BufferedReader reader = new BufferedReader(new FileReader(filename))) {
+            String line;
+            int height = -1;
+            int width = -1;
+
+            // Read the header up to the "map" line
+            while ((line = reader.readLine()) != null) {
+                String[] parts = line.trim().split("\\s+");
+                if (parts[0].equals("height")) {
+                    height = Integer.parseInt(parts[1]);
+                } else if (parts[0].equals("width")) {
+                    width = Integer.parseInt(parts[1]);
+                } else if (parts[0].equals("map")) {
+                    break;
+                }
+            }
+            if (height < 0 || width < 0) {
+                throw new IOException(filename + ": missing height/width in the map header");
+            }
+
+            // Read the map into the grid
+            int[][] grid = new int[height][width];
+            for (int row = 0; row < height; row++) {
+                line = reader.readLine();
+                if (line == null || line.length() < width) {
+                    throw new IOException(filename + ": row " + row + " is shorter than the declared width " + width);
                 }
+                for (int col = 0; col < width; col++) {
+                    grid[row][col] = PASSABLE.indexOf(line.charAt(col)) >= 0 ? 1 : 0;
+                }
+            }
+
+            ROW = height;
+            COL = width;
+            return grid;
+        }
+    }
+
+    // Copy the cells of a memory-mapped .grid file into the grid; nothing is parsed
+    private static int[][] loadBinaryMap(String filename, MappedByteBuffer buffer) throws IOException {
+        int height = buffer.getInt(4);
+        int width = buffer.getInt(8);
+        if (buffer.capacity() < GRID_HEADER_SIZE + (long) height * width) {
+            throw new IOException(filename + ": not a complete .grid file");
+        }
+
+        int[][] grid = new int[height][width];
+        int offset = GRID_HEADER_SIZE;
+        for (int row = 0; row < height; row++) {
+            for (int col = 0; col < width; col++) {
+                grid[row][col] = buffer.get(offset++);
+            }
+        }
+
+        ROW = height;
+        COL = width;
+        return grid;
+    }
+
+    // Memory-map the component index next to the map file (same name, .comp
+    // extension), or return null if there is none
+    private static MappedByteBuffer loadComponents(String mapFile) throws IOException {
+        Path path = Paths.get(mapFile);
+        String name = path.getFileName().toString();
+        int dot = name.lastIndexOf('.');
+        Path compFile = path.resolveSibling((dot > 0 ? name.substring(0, dot) : name) + ".comp");
+        if (!Files.exists(compFile)) {
+            return null;
+        }
+
+        try (FileChannel channel = FileChannel.open(compFile, StandardOpenOption.READ)) {
+            if (channel.size() < GRID_HEADER_SIZE + 4L * ROW * COL) {
+                throw new IOException(compFile + ": not a component index for this map");
+            }
+            MappedByteBuffer buffer = channel.map(FileChannel.MapMode.READ_ONLY, 0, channel.size());
+            buffer.order(ByteOrder.LITTLE_ENDIAN);
+            if (buffer.getInt(0) != COMP_MAGIC || buffer.getInt(4) != ROW || buffer.getInt(8) != COL) {
+                throw new IOException(compFile + ": not a component index for this map");
             }
-            row++;
+            return buffer;
         }
-        reader.close();
+    }
+
+    private static int componentOf(int row, int col)
+    {
+        return components.getInt(GRID_HEADER_SIZE + 4 * (row * COL + col));
     }
 
     private static boolean isValid(int row, int col)
@@ -114,9 +404,38 @@ public class a_star {
     private static double calculateHValue1(int row, int col, int[] dest) {
         return Math.abs(row - dest[0]) + Math.abs(col - dest[1]);
     }
+
+    // Octile distance: the cost of the best path on an empty 8-connected grid
+    private static double calculateHValue2(int row, int col, int[] dest) {
+        int dRow = Math.abs(row - dest[0]);
+        int dCol = Math.abs(col - dest[1]);
+        return (dRow + dCol) + (SQRT2 - 2) * Math.min(dRow, dCol);
+    }
+
+    // Chebyshev distance: as octile, but with diagonal moves counted as 1
+    private static double calculateHValue3(int row, int col, int[] dest) {
+        return Math.max(Math.abs(row - dest[0]), Math.abs(col - dest[1]));
+    }
+
+    // The heuristic selected on the command line: 0 Euclidean, 1 Manhattan,
+    // 2 octile, 3 Chebyshev. Any other number means Manhattan
+    private static double heuristicValue(int row, int col, int[] dest,
+                                         int heuristic)
+    {
+        switch (heuristic) {
+            case 0:
+                return calculateHValue(row, col, dest);
+            case 2:
+                return calculateHValue2(row, col, dest);
+            case 3:
+                return calculateHValue3(row, col, dest);
+            default:
+                return calculateHValue1(row, col, dest);
+        }
+    }
     
 
-    private static void tracePath(Cell[][] cellDetails,
+    private static int tracePath(Cell[][] cellDetails,
                                   int[] dest)
     {
         //System.out.println("The Path is ");
@@ -149,27 +468,40 @@ public class a_star {
             }
         });
         int pathLength = pathList.size();
-        System.out.println(pathLength);
+        return pathLength;
     }
 
-    public static void aStarSearch(int[][] grid, int[] src,
-                                    int[] dest, int heuristic)
+    // moves is 4 (straight moves only) or 8 (diagonals too, at cost
+    // sqrt(2), without cutting corners)
+    public static int aStarSearch(int[][] grid, int[] src,
+                                    int[] dest, int heuristic, int moves)
     {
+        nodesExpanded = 0;
+        nodesPushed = 0;
+        pathCost = -1;
+
         if (!isValid(src[0], src[1])
             || !isValid(dest[0], dest[1])) {
             //System.out.println(                "Source or destination is invalid");
-            return;
+            return -1;
         }
 
         if (!isUnBlocked(grid, src[0], src[1])
             || !isUnBlocked(grid, dest[0], dest[1])) {
             //System.out.println(                "Source or the destination is blocked");
-            return;
+            return -1;
+        }
+
+        // The source and destination are in different connected components
+        if (components != null
+            && componentOf(src[0], src[1]) != componentOf(dest[0], dest[1])) {
+            return -1;
         }
 
         if (isDestination(src[0], src[1], dest)) {
             //System.out.println(                "We are already at the destination");
-            return;
+            pathCost = 0;
+            return 1;
         }
 
         boolean[][] closedList = new boolean[ROW][COL];
@@ -196,173 +528,67 @@ public class a_star {
         cellDetails[i][j].parent_i = i;
         cellDetails[i][j].parent_j = j;
 
-        Map<Double, int[]> openList = new HashMap<>();
-        openList.put(0.0, new int[] { i, j });
+        OpenList openList = new OpenList(ROW * COL);
+        openList.push(i * COL + j, 0.0, 0.0);
+        nodesPushed++;
 
         boolean foundDest = false;
+        int numMoves = moves == 8 ? 8 : 4;
 
         while (!openList.isEmpty()) {
-            Map.Entry<Double, int[]> p
-                = openList.entrySet().iterator().next();
-            for (Map.Entry<Double, int[]> q :
-                 openList.entrySet()) {
-                if (q.getKey() < p.getKey()) {
-                    p = q;
-                }
+            // Remove the cell with the smallest f from the open list
+            int id = openList.pop();
+            i = id / COL;
+            j = id % COL;
+
+            // The destination is tested when it is popped rather than when
+            // it is generated, so the path is the cheapest one even with
+            // diagonal costs
+            if (isDestination(i, j, dest)) {
+                //System.out.println(                        "The destination cell is found");
+                foundDest = true;
+                pathCost = cellDetails[i][j].g;
+                return tracePath(cellDetails, dest);
             }
 
-            openList.remove(p.getKey());
-
-            i = p.getValue()[0];
-            j = p.getValue()[1];
             closedList[i][j] = true;
+            nodesExpanded++;
 
-            double gNew, hNew, fNew;
-
-            // 1st Successor (North)
-            if (isValid(i - 1, j)) {
-                if (isDestination(i - 1, j, dest)) {
-                    cellDetails[i - 1][j].parent_i = i;
-                    cellDetails[i - 1][j].parent_j = j;
-                    //System.out.println(                        "The destination cell is found");
-                    tracePath(cellDetails, dest);
-                    foundDest = true;
-                    return;
-                }
-                else if (!closedList[i - 1][j]
-                         && isUnBlocked(grid, i - 1, j)) {
-                    gNew = cellDetails[i][j].g + 1;
-                    if(heuristic == 0){
-                        hNew = calculateHValue(i - 1, j, dest);
-                    }
-                    else{
-                        hNew = calculateHValue1(i - 1, j, dest);
-                    }
-                    fNew = gNew + hNew;
-
-                    if (cellDetails[i - 1][j].f
-                            == Double.POSITIVE_INFINITY
-
-                        || cellDetails[i - 1][j].f > fNew) {
-                        openList.put(
-                            fNew, new int[] { i - 1, j });
-
-                        cellDetails[i - 1][j].f = fNew;
-                        cellDetails[i - 1][j].g = gNew;
-                        cellDetails[i - 1][j].h = hNew;
-                        cellDetails[i - 1][j].parent_i = i;
-                        cellDetails[i - 1][j].parent_j = j;
-                    }
-                }
-            }
+            // N, S, E and W are always generated; the diagonals only in
+            // 8-connected mode
+            for (int d = 0; d < numMoves; d++) {
+                int ni = i + DIRECTIONS[d][0];
+                int nj = j + DIRECTIONS[d][1];
 
-            // 2nd Successor (South)
-            if (isValid(i + 1, j)) {
-                if (isDestination(i + 1, j, dest)) {
-                    cellDetails[i + 1][j].parent_i = i;
-                    cellDetails[i + 1][j].parent_j = j;
-                    //System.out.println(                        "The destination cell is found");
-                    tracePath(cellDetails, dest);
-                    foundDest = true;
-                    return;
-                }
-                else if (!closedList[i + 1][j]
-                         && isUnBlocked(grid, i + 1, j)) {
-                    gNew = cellDetails[i][j].g + 1;
-                    if(heuristic == 0){
-                        hNew = calculateHValue(i - 1, j, dest);
-                    }
-                    else{
-                        hNew = calculateHValue1(i - 1, j, dest);
-                    }
-                    fNew = gNew + hNew;
-
-                    if (cellDetails[i + 1][j].f
-                            == Double.POSITIVE_INFINITY
-                        || cellDetails[i + 1][j].f > fNew) {
-                        openList.put(
-                            fNew, new int[] { i + 1, j });
-
-                        cellDetails[i + 1][j].f = fNew;
-                        cellDetails[i + 1][j].g = gNew;
-                        cellDetails[i + 1][j].h = hNew;
-                        cellDetails[i + 1][j].parent_i = i;
-                        cellDetails[i + 1][j].parent_j = j;
-                    }
+                if (!isValid(ni, nj) || !isUnBlocked(grid, ni, nj)
+                    || closedList[ni][nj]) {
+                    continue;
                 }
-            }
 
-            // 3rd Successor (East)
-            if (isValid(i, j + 1)) {
-                if (isDestination(i, j + 1, dest)) {
-                    cellDetails[i][j + 1].parent_i = i;
-                    cellDetails[i][j + 1].parent_j = j;
-                    //System.out.println(                        "The destination cell is found");
-                    tracePath(cellDetails, dest);
-                    foundDest = true;
-                    return;
+                // A diagonal move may not cut the corner of a blocked cell
+                if (d >= 4 && (!isUnBlocked(grid, ni, j)
+                               || !isUnBlocked(grid, i, nj))) {
+                    continue;
                 }
-                else if (!closedList[i][j + 1]
-                         && isUnBlocked(grid, i, j + 1)) {
-                    gNew = cellDetails[i][j].g + 1;
-                    if(heuristic == 0){
-                        hNew = calculateHValue(i - 1, j, dest);
-                    }
-                    else{
-                        hNew = calculateHValue1(i - 1, j, dest);
-                    }
-                    fNew = gNew + hNew;
-
-                    if (cellDetails[i][j + 1].f
-                            == Double.POSITIVE_INFINITY
-                        || cellDetails[i][j + 1].f > fNew) {
-                        openList.put(
-                            fNew, new int[] { i, j + 1 });
-
-                        cellDetails[i][j + 1].f = fNew;
-                        cellDetails[i][j + 1].g = gNew;
-                        cellDetails[i][j + 1].h = hNew;
-                        cellDetails[i][j + 1].parent_i = i;
-                        cellDetails[i][j + 1].parent_j = j;
-                    }
-                }
-            }
 
-            // 4th Successor (West)
-            if (isValid(i, j - 1)) {
-                if (isDestination(i, j - 1, dest)) {
-                    cellDetails[i][j - 1].parent_i = i;
-                    cellDetails[i][j - 1].parent_j = j;
-                    //System.out.println(                        "The destination cell is found");
-                    tracePath(cellDetails, dest);
-                    foundDest = true;
-                    return;
-                }
-                else if (!closedList[i][j - 1]
-                         && isUnBlocked(grid, i, j - 1)) {
-                    gNew = cellDetails[i][j].g + 1;
-                    if(heuristic == 0){
-                        hNew = calculateHValue(i - 1, j, dest);
-                    }
-                    else{
-                        hNew = calculateHValue1(i - 1, j, dest);
-                    }
-                    fNew = gNew + hNew;
-
-                    if (cellDetails[i][j - 1].f
-                            == Double.POSITIVE_INFINITY
-                        || cellDetails[i][j - 1].f > fNew) {
-                        openList.put(
-                            fNew, new int[] { i, j - 1 });
-
-                        cellDetails[i][j - 1].f = fNew;
-                        cellDetails[i][j - 1].g = gNew;
-                        cellDetails[i][j - 1].h = hNew;
-                        cellDetails[i][j - 1].parent_i = i;
-                        cellDetails[i][j - 1].parent_j = j;
-                    }
+                double gNew = cellDetails[i][j].g + (d < 4 ? 1 : SQRT2);
+                double hNew = heuristicValue(ni, nj, dest, heuristic);
+                double fNew = gNew + hNew;
+
+                if (cellDetails[ni][nj].f == Double.POSITIVE_INFINITY
+                    || cellDetails[ni][nj].f > fNew) {
+                    openList.push(ni * COL + nj, fNew, gNew);
+                    nodesPushed++;
+
+                    cellDetails[ni][nj].f = fNew;
+                    cellDetails[ni][nj].g = gNew;
+                    cellDetails[ni][nj].h = hNew;
+                    cellDetails[ni][nj].parent_i = i;
+                    cellDetails[ni][nj].parent_j = j;
                 }
             }
         }
+
+        return -1;
     }
 }
@@ -1,8 +1,38 @@
 //reference: entire A* alg from geeksforgeeks (https://www.geeksforgeeks.org/a-search-algorithm/)
 const fs = require('fs');
 
-let ROW = 64;
-let COL = 64;
+// Grid size, set from the map header by loadMap
+let ROW = 0;
+let COL = 0;
+
+// Characters that mark a passable cell in a Moving-AI .map file
+const PASSABLE = ".GS";
+
+// Binary map (.grid) files: the magic, the height and width as little-endian
+// uint32, then one byte per cell row by row, 1 for passable and 0 for blocked
+const GRID_MAGIC = "GRID";
+const GRID_HEADER_SIZE = 12;
+
+// Connected-component index (.comp) files: the magic, the same header, then
+// one little-endian int32 label per cell. Cells with different labels have no
+// path between them (diagonal moves never cut corners, so this holds for 4- and
+// 8-connected movement alike)
+const COMP_MAGIC = "COMP";
+
+// The component index of the loaded map, or null if it has none
+let components = null;
+
+// Work done by the last search: nodes taken off and put on the open list
+let nodesExpanded = 0;
+let nodesPushed = 0;
+
+// Cost of the path found by the last search, or -1 if there was none
+let pathCost = -1;
+
+// Moves as [d_row, d_col]: North, South, East, West, then the four
+// diagonals that are only used in 8-connected mode
+const DIRECTIONS = [[-1, 0], [1, 0], [0, 1], [0, -1],
+                    [-1, 1], [-1, -1], [1, 1], [1, -1]];
 
 // typedef pair<double, pair<int, int> > pPair;
 
@@ -19,6 +49,92 @@ class cell {
     }
 }
 
+// The open list: an indexed binary min-heap of cell ids
+// (row * COL + col). pos[id] is the cell's place in the heap,
+// or -1 if it is not on it, so a cell that is reached by a
+// cheaper path has its key lowered in place (decrease-key)
+// instead of being added a second time. Ties on f go to the
+// larger g, then to the smaller id, so the order of expansion
+// is fully determined
+class OpenList {
+    constructor(size) {
+        this.heap = new Int32Array(size);
+        this.pos = new Int32Array(size).fill(-1);
+        this.f = new Float64Array(size);
+        this.g = new Float64Array(size);
+        this.size = 0;
+    }
+
+    isEmpty() {
+        return this.size == 0;
+    }
+
+    less(a, b) {
+        if (this.f[a] != this.f[b])
+            return this.f[a] < this.f[b];
+        if (this.g[a] != this.g[b])
+            return this.g[a] > this.g[b];
+        return a < b;
+    }
+
+    // Add a cell, or lower its key if it is already on the list
+    push(id, f, g) {
+        this.f[id] = f;
+        this.g[id] = g;
+        if (this.pos[id] == -1) {
+            this.heap[this.size] = id;
+            this.pos[id] = this.size;
+            this.size++;
+        }
+        this.siftUp(this.pos[id]);
+    }
+
+    // Remove and return the id with the smallest key
+    pop() {
+        const top = this.heap[0];
+        this.pos[top] = -1;
+        this.size--;
+        if (this.size > 0) {
+            this.heap[0] = this.heap[this.size];
+            this.pos[this.heap[0]] = 0;
+            this.siftDown(0);
+        }
+        return top;
+    }
+
+    siftUp(index) {
+        const id = this.heap[index];
+        while (index > 0) {
+            const parent = (index - 1) >> 1;
+            if (!this.less(id, this.heap[parent]))
+                break;
+            this.heap[index] = this.heap[parent];
+            this.pos[this.heap[index]] = index;
+            index = parent;
+        }
+        this.heap[index] = id;
+        this.pos[id] = index;
+    }
+
+    siftDown(index) {
+        const id = this.heap[index];
+        while (true) {
+            let child = 2 * index + 1;
+            if (child >= this.size)
+                break;
+            if (child + 1 < this.size && this.less(this.heap[child + 1], this.heap[child]))
+                child++;
+            if (!this.less(this.heap[child], id))
+                break;
+            this.heap[index] = this.heap[child];
+            this.pos[this.heap[index]] = index;
+            index = child;
+        }
+        this.heap[index] = id;
+        this.pos[id] = index;
+    }
+}
+
 // A Utility Function to check whether given cell (row, col)
 // is a valid cell or not.
 function isValid(row, col)
@@ -59,6 +175,27 @@ function calculateHValue1(row, col, dest) {
     // Return using the Manhattan distance formula
     return Math.abs(row - dest[0]) + Math.abs(col - dest[1]);
 }
+function calculateHValue2(row, col, dest) {
+    // Octile distance: the cost of the best path on an empty 8-connected grid
+    const dRow = Math.abs(row - dest[0]);
+    const dCol = Math.abs(col - dest[1]);
+    return dRow + dCol + (Math.SQRT2 - 2) * Math.min(dRow, dCol);
+}
+function calculateHValue3(row, col, dest) {
+    // Chebyshev distance: as octile, but with diagonal moves counted as 1
+    return Math.max(Math.abs(row - dest[0]), Math.abs(col - dest[1]));
+}
+
+// The heuristic selected on the command line: 0 Euclidean, 1 Manhattan,
+// 2 octile, 3 Chebyshev. Any other number means Manhattan
+function heuristicValue(row, col, dest, heuristic) {
+    switch (heuristic) {
+        case 0: return calculateHValue(row, col, dest);
+        case 2: return calculateHValue2(row, col, dest);
+        case 3: return calculateHValue3(row, col, dest);
+        default: return calculateHValue1(row, col, dest);
+    }
+}
 
 
 // A Utility Function to trace the path from the source
@@ -81,7 +218,7 @@ function tracePath(cellDetails, dest)
     }
 
     Path.push([row, col]);
-    console.log(Path.length);
+    let pathLength = Path.length;
     while (Path.length > 0) {
         let p = Path[0];
         Path.shift();
@@ -92,31 +229,76 @@ function tracePath(cellDetails, dest)
         //else console.log("-> (" + p[0] + ", " + p[1] + ")");
     }
 
-    return;
+    return pathLength;
 }
 
+// Read a .grid file. Node has no memory mapping in its standard library, so
+// the file is read in one call; each row is a view of that buffer, so
+// grid[row][col] reads the cell without anything being parsed or copied
+function loadBinaryMap(buffer) {
+    if (buffer.length < GRID_HEADER_SIZE) {
+        throw new Error("not a complete .grid file");
+    }
+    const height = buffer.readUInt32LE(4);
+    const width = buffer.readUInt32LE(8);
+    if (buffer.length < GRID_HEADER_SIZE + height * width) {
+        throw new Error("not a complete .grid file");
+    }
+    const grid = new Array(height);
+    for (let row = 0; row < height; row++) {
+        const offset = GRID_HEADER_SIZE + row * width;
+        grid[row] = buffer.subarray(offset, offset + width);
+    }
+    ROW = height;
+    COL = width;
+    return grid;
+}
+
+// Load a Moving-AI .map file: a header ("type", "height", "width", "map")
+// followed by one line per row. Passable cells become 1, everything else 0.
+// A binary .grid file is recognised by its magic and loaded with loadBinaryMap
 function loadMap(filename) {
     try {
         // Read the map file synchronously
-        const data = fs.readFileSync(filename, 'utf8');
-        const lines = data.split('\n');
-        const grid = [];
-
-        // Skip the first 4 lines (headers or unnecessary data)
-        const mapLines = lines.slice(4);
-
-        mapLines.forEach((line, rowIndex) => {
-            const row = [];
-            for (let col = 0; col < line.length; col++) {
-                if (line.charAt(col) === '.') {
-                    row.push(1); // Good space
-                } else if (line.charAt(col) === 'T' || line.charAt(col) === '@') {
-                    row.push(0); // Bad space
-                }
+        const buffer = fs.readFileSync(filename);
+        if (buffer.toString('latin1', 0, GRID_MAGIC.length) === GRID_MAGIC) {
+            return loadBinaryMap(buffer);
+        }
+        const data = buffer.toString('utf8');
+        const lines = data.split(/\r?\n/);
+        let height = -1;
+        let width = -1;
+
+        // Read the header up to the "map" line
+        let lineIndex = 0;
+        while (lineIndex < lines.length) {
+            const parts = lines[lineIndex++].trim().split(/\s+/);
+            if (parts[0] === "height") {
+                height = parseInt(parts[1]);
+            } else if (parts[0] === "width") {
+                width = parseInt(parts[1]);
+            } else if (parts[0] === "map") {
+                break;
             }
-            grid.push(row);
-        });
+        }
+        if (height < 0 || width < 0) {
+            throw new Error("missing height/width in the map header");
+        }
+
+        const grid = new Array(height);
+        for (let row = 0; row < height; row++) {
+            const line = lines[lineIndex + row];
+            if (line === undefined || line.length < width) {
+                throw new Error("row " + row + " is shorter than the declared width " + width);
+            }
+            grid[row] = new Array(width);
+            for (let col = 0; col < width; col++) {
+                grid[row][col] = PASSABLE.includes(line.charAt(col)) ? 1 : 0;
+            }
+        }
 
+        ROW = height;
+        COL = width;
         return grid;
     } catch (error) {
         console.error("Error reading map file:", error);
@@ -124,42 +306,88 @@ function loadMap(filename) {
 }
 
 
-// A* Search starter function
-function AStarSearchStarter(mapFile, start, goal,heuristic) {
-    //console.log("Loading map...");
-    const grid = loadMap(mapFile);  // Load the grid from the map file
-    
-    if (!grid) {
-        //console.error("Failed to load the grid");
-        return;
+// Read the component index next to the map file (same name, .comp extension),
+// if there is one
+function loadComponents(mapFile) {
+    const path = require('path');
+    const parsed = path.parse(mapFile);
+    const compFile = path.join(parsed.dir, parsed.name + ".comp");
+    if (!fs.existsSync(compFile)) {
+        return null;
+    }
+    const buffer = fs.readFileSync(compFile);
+    if (buffer.length < GRID_HEADER_SIZE + 4 * ROW * COL
+        || buffer.toString('latin1', 0, COMP_MAGIC.length) !== COMP_MAGIC
+        || buffer.readUInt32LE(4) !== ROW || buffer.readUInt32LE(8) !== COL) {
+        throw new Error(compFile + ": not a component index for this map");
     }
+    return buffer;
+}
 
-    //console.log("Starting A* search...");
-    const path = aStarSearch(grid, start, goal,heuristic);
+function componentOf(row, col) {
+    return components.readInt32LE(GRID_HEADER_SIZE + 4 * (row * COL + col));
+}
 
-    if (path) {
-        //console.log("JSPath found:", path);
-    } else {
-        //console.log("JSNo path found.");
-    }
+// Run one query and print "<path_length> <search_seconds> <expanded> <pushed> <path_cost>", timing
+// only the search itself with the monotonic high-resolution clock
+function runQuery(grid, start, goal, heuristic, moves) {
+    const searchStart = process.hrtime.bigint();
+    const length = aStarSearch(grid, start, goal, heuristic, moves);
+    const searchTime = Number(process.hrtime.bigint() - searchStart) / 1e9;
+    process.stdout.write(length + " " + searchTime.toFixed(9) + " "
+                         + nodesExpanded + " " + nodesPushed + " " + pathCost.toFixed(9) + "\n");
+}
+
+// Persistent mode: the map is already loaded, answer one query per stdin
+// line of the form "<start_row> <start_col> <goal_row> <goal_col> <heuristic> [<moves>]"
+function serve(grid) {
+    const rl = require('readline').createInterface({ input: process.stdin });
+    rl.on('line', (line) => {
+        const parts = line.trim().split(/\s+/);
+        if (parts[0] === "") {
+            return;
+        }
+        if (parts[0] === "quit") {
+            rl.close();
+            return;
+        }
+        // parseInt would turn a malformed field into NaN, so every field must
+        // be an integer: five of them, then the moves if there is a sixth.
+        // Any other line gets the no-path answer
+        const queryStart = process.hrtime.bigint();
+        const fields = parts.slice(0, 6).map(part => /^[+-]?\d+$/.test(part) ? Number(part) : NaN);
+        if (fields.length < 5 || fields.some(Number.isNaN)) {
+            const parseTime = Number(process.hrtime.bigint() - queryStart) / 1e9;
+            process.stdout.write("-1 " + parseTime.toFixed(9) + " 0 0 " + (-1).toFixed(9) + "\n");
+            return;
+        }
+        const moves = fields.length > 5 ? fields[5] : 4;
+        runQuery(grid, [fields[0], fields[1]], [fields[2], fields[3]], fields[4], moves);
+    });
 }
 
 
 // A Function to find the shortest path between
 // a given source cell to a destination cell according
-// to A* Search Algorithm
-function aStarSearch(grid, src, dest, heuristic)
+// to A* Search Algorithm. moves is 4 (straight moves
+// only) or 8 (diagonals too, at cost sqrt(2), without
+// cutting corners)
+function aStarSearch(grid, src, dest, heuristic, moves)
 {
+    nodesExpanded = 0;
+    nodesPushed = 0;
+    pathCost = -1;
+
     // If the source is out of range
     if (isValid(src[0], src[1]) == false) {
         //console.log("Source is invalid\n");
-        return;
+        return -1;
     }
 
     // If the destination is out of range
     if (isValid(dest[0], dest[1]) == false) {
         //console.log("Destination is invalid\n");
-        return;
+        return -1;
     }
 
     // Either the source or the destination is blocked
@@ -167,14 +395,21 @@ function aStarSearch(grid, src, dest, heuristic)
         || isUnBlocked(grid, dest[0], dest[1])
                == false) {
         //console.log("Source or the destination is blocked\n");
-        return;
+        return -1;
+    }
+
+    // The source and destination are in different connected components
+    if (components !== null
+        && componentOf(src[0], src[1]) != componentOf(dest[0], dest[1])) {
+        return -1;
     }
 
     // If the destination cell is the same as source cell
     if (isDestination(src[0], src[1], dest)
         == true) {
         //console.log("We are already at the destination\n");
-        return;
+        pathCost = 0;
+        return 1;
     }
 
     // Create a closed list and initialise it to false which
@@ -214,36 +449,46 @@ function aStarSearch(grid, src, dest, heuristic)
     cellDetails[i][j].parent_j = j;
 
     /*
-     Create an open list having information as-
-     <f, <i, j>>
-     where f = g + h,
-     and i, j are the row and column index of that cell
+     Create an open list of cells ordered by f = g + h,
+     where a cell (i, j) is stored as the id i * COL + j.
      Note that 0 <= i <= ROW-1 & 0 <= j <= COL-1
-     This open list is implemented as a set of pair of
-     pair.*/
-    let openList = new Map();
+     This open list is implemented as an indexed binary
+     heap.*/
+    let openList = new OpenList(ROW * COL);
 
     // Put the starting cell on the open list and set its
     // 'f' as 0
-    openList.set(0, [i, j]);
+    openList.push(i * COL + j, 0, 0);
+    nodesPushed++;
 
     // We set this boolean value as false as initially
     // the destination is not reached.
     let foundDest = false;
 
-    while (openList.size > 0) {
-        let p = openList.entries().next().value
-
-        // Remove this vertex from the open list
-        openList.delete(p[0]);
+    const numMoves = moves == 8 ? 8 : 4;
+
+    while (!openList.isEmpty()) {
+        // Remove the vertex with the smallest f from the open list
+        const id = openList.pop();
+        i = Math.floor(id / COL);
+        j = id % COL;
+
+        // The destination is tested when it is popped rather
+        // than when it is generated, so the path is the
+        // cheapest one even with diagonal costs
+        if (isDestination(i, j, dest) == true) {
+            //console.log("The destination cell is found\n");
+            foundDest = true;
+            pathCost = cellDetails[i][j].g;
+            return tracePath(cellDetails, dest);
+        }
 
         // Add this vertex to the closed list
-        i = p[1][0];
-        j = p[1][1];
         closedList[i][j] = true;
+        nodesExpanded++;
 
         /*
-         Generating all the 8 successor of this cell
+         Generating the successors of this cell
 
              N.W   N   N.E
                \   |   /
@@ -253,225 +498,52 @@ function aStarSearch(grid, src, dest, heuristic)
                 /   |  \
              S.W    S   S.E
 
-         Cell-->Popped Cell (i, j)
-         N -->  North       (i-1, j)
-         S -->  South       (i+1, j)
-         E -->  East        (i, j+1)
-         W -->  West           (i, j-1)
-         N.E--> North-East  (i-1, j+1)
-         N.W--> North-West  (i-1, j-1)
-         S.E--> South-East  (i+1, j+1)
-         S.W--> South-West  (i+1, j-1)*/
-
-        // To store the 'g', 'h' and 'f' of the 8 successors
-        let gNew, hNew, fNew;
-
-        //----------- 1st Successor (North) ------------
-
-        // Only process this cell if this is a valid one
-        if (isValid(i - 1, j) == true) {
-            // If the destination cell is the same as the
-            // current successor
-            if (isDestination(i - 1, j, dest) == true) {
-                // Set the Parent of the destination cell
-                cellDetails[i - 1][j].parent_i = i;
-                cellDetails[i - 1][j].parent_j = j;
-                //console.log("The destination cell is found\n");
-                tracePath(cellDetails, dest);
-                foundDest = true;
-                return;
-            }
-            // If the successor is already on the closed
-            // list or if it is blocked, then ignore it.
-            // Else do the following
-            else if (closedList[i - 1][j] == false
-                     && isUnBlocked(grid, i - 1, j)
-                            == true) {
-                gNew = cellDetails[i][j].g + 1;
-                if(heuristic == 0){
-                    hNew = calculateHValue(i - 1, j, dest);
-                }
-                else{
-                    hNew = calculateHValue1(i - 1, j, dest);
-                }                
-                fNew = gNew + hNew;
-
-                // If it isn’t on the open list, add it to
-                // the open list. Make the current square
-                // the parent of this square. Record the
-                // f, g, and h costs of the square cell
-                //                OR
-                // If it is on the open list already, check
-                // to see if this path to that square is
-                // better, using 'f' cost as the measure.
-                if (cellDetails[i - 1][j].f == 2147483647
-                    || cellDetails[i - 1][j].f > fNew) {
-                    openList.set(fNew, [i - 1, j]);
-
-                    // Update the details of this cell
-                    cellDetails[i - 1][j].f = fNew;
-                    cellDetails[i - 1][j].g = gNew;
-                    cellDetails[i - 1][j].h = hNew;
-                    cellDetails[i - 1][j].parent_i = i;
-                    cellDetails[i - 1][j].parent_j = j;
-                }
-            }
-        }
-
-        //----------- 2nd Successor (South) ------------
-
-        // Only process this cell if this is a valid one
-        if (isValid(i + 1, j) == true) {
-            // If the destination cell is the same as the
-            // current successor
-            if (isDestination(i + 1, j, dest) == true) {
-                // Set the Parent of the destination cell
-                cellDetails[i + 1][j].parent_i = i;
-                cellDetails[i + 1][j].parent_j = j;
-                //console.log("The destination cell is found\n");
-                tracePath(cellDetails, dest);
-                foundDest = true;
-                return;
-            }
-            // If the successor is already on the closed
-            // list or if it is blocked, then ignore it.
-            // Else do the following
-            else if (closedList[i + 1][j] == false
-                     && isUnBlocked(grid, i + 1, j)
-                            == true) {
-                gNew = cellDetails[i][j].g + 1;
-                if(heuristic == 0){
-                    hNew = calculateHValue(i - 1, j, dest);
-                }
-                else{
-                    hNew = calculateHValue1(i - 1, j, dest);
-                }  
-                fNew = gNew + hNew;
-
-                // If it isn’t on the open list, add it to
-                // the open list. Make the current square
-                // the parent of this square. Record the
-                // f, g, and h costs of the square cell
-                //                OR
-                // If it is on the open list already, check
-                // to see if this path to that square is
-                // better, using 'f' cost as the measure.
-                if (cellDetails[i + 1][j].f == 2147483647
-                    || cellDetails[i + 1][j].f > fNew) {
-                    openList.set(fNew, [i + 1, j]);
-                    // Update the details of this cell
-                    cellDetails[i + 1][j].f = fNew;
-                    cellDetails[i + 1][j].g = gNew;
-                    cellDetails[i + 1][j].h = hNew;
-                    cellDetails[i + 1][j].parent_i = i;
-                    cellDetails[i + 1][j].parent_j = j;
-                }
-            }
-        }
-
-        //----------- 3rd Successor (East) ------------
-
-        // Only process this cell if this is a valid one
-        if (isValid(i, j + 1) == true) {
-            // If the destination cell is the same as the
-            // current successor
-            if (isDestination(i, j + 1, dest) == true) {
-                // Set the Parent of the destination cell
-                cellDetails[i][j + 1].parent_i = i;
-                cellDetails[i][j + 1].parent_j = j;
-                //console.log("The destination cell is found\n");
-                tracePath(cellDetails, dest);
-                foundDest = true;
-                return;
+         N, S, E and W are always generated; the diagonals
+         only in 8-connected mode.*/
+        for (let d = 0; d < numMoves; d++) {
+            const ni = i + DIRECTIONS[d][0];
+            const nj = j + DIRECTIONS[d][1];
+
+            // If the successor is off the map, blocked or
+            // already on the closed list, ignore it
+            if (isValid(ni, nj) == false
+                || isUnBlocked(grid, ni, nj) == false
+                || closedList[ni][nj] == true) {
+                continue;
             }
 
-            // If the successor is already on the closed
-            // list or if it is blocked, then ignore it.
-            // Else do the following
-            else if (closedList[i][j + 1] == false
-                     && isUnBlocked(grid, i, j + 1)
-                            == true) {
-                gNew = cellDetails[i][j].g + 1;
-                if(heuristic == 0){
-                    hNew = calculateHValue(i - 1, j, dest);
-                }
-                else{
-                    hNew = calculateHValue1(i - 1, j, dest);
-                }  
-                fNew = gNew + hNew;
-
-                // If it isn’t on the open list, add it to
-                // the open list. Make the current square
-                // the parent of this square. Record the
-                // f, g, and h costs of the square cell
-                //                OR
-                // If it is on the open list already, check
-                // to see if this path to that square is
-                // better, using 'f' cost as the measure.
-                if (cellDetails[i][j + 1].f == 2147483647
-                    || cellDetails[i][j + 1].f > fNew) {
-                    openList.set(fNew, [i, j + 1]);
-
-                    // Update the details of this cell
-                    cellDetails[i][j + 1].f = fNew;
-                    cellDetails[i][j + 1].g = gNew;
-                    cellDetails[i][j + 1].h = hNew;
-                    cellDetails[i][j + 1].parent_i = i;
-                    cellDetails[i][j + 1].parent_j = j;
-                }
-            }
-        }
-
-        //----------- 4th Successor (West) ------------
-
-        // Only process this cell if this is a valid one
-        if (isValid(i, j - 1) == true) {
-            // If the destination cell is the same as the
-            // current successor
-            if (isDestination(i, j - 1, dest) == true) {
-                // Set the Parent of the destination cell
-                cellDetails[i][j - 1].parent_i = i;
-                cellDetails[i][j - 1].parent_j = j;
-                //console.log("The destination cell is found\n");
-                tracePath(cellDetails, dest);
-                foundDest = true;
-                return;
+            // A diagonal move may not cut the corner of a
+            // blocked cell
+            if (d >= 4
+                && (isUnBlocked(grid, ni, j) == false
+                    || isUnBlocked(grid, i, nj) == false)) {
+                continue;
             }
 
-            // If the successor is already on the closed
-            // list or if it is blocked, then ignore it.
-            // Else do the following
-            else if (closedList[i][j - 1] == false
-                     && isUnBlocked(grid, i, j - 1)
-                            == true) {
-                gNew = cellDetails[i][j].g + 1;
-                if(heuristic == 0){
-                    hNew = calculateHValue(i - 1, j, dest);
-                }
-                else{
-                    hNew = calculateHValue1(i - 1, j, dest);
-                }  
-                fNew = gNew + hNew;
-
-                // If it isn’t on the open list, add it to
-                // the open list. Make the current square
-                // the parent of this square. Record the
-                // f, g, and h costs of the square cell
-                //                OR
-                // If it is on the open list already, check
-                // to see if this path to that square is
-                // better, using 'f' cost as the measure.
-                if (cellDetails[i][j - 1].f == 2147483647
-                    || cellDetails[i][j - 1].f > fNew) {
-                    openList.set(fNew, [i, j - 1]);
-
-                    // Update the details of this cell
-                    cellDetails[i][j - 1].f = fNew;
-                    cellDetails[i][j - 1].g = gNew;
-                    cellDetails[i][j - 1].h = hNew;
-                    cellDetails[i][j - 1].parent_i = i;
-                    cellDetails[i][j - 1].parent_j = j;
-                }
+            // To store the 'g', 'h' and 'f' of the successor
+            const gNew = cellDetails[i][j].g + (d < 4 ? 1 : Math.SQRT2);
+            const hNew = heuristicValue(ni, nj, dest, heuristic);
+            const fNew = gNew + hNew;
+
+            // If it isn’t on the open list, add it to
+            // the open list. Make the current square
+            // the parent of this square. Record the
+            // f, g, and h costs of the square cell
+            //                OR
+            // If it is on the open list already, check
+            // to see if this path to that square is
+            // better, using 'f' cost as the measure.
+            if (cellDetails[ni][nj].f == 2147483647
+                || cellDetails[ni][nj].f > fNew) {
+                openList.push(ni * COL + nj, fNew, gNew);
+                nodesPushed++;
+
+                // Update the details of this cell
+                cellDetails[ni][nj].f = fNew;
+                cellDetails[ni][nj].g = gNew;
+                cellDetails[ni][nj].h = hNew;
+                cellDetails[ni][nj].parent_i = i;
+                cellDetails[ni][nj].parent_j = j;
             }
         }
     }
@@ -481,18 +553,45 @@ function aStarSearch(grid, src, dest, heuristic)
     // reach the destination cell. This may happen when the
     // there is no way to destination cell (due to
     // blockages)
-    if (foundDest == false)
+    //if (foundDest == false)
         //console.log("Failed to find the Destination Cell\n");
 
-    return;
+    return -1;
 }
 
 const args = process.argv.slice(2); // Skip the first two arguments (node and script path)
 const mapFile = args[0];
-const start = [parseInt(args[1]), parseInt(args[2])];
-const goal = [parseInt(args[3]), parseInt(args[4])];
-const heurstic = args[5];
+const serveMode = args.length == 2 && args[1] === "--serve";
 
+if (args.length != 6 && args.length != 7 && !serveMode) {
+    console.error("Usage: node a_star.js <map_file> <start_row> <start_col> <goal_row> <goal_col> <heuristic> [<moves>]");
+    console.error("       node a_star.js <map_file> --serve");
+    process.exit(1);
+}
 
-// Call AStarSearch with the passed arguments
-AStarSearchStarter(mapFile, start, goal, heurstic);
+// Load the map once, reporting how long it took before any query is answered
+const loadStart = process.hrtime.bigint();
+const grid = loadMap(mapFile);
+if (!grid) {
+    process.exit(1);
+}
+try {
+    components = loadComponents(mapFile);
+} catch (error) {
+    console.error("Error reading component index:", error);
+    process.exit(1);
+}
+console.log("READY " + (Number(process.hrtime.bigint() - loadStart) / 1e9).toFixed(9));
+
+if (serveMode) {
+    serve(grid);
+}
+else {
+    const start = [parseInt(args[1]), parseInt(args[2])];
+    const goal = [parseInt(args[3]), parseInt(args[4])];
+    const heuristic = parseInt(args[5]);
+    const moves = args.length > 6 ? parseInt(args[6]) : 4;
+
+    // Call AStarSearch with the passed arguments
+    runQuery(grid, start, goal, heuristic, moves);
+}
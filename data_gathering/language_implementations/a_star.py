@@ -2,7 +2,18 @@
 
 import math
 import heapq
+import array
+from collections import Counter, OrderedDict, namedtuple
+import mmap
+import os
+import struct
 import sys
+import time
+
+try:
+    import numpy as np
+except ImportError:  # only needed for the "numpy" engine
+    np = None
 # Define the Cell class
 class Cell:
     def __init__(self):
@@ -12,13 +23,32 @@ class Cell:
         self.g = float('inf')  # Cost from start to this cell
         self.h = 0  # Heuristic cost from this cell to destination
 
-# Define the size of the grid
-ROW = 64
-COL = 64
+# Characters that mark a passable cell in a Moving-AI .map file
+PASSABLE = ".GS"
+
+# Binary map (.grid) files: the magic, the height and width as little-endian
+# uint32, then one byte per cell row by row, 1 for passable and 0 for blocked.
+# They are written once from a .map and memory-mapped instead of parsed
+GRID_MAGIC = b"GRID"
+GRID_HEADER = struct.Struct("<4sII")
+
+# Connected-component index (.comp) files: the magic and the same header, then
+# one little-endian int32 label per cell: 0 for blocked cells, and one positive
+# label per connected region. Diagonal moves never cut corners, so 4- and
+# 8-connected movement give the same regions. A .comp file next to a map file
+# (same name, .comp extension) is picked up when the map is loaded
+COMP_MAGIC = b"COMP"
+
+SQRT2 = math.sqrt(2)
+
+# Moves as (d_row, d_col, cost): the four straight moves, then the four
+# diagonals that are only used in 8-connected mode
+DIRECTIONS = [(0, 1, 1.0), (0, -1, 1.0), (1, 0, 1.0), (-1, 0, 1.0),
+              (1, 1, SQRT2), (1, -1, SQRT2), (-1, 1, SQRT2), (-1, -1, SQRT2)]
 
 # Check if a cell is valid (within the grid)
-def is_valid(row, col):
-    return (row >= 0) and (row < ROW) and (col >= 0) and (col < COL)
+def is_valid(grid, row, col):
+    return (row >= 0) and (row < len(grid)) and (col >= 0) and (col < len(grid[0]))
 
 # Check if a cell is unblocked
 def is_unblocked(grid, row, col):
@@ -35,6 +65,33 @@ def calculate_h_value(row, col, dest):
 def calculate_h_value1(row, col, dest):
     return abs(row - dest[0]) + abs(col - dest[1])
 
+# Octile distance: the cost of the best path on an empty 8-connected grid
+def calculate_h_value2(row, col, dest):
+    d_row = abs(row - dest[0])
+    d_col = abs(col - dest[1])
+    return d_row + d_col + (SQRT2 - 2) * min(d_row, d_col)
+
+# Chebyshev distance: as octile, but with diagonal moves counted as 1
+def calculate_h_value3(row, col, dest):
+    return max(abs(row - dest[0]), abs(col - dest[1]))
+
+# Heuristics by the number passed on the command line:
+# 0 Euclidean, 1 Manhattan, 2 octile, 3 Chebyshev. Any other number means Manhattan,
+# except 4 (landmarks), which needs a HeuristicProvider
+HEURISTICS = {0: calculate_h_value, 1: calculate_h_value1, 2: calculate_h_value2, 3: calculate_h_value3}
+
+# Heuristic 4, ALT: exact distances from a few landmark cells L bound the
+# distance from n to the goal by |d(L, goal) - d(L, n)| (triangle inequality).
+# The largest bound, or the octile (8 moves) / Manhattan (4 moves) distance if
+# that is larger, is admissible and usually much tighter on maps with walls
+LANDMARK_HEURISTIC = 4
+LANDMARK_COUNT = 8
+
+# Default memory budget of a HeuristicProvider's per-goal fields, and the
+# approximate cost of one cell of a field (a list slot plus a float object)
+FIELD_CACHE_BYTES = 64 * 1024 * 1024
+FIELD_BYTES_PER_CELL = 32
+
 
 # Trace the path from source to destination
 def trace_path(cell_details, dest):
@@ -55,29 +112,49 @@ def trace_path(cell_details, dest):
     path.append((row, col))
     # Reverse the path to get the path from source to destination
     path.reverse()
-    print(len(path))
+    return len(path)
 
 # Implement the A* search algorithm
-def aStarSearch(grid, src, dest, heuristic):
+# Returns the number of cells on the path, or -1 if no path exists.
+# moves is 4 (straight moves only) or 8 (diagonals too, at cost sqrt(2),
+# without cutting corners). If a stats dict is given, the number of expanded
+# and pushed nodes is recorded in stats["expanded"] and stats["pushed"], and
+# the cost of the path (-1 if there is none) in stats["path_cost"]
+def aStarSearch(grid, src, dest, heuristic, stats=None, moves=4, components=None, heuristics=None):
+    if stats is None:
+        stats = {}
+    stats["expanded"] = 0
+    stats["pushed"] = 0
+    stats["path_cost"] = -1
+
     # Check if the source and destination are valid
-    if not is_valid(src[0], src[1]) or not is_valid(dest[0], dest[1]):
+    if not is_valid(grid, src[0], src[1]) or not is_valid(grid, dest[0], dest[1]):
         #print("Source or destination is invalid")
-        return
+        return -1
 
     # Check if the source and destination are unblocked
     if not is_unblocked(grid, src[0], src[1]) or not is_unblocked(grid, dest[0], dest[1]):
         #print("Source or the destination is blocked")
-        return
+        return -1
+
+    # Cells in different connected components have no path between them
+    if components is not None and not same_component(components, len(grid[0]), src, dest):
+        return -1
 
     # Check if we are already at the destination
     if is_destination(src[0], src[1], dest):
         #print("We are already at the destination")
-        return
+        stats["path_cost"] = 0
+        return 1
+
+    # The grid size comes from the map header
+    rows = len(grid)
+    cols = len(grid[0])
 
     # Initialize the closed list (visited cells)
-    closed_list = [[False for _ in range(COL)] for _ in range(ROW)]
+    closed_list = [[False for _ in range(cols)] for _ in range(rows)]
     # Initialize the details of each cell
-    cell_details = [[Cell() for _ in range(COL)] for _ in range(ROW)]
+    cell_details = [[Cell() for _ in range(cols)] for _ in range(rows)]
 
     # Initialize the start cell details
     i = src[0]
@@ -91,95 +168,1283 @@ def aStarSearch(grid, src, dest, heuristic):
     # Initialize the open list (cells to be visited) with the start cell
     open_list = []
     heapq.heappush(open_list, (0.0, i, j))
+    stats["pushed"] += 1
 
-    # Initialize the flag for whether destination is found
-    found_dest = False
+    if heuristics is not None:
+        # Look the values up in the goal's (cached) heuristic field
+        h_field = heuristics.field(dest, heuristic, moves)
+        calculate_h = lambda row, col, _dest: h_field[row * cols + col]
+    else:
+        calculate_h = HEURISTICS.get(heuristic, calculate_h_value1)
+    directions = DIRECTIONS[:8 if moves == 8 else 4]
 
     # Main loop of A* search algorithm
     while len(open_list) > 0:
         # Pop the cell with the smallest f value from the open list
         p = heapq.heappop(open_list)
-
-        # Mark the cell as visited
         i = p[1]
         j = p[2]
+
+        # A cell can be on the open list more than once; skip the stale copies
+        if closed_list[i][j]:
+            continue
+
+        # The destination is tested when it is popped rather than when it is
+        # generated, so the path is the cheapest one even with diagonal costs
+        if is_destination(i, j, dest):
+            stats["path_cost"] = cell_details[i][j].g
+            return trace_path(cell_details, dest)
+
+        # Mark the cell as visited
         closed_list[i][j] = True
+        stats["expanded"] += 1
 
         # For each direction, check the successors
-        directions = [(0, 1), (0, -1), (1, 0), (-1, 0)]
-        for dir in directions:
-            new_i = i + dir[0]
-            new_j = j + dir[1]
+        for d_row, d_col, cost in directions:
+            new_i = i + d_row
+            new_j = j + d_col
 
             # If the successor is valid, unblocked, and not visited
-            if is_valid(new_i, new_j) and is_unblocked(grid, new_i, new_j) and not closed_list[new_i][new_j]:
-                # If the successor is the destination
-                if is_destination(new_i, new_j, dest):
-                    # Set the parent of the destination cell
-                    cell_details[new_i][new_j].parent_i = i
-                    cell_details[new_i][new_j].parent_j = j
-                    #print("The destination cell is found")
-                    # Trace and print the path from source to destination
-                    trace_path(cell_details, dest)
-                    found_dest = True
-                    return
-                else:
-                    # Calculate the new f, g, and h values
-                    g_new = cell_details[i][j].g + 1.0
-                    if heuristic == 0:
-                        h_new = calculate_h_value(new_i, new_j, dest)
-                    else:
-                        h_new = calculate_h_value1(new_i, new_j, dest)
-                    f_new = g_new + h_new
-
-                    # If the cell is not in the open list or the new f value is smaller
-                    if cell_details[new_i][new_j].f == float('inf') or cell_details[new_i][new_j].f > f_new:
-                        # Add the cell to the open list
-                        heapq.heappush(open_list, (f_new, new_i, new_j))
-                        # Update the cell details
-                        cell_details[new_i][new_j].f = f_new
-                        cell_details[new_i][new_j].g = g_new
-                        cell_details[new_i][new_j].h = h_new
-                        cell_details[new_i][new_j].parent_i = i
-                        cell_details[new_i][new_j].parent_j = j
+            if not (is_valid(grid, new_i, new_j) and is_unblocked(grid, new_i, new_j) and not closed_list[new_i][new_j]):
+                continue
+
+            # A diagonal move may not cut the corner of a blocked cell
+            if d_row and d_col and not (is_unblocked(grid, new_i, j) and is_unblocked(grid, i, new_j)):
+                continue
+
+            # Calculate the new f, g, and h values
+            g_new = cell_details[i][j].g + cost
+            h_new = calculate_h(new_i, new_j, dest)
+            f_new = g_new + h_new
+
+            # If the cell is not in the open list or the new f value is smaller
+            if cell_details[new_i][new_j].f == float('inf') or cell_details[new_i][new_j].f > f_new:
+                # Add the cell to the open list
+                heapq.heappush(open_list, (f_new, new_i, new_j))
+                stats["pushed"] += 1
+                # Update the cell details
+                cell_details[new_i][new_j].f = f_new
+                cell_details[new_i][new_j].g = g_new
+                cell_details[new_i][new_j].h = h_new
+                cell_details[new_i][new_j].parent_i = i
+                cell_details[new_i][new_j].parent_j = j
 
     # If the destination is not found after visiting all cells
-    if not found_dest:
-        print("Failed to find the destination cell")#
+    #print("Failed to find the destination cell")
+    return -1
+
+# Exact cost from source (a flat row * cols + col index) to every cell, inf
+# where there is no path: Dijkstra over the same moves as the search
+def grid_distances(grid, source, moves=4):
+    rows, cols = len(grid), len(grid[0])
+    distances = [math.inf] * (rows * cols)
+    distances[source] = 0.0
+    queue = [(0.0, source)]
+    directions = DIRECTIONS[:8 if moves == 8 else 4]
+    while queue:
+        distance, cell = heapq.heappop(queue)
+        if distance > distances[cell]:
+            continue
+        row, col = divmod(cell, cols)
+        for d_row, d_col, cost in directions:
+            n_row, n_col = row + d_row, col + d_col
+            if not (0 <= n_row < rows and 0 <= n_col < cols and grid[n_row][n_col]):
+                continue
+            if d_row and d_col and not (grid[n_row][col] and grid[row][n_col]):
+                continue
+            nxt = n_row * cols + n_col
+            if distance + cost < distances[nxt]:
+                distances[nxt] = distance + cost
+                heapq.heappush(queue, (distance + cost, nxt))
+    return distances
+
+
+# Landmarks for the ALT heuristic, chosen by farthest-point selection in the
+# largest connected component: each new landmark is the cell farthest from
+# the ones chosen so far. Returns their flat indices and distance tables
+def select_landmarks(grid, moves=4, count=LANDMARK_COUNT):
+    labels = component_labels(grid)
+    sizes = Counter(label for label in labels if label)
+    if not sizes:
+        return [], []
+    largest = sizes.most_common(1)[0][0]
+    region = [cell for cell, label in enumerate(labels) if label == largest]
+
+    landmarks, tables = [], []
+    nearest = grid_distances(grid, region[0], moves)
+    for _ in range(min(count, len(region))):
+        cell = max(region, key=nearest.__getitem__)
+        if landmarks and nearest[cell] == 0:
+            break
+        table = grid_distances(grid, cell, moves)
+        landmarks.append(cell)
+        tables.append(table)
+        nearest = table if len(landmarks) == 1 else [min(a, b) for a, b in zip(nearest, table)]
+    return landmarks, tables
+
+
+# Per-goal heuristic fields for one map: the heuristic of every cell for a
+# (goal, heuristic, moves), kept in an LRU cache of at most max_bytes so goals
+# that come back are not recomputed. Fields are flat lists indexed
+# (row + pad) * (cols + 2 * pad) + (col + pad); pad=1 matches the bordered
+# layout of the NumPy and batch engines. Landmark tables are computed the
+# first time heuristic 4 is used with each movement model
+class HeuristicProvider:
+    def __init__(self, grid, max_bytes=FIELD_CACHE_BYTES, landmark_count=LANDMARK_COUNT, pad=0):
+        self.grid = grid
+        self.rows = len(grid)
+        self.cols = len(grid[0])
+        self.pad = pad
+        self.max_bytes = max_bytes
+        self.landmark_count = landmark_count
+        self.field_bytes = (self.rows + 2 * pad) * (self.cols + 2 * pad) * FIELD_BYTES_PER_CELL
+        self.fields = OrderedDict()
+        self.tables = {}
+        self.hits = 0
+        self.misses = 0
+
+    def field(self, dest, heuristic, moves=4):
+        # Only the landmark heuristic depends on the movement model
+        key = (dest[0], dest[1], heuristic, moves if heuristic == LANDMARK_HEURISTIC else None)
+        field = self.fields.get(key)
+        if field is not None:
+            self.fields.move_to_end(key)
+            self.hits += 1
+            return field
+
+        self.misses += 1
+        field = self.build_field(dest, heuristic, moves)
+        self.fields[key] = field
+        while len(self.fields) > 1 and len(self.fields) * self.field_bytes > self.max_bytes:
+            self.fields.popitem(last=False)
+        return field
+
+    def landmarks(self, moves):
+        # (landmark cells, distance tables) for a movement model
+        if moves not in self.tables:
+            self.tables[moves] = select_landmarks(self.grid, moves, self.landmark_count)
+        return self.tables[moves]
+
+    def build_field(self, dest, heuristic, moves):
+        if np is None:
+            return self.build_field_python(dest, heuristic, moves)
+
+        d_row, d_col = np.indices((self.rows, self.cols), dtype=np.float64)
+        d_row = np.abs(d_row - dest[0])
+        d_col = np.abs(d_col - dest[1])
+        octile = d_row + d_col + (SQRT2 - 2) * np.minimum(d_row, d_col)
+        if heuristic == 0:
+            field = np.sqrt(d_row * d_row + d_col * d_col)
+        elif heuristic == 2:
+            field = octile
+        elif heuristic == 3:
+            field = np.maximum(d_row, d_col)
+        elif heuristic == LANDMARK_HEURISTIC:
+            field = octile if moves == 8 else d_row + d_col
+            _, tables = self.landmarks(moves)
+            if tables:
+                tables = self.landmark_array(moves)
+                goal = dest[0] * self.cols + dest[1]
+                with np.errstate(invalid="ignore"):
+                    bounds = np.abs(tables - tables[:, goal:goal + 1])
+                # A landmark that cannot reach both cells gives no bound
+                bounds[~np.isfinite(bounds)] = 0.0
+                field = np.maximum(field, bounds.max(axis=0).reshape(self.rows, self.cols))
+        else:
+            field = d_row + d_col
+        if self.pad:
+            field = np.pad(field, self.pad)
+        return field.ravel().tolist()
+
+    def landmark_array(self, moves):
+        key = ("array", moves)
+        if key not in self.tables:
+            self.tables[key] = np.array(self.landmarks(moves)[1], dtype=np.float64)
+        return self.tables[key]
+
+    def build_field_python(self, dest, heuristic, moves):
+        if heuristic != LANDMARK_HEURISTIC:
+            calculate_h = HEURISTICS.get(heuristic, calculate_h_value1)
+            return self.padded([calculate_h(row, col, dest) for row in range(self.rows) for col in range(self.cols)])
+
+        base = calculate_h_value2 if moves == 8 else calculate_h_value1
+        field = [base(row, col, dest) for row in range(self.rows) for col in range(self.cols)]
+        goal = dest[0] * self.cols + dest[1]
+        for table in self.landmarks(moves)[1]:
+            to_goal = table[goal]
+            if to_goal == math.inf:
+                continue
+            for cell, distance in enumerate(table):
+                if distance != math.inf and abs(distance - to_goal) > field[cell]:
+                    field[cell] = abs(distance - to_goal)
+        return self.padded(field)
+
+    def padded(self, field):
+        # A row-major rows x cols field in this provider's layout
+        if not self.pad:
+            return field
+        width = self.cols + 2 * self.pad
+        out = [0.0] * ((self.rows + 2 * self.pad) * width)
+        for row in range(self.rows):
+            start = (row + self.pad) * width + self.pad
+            out[start:start + self.cols] = field[row * self.cols:(row + 1) * self.cols]
+        return out
+
+
+# Alternative engine selected with "--engine numpy". The grid is stored as a
+# NumPy uint8 array with a one-cell blocked border, so a cell is a single flat
+# index (row + 1) * width + (col + 1) and neighbours never need bounds checks.
+# The heuristic for every cell is computed in one vectorized operation per
+# goal and cached by a HeuristicProvider, and the g/parent/closed buffers are allocated once per map and reset
+# with a single slice copy instead of being rebuilt for each query. The hot
+# loop reads those buffers as flat Python lists, because indexing NumPy arrays
+# one scalar at a time from Python is slower than indexing a list.
+class NumpyAStar:
+    def __init__(self, grid, components=None, heuristics=None):
+        if np is None:
+            raise ImportError("The numpy engine requires NumPy to be installed")
+        self.rows = len(grid)
+        self.cols = len(grid[0])
+        self.components = components
+        self.width = self.cols + 2
+
+        padded = np.zeros((self.rows + 2, self.width), dtype=np.uint8)
+        padded[1:-1, 1:-1] = np.asarray(grid, dtype=np.uint8)
+        self.grid = padded
+        size = padded.size
+
+        # Heuristic fields in the bordered layout
+        self.heuristics = heuristics or HeuristicProvider(grid, pad=1)
+
+        # Flat offsets of the moves in DIRECTIONS, with the offsets of the two
+        # cells a diagonal move passes between (None for straight moves)
+        self.neighbours = []
+        for d_row, d_col, cost in DIRECTIONS:
+            sides = (d_row * self.width, d_col) if d_row and d_col else None
+            self.neighbours.append((d_row * self.width + d_col, cost, sides))
+
+        self.unblocked = padded.ravel().tolist()
+        self.g = [math.inf] * size
+        self.parent = [0] * size
+        self.closed = [False] * size
+        self.g_reset = [math.inf] * size
+        self.closed_reset = [False] * size
+
+    def index(self, cell):
+        return (cell[0] + 1) * self.width + (cell[1] + 1)
+
+    # Same contract as aStarSearch: number of cells on the path, or -1
+    def search(self, src, dest, heuristic, stats=None, moves=4):
+        if stats is None:
+            stats = {}
+        stats["expanded"] = 0
+        stats["pushed"] = 0
+        stats["path_cost"] = -1
+
+        if not (0 <= src[0] < self.rows and 0 <= src[1] < self.cols) or \
+                not (0 <= dest[0] < self.rows and 0 <= dest[1] < self.cols):
+            return -1
+        if self.components is not None and not same_component(self.components, self.cols, src, dest):
+            return -1
+
+        source = self.index(src)
+        target = self.index(dest)
+        unblocked = self.unblocked
+        if not unblocked[source] or not unblocked[target]:
+            return -1
+        if source == target:
+            stats["path_cost"] = 0
+            return 1
+
+        h = self.heuristics.field(dest, heuristic, moves)
+        g = self.g
+        parent = self.parent
+        closed = self.closed
+        g[:] = self.g_reset
+        closed[:] = self.closed_reset
+        neighbours = self.neighbours[:8 if moves == 8 else 4]
+
+        g[source] = 0.0
+        parent[source] = source
+        open_list = [(h[source], source)]
+        expanded = 0
+        pushed = 1
+        found = False
+
+        while open_list:
+            _, current = heapq.heappop(open_list)
+            if closed[current]:
+                continue
+            if current == target:
+                found = True
+                break
+            closed[current] = True
+            expanded += 1
+
+            g_current = g[current]
+            for offset, cost, sides in neighbours:
+                nxt = current + offset
+                if not unblocked[nxt] or closed[nxt]:
+                    continue
+                if sides is not None and not (unblocked[current + sides[0]] and unblocked[current + sides[1]]):
+                    continue
+                g_new = g_current + cost
+                if g_new < g[nxt]:
+                    g[nxt] = g_new
+                    parent[nxt] = current
+                    heapq.heappush(open_list, (g_new + h[nxt], nxt))
+                    pushed += 1
+
+        stats["expanded"] = expanded
+        stats["pushed"] = pushed
+        if not found:
+            return -1
+        stats["path_cost"] = g[target]
+
+        # Walk the parents back to the source to count the path cells
+        length = 1
+        current = target
+        while current != source:
+            current = parent[current]
+            length += 1
+        return length
+
+
+# Result of one query answered by solve_many
+QueryResult = namedtuple("QueryResult", ["path_length", "path_cost", "expanded", "pushed", "search_time"])
+
+
+# Engine for answering many queries on one map in pure Python. The grid is a
+# flat list with a one-cell blocked border, as in NumpyAStar. The g/parent
+# buffers are allocated once, and instead of being reset between queries each
+# entry is stamped with the generation (query number) that wrote it: a cell
+# whose stamp is not the current generation counts as unseen, so starting a
+# query costs nothing however large the map is
+class BatchSearcher:
+    def __init__(self, grid, components=None, heuristics=None, cache_heuristics=False):
+        self.rows = len(grid)
+        self.cols = len(grid[0])
+        self.width = self.cols + 2
+        self.components = components
+        size = (self.rows + 2) * self.width
+
+        self.unblocked = [0] * size
+        for row in range(self.rows):
+            start = (row + 1) * self.width + 1
+            self.unblocked[start:start + self.cols] = [1 if cell else 0 for cell in grid[row]]
+
+        # (flat offset, move cost, offsets of the two cells a diagonal passes)
+        self.neighbours = []
+        for d_row, d_col, cost in DIRECTIONS:
+            sides = (d_row * self.width, d_col) if d_row and d_col else None
+            self.neighbours.append((d_row * self.width + d_col, cost, sides))
+
+        self.g = [0.0] * size
+        self.parent = [0] * size
+        self.seen = [0] * size
+        self.closed = [0] * size
+        self.generation = 0
+
+        # Heuristic fields are only built when cached or for the landmark
+        # heuristic; otherwise h is computed for each pushed cell
+        self.heuristics = heuristics or HeuristicProvider(grid, pad=1)
+        self.cache_heuristics = cache_heuristics
+
+    def index(self, cell):
+        return (cell[0] + 1) * self.width + (cell[1] + 1)
+
+    def heuristic(self, dest, heuristic, moves):
+        # h(flat index) for this query
+        if self.cache_heuristics or heuristic == LANDMARK_HEURISTIC:
+            return self.heuristics.field(dest, heuristic, moves).__getitem__
+        calculate_h = HEURISTICS.get(heuristic, calculate_h_value1)
+        width = self.width
+        return lambda cell: calculate_h(cell // width - 1, cell % width - 1, dest)
+
+    def endpoints(self, src, dest, stats):
+        # The flat (source, target) of a query, or None if there is nothing to search
+        stats["expanded"] = 0
+        stats["pushed"] = 0
+        stats["path_cost"] = -1
+        if not (0 <= src[0] < self.rows and 0 <= src[1] < self.cols) or \
+                not (0 <= dest[0] < self.rows and 0 <= dest[1] < self.cols):
+            return None
+        source = self.index(src)
+        target = self.index(dest)
+        if not self.unblocked[source] or not self.unblocked[target]:
+            return None
+        if self.components is not None and not same_component(self.components, self.cols, src, dest):
+            return None
+        return source, target
+
+    # Same contract as aStarSearch: number of cells on the path, or -1
+    def search(self, src, dest, heuristic, stats=None, moves=4):
+        if stats is None:
+            stats = {}
+        ends = self.endpoints(src, dest, stats)
+        if ends is None:
+            return -1
+        source, target = ends
+        if source == target:
+            stats["path_cost"] = 0
+            return 1
+
+        h = self.heuristic(dest, heuristic, moves)
+        self.generation += 1
+        generation = self.generation
+        unblocked, g, parent, seen, closed = self.unblocked, self.g, self.parent, self.seen, self.closed
+        neighbours = self.neighbours[:8 if moves == 8 else 4]
+
+        g[source] = 0.0
+        parent[source] = source
+        seen[source] = generation
+        open_list = [(h(source), source)]
+        expanded = 0
+        pushed = 1
+        found = False
+
+        while open_list:
+            _, current = heapq.heappop(open_list)
+            if closed[current] == generation:
+                continue
+            if current == target:
+                found = True
+                break
+            closed[current] = generation
+            expanded += 1
+
+            g_current = g[current]
+            for offset, cost, sides in neighbours:
+                nxt = current + offset
+                if not unblocked[nxt] or closed[nxt] == generation:
+                    continue
+                if sides is not None and not (unblocked[current + sides[0]] and unblocked[current + sides[1]]):
+                    continue
+                g_new = g_current + cost
+                if seen[nxt] != generation or g_new < g[nxt]:
+                    seen[nxt] = generation
+                    g[nxt] = g_new
+                    parent[nxt] = current
+                    heapq.heappush(open_list, (g_new + h(nxt), nxt))
+                    pushed += 1
+
+        stats["expanded"] = expanded
+        stats["pushed"] = pushed
+        if not found:
+            return -1
+        stats["path_cost"] = g[target]
+        return self.path_length(source, target)
+
+    # Answer every query from src with one search tree: a uniform-cost search
+    # that runs until all the goals are settled. Returns {goal: QueryResult};
+    # expanded, pushed and search_time are those of the shared search at the
+    # moment that goal was settled
+    def search_from(self, src, goals, moves=4):
+        results = {}
+        targets = {}
+        for dest in goals:
+            ends = self.endpoints(src, dest, {})
+            if ends is None:
+                results[dest] = QueryResult(-1, -1, 0, 0, 0.0)
+            elif ends[0] == ends[1]:
+                results[dest] = QueryResult(1, 0, 0, 0, 0.0)
+            else:
+                targets[ends[1]] = dest
+        if not targets:
+            return results
+
+        search_start = time.perf_counter()
+        source = self.index(src)
+        self.generation += 1
+        generation = self.generation
+        unblocked, g, parent, seen, closed = self.unblocked, self.g, self.parent, self.seen, self.closed
+        neighbours = self.neighbours[:8 if moves == 8 else 4]
+
+        g[source] = 0.0
+        parent[source] = source
+        seen[source] = generation
+        open_list = [(0.0, source)]
+        expanded = 0
+        pushed = 1
+
+        while open_list and targets:
+            g_current, current = heapq.heappop(open_list)
+            if closed[current] == generation:
+                continue
+            if current in targets:
+                results[targets.pop(current)] = QueryResult(self.path_length(source, current), g_current, expanded,
+                                                            pushed, time.perf_counter() - search_start)
+            closed[current] = generation
+            expanded += 1
+
+            for offset, cost, sides in neighbours:
+                nxt = current + offset
+                if not unblocked[nxt] or closed[nxt] == generation:
+                    continue
+                if sides is not None and not (unblocked[current + sides[0]] and unblocked[current + sides[1]]):
+                    continue
+                g_new = g_current + cost
+                if seen[nxt] != generation or g_new < g[nxt]:
+                    seen[nxt] = generation
+                    g[nxt] = g_new
+                    parent[nxt] = current
+                    heapq.heappush(open_list, (g_new, nxt))
+                    pushed += 1
+
+        # Goals the tree never reached have no path
+        for dest in targets.values():
+            results[dest] = QueryResult(-1, -1, expanded, pushed, time.perf_counter() - search_start)
+        return results
+
+    def path_length(self, source, target):
+        length = 1
+        while target != source:
+            target = self.parent[target]
+            length += 1
+        return length
+
+
+# Jump directions for JumpPointSearcher, by movement model and by the
+# direction (sign of d_row, sign of d_col) a jump point was reached from.
+# Straight jumps keep going, may turn to the sides and, with diagonals, may
+# turn halfway; diagonal jumps keep going or split into their two straight
+# parts. Diagonals never cut corners, so no other neighbour can be forced
+JUMP_DIRECTIONS = {
+    4: {(0, 1): [(0, 1), (1, 0), (-1, 0)], (0, -1): [(0, -1), (1, 0), (-1, 0)],
+        (1, 0): [(1, 0), (0, 1), (0, -1)], (-1, 0): [(-1, 0), (0, 1), (0, -1)]},
+    8: {(0, 1): [(0, 1), (1, 1), (-1, 1), (1, 0), (-1, 0)], (0, -1): [(0, -1), (1, -1), (-1, -1), (1, 0), (-1, 0)],
+        (1, 0): [(1, 0), (1, 1), (1, -1), (0, 1), (0, -1)], (-1, 0): [(-1, 0), (-1, 1), (-1, -1), (0, 1), (0, -1)],
+        (1, 1): [(1, 0), (0, 1), (1, 1)], (1, -1): [(1, 0), (0, -1), (1, -1)],
+        (-1, 1): [(-1, 0), (0, 1), (-1, 1)], (-1, -1): [(-1, 0), (0, -1), (-1, -1)]},
+}
+
+
+def sign(value):
+    return (value > 0) - (value < 0)
+
 
+# Jump Point Search (Harabor and Grastien) for uniform-cost grids, selected
+# with "--engine jps". Instead of pushing every neighbour, each direction is
+# followed in a straight line until it reaches the goal or a jump point (a
+# cell where an optimal path may have to turn), and only those are pushed.
+# The rules are the ones for movement without corner cutting, as in
+# PathFinding.js. Paths and costs are the same as A*'s; expanded and pushed
+# count jump points, and the path length counts every cell between them
+class JumpPointSearcher(BatchSearcher):
+    # The jump point reached by moving straight from cell, or None
+    def jump_straight(self, cell, d_row, d_col, target, moves):
+        unblocked = self.unblocked
+        step = d_row * self.width + d_col
+        side = self.width if d_col else 1
+        while True:
+            cell += step
+            if not unblocked[cell]:
+                return None
+            if cell == target:
+                return cell
+            # A side cell that could only be reached through this one
+            if (unblocked[cell - side] and not unblocked[cell - side - step]) or \
+                    (unblocked[cell + side] and not unblocked[cell + side - step]):
+                return cell
+            # Without diagonals, a vertical jump stops where a horizontal one would find something
+            if moves == 4 and d_row and (self.jump_straight(cell, 0, 1, target, moves) is not None or
+                                         self.jump_straight(cell, 0, -1, target, moves) is not None):
+                return cell
+
+    # The jump point reached by moving from cell in (d_row, d_col), or None
+    def jump(self, cell, d_row, d_col, target, moves):
+        if not d_row or not d_col:
+            return self.jump_straight(cell, d_row, d_col, target, moves)
+        unblocked = self.unblocked
+        vertical = d_row * self.width
+        while True:
+            if not (unblocked[cell + vertical] and unblocked[cell + d_col] and unblocked[cell + vertical + d_col]):
+                return None
+            cell += vertical + d_col
+            if cell == target:
+                return cell
+            if self.jump_straight(cell, d_row, 0, target, moves) is not None or \
+                    self.jump_straight(cell, 0, d_col, target, moves) is not None:
+                return cell
+
+    def search(self, src, dest, heuristic, stats=None, moves=4):
+        if stats is None:
+            stats = {}
+        ends = self.endpoints(src, dest, stats)
+        if ends is None:
+            return -1
+        source, target = ends
+        if source == target:
+            stats["path_cost"] = 0
+            return 1
+
+        h = self.heuristic(dest, heuristic, moves)
+        self.generation += 1
+        generation = self.generation
+        g, parent, seen, closed = self.g, self.parent, self.seen, self.closed
+        moves = 8 if moves == 8 else 4
+        width = self.width
+        directions = JUMP_DIRECTIONS[moves]
+        all_directions = [(d_row, d_col) for d_row, d_col, _ in DIRECTIONS[:moves]]
+
+        g[source] = 0.0
+        parent[source] = source
+        seen[source] = generation
+        open_list = [(h(source), source)]
+        expanded = 0
+        pushed = 1
+        found = False
+
+        while open_list:
+            _, current = heapq.heappop(open_list)
+            if closed[current] == generation:
+                continue
+            if current == target:
+                found = True
+                break
+            closed[current] = generation
+            expanded += 1
+
+            row, col = divmod(current, width)
+            if current == source:
+                successors = all_directions
+            else:
+                parent_row, parent_col = divmod(parent[current], width)
+                successors = directions[(sign(row - parent_row), sign(col - parent_col))]
+
+            g_current = g[current]
+            for d_row, d_col in successors:
+                nxt = self.jump(current, d_row, d_col, target, moves)
+                if nxt is None or closed[nxt] == generation:
+                    continue
+                # A jump is straight or exactly diagonal: its octile length is its cost
+                steps_row, steps_col = divmod(nxt, width)
+                steps_row = abs(steps_row - row)
+                steps_col = abs(steps_col - col)
+                g_new = g_current + steps_row + steps_col + (SQRT2 - 2) * min(steps_row, steps_col)
+                if seen[nxt] != generation or g_new < g[nxt]:
+                    seen[nxt] = generation
+                    g[nxt] = g_new
+                    parent[nxt] = current
+                    heapq.heappush(open_list, (g_new + h(nxt), nxt))
+                    pushed += 1
+
+        stats["expanded"] = expanded
+        stats["pushed"] = pushed
+        if not found:
+            return -1
+        stats["path_cost"] = g[target]
+        return self.path_length(source, target)
+
+    # Cells on the path, counting those a jump passes over
+    def path_length(self, source, target):
+        length = 1
+        while target != source:
+            previous = self.parent[target]
+            length += max(abs(target // self.width - previous // self.width), abs(target % self.width - previous % self.width))
+            target = previous
+        return length
+
+
+# Bidirectional A*, selected with "--engine bidir": one search forward from
+# the source towards the goal and one backward from the goal towards the
+# source, each with its own g/parent buffers. The side with the shorter open
+# list is expanded next. Every time a side reaches a cell the other side has
+# already reached, the path through it is a candidate; the search stops once
+# the best candidate is no dearer than the smallest f on either open list,
+# which no path left to find can beat while the heuristic is admissible
+class BidirectionalSearcher(BatchSearcher):
+    def __init__(self, grid, components=None, heuristics=None, cache_heuristics=False):
+        super().__init__(grid, components, heuristics, cache_heuristics)
+        size = len(self.unblocked)
+        self.g_back = [0.0] * size
+        self.parent_back = [0] * size
+        self.seen_back = [0] * size
+        self.closed_back = [0] * size
+
+    def search(self, src, dest, heuristic, stats=None, moves=4):
+        if stats is None:
+            stats = {}
+        ends = self.endpoints(src, dest, stats)
+        if ends is None:
+            return -1
+        source, target = ends
+        if source == target:
+            stats["path_cost"] = 0
+            return 1
+
+        self.generation += 1
+        generation = self.generation
+        unblocked = self.unblocked
+        neighbours = self.neighbours[:8 if moves == 8 else 4]
+        h_forward = self.heuristic(dest, heuristic, moves)
+        h_backward = self.heuristic(src, heuristic, moves)
+        forward = ([(h_forward(source), source)], self.g, self.parent, self.seen, self.closed, h_forward,
+                   self.g_back, self.seen_back)
+        backward = ([(h_backward(target), target)], self.g_back, self.parent_back, self.seen_back, self.closed_back,
+                    h_backward, self.g, self.seen)
+        for cell, (_, g, parent, seen, _, _, _, _) in ((source, forward), (target, backward)):
+            g[cell] = 0.0
+            parent[cell] = cell
+            seen[cell] = generation
+        open_forward = forward[0]
+        open_backward = backward[0]
+        expanded = 0
+        pushed = 2
+        best = math.inf
+        meeting = None
+
+        while open_forward and open_backward:
+            if best <= max(open_forward[0][0], open_backward[0][0]):
+                break
+            open_list, g, parent, seen, closed, h, g_other, seen_other = \
+                forward if len(open_forward) <= len(open_backward) else backward
+            _, current = heapq.heappop(open_list)
+            if closed[current] == generation:
+                continue
+            closed[current] = generation
+            expanded += 1
+
+            g_current = g[current]
+            for offset, cost, sides in neighbours:
+                nxt = current + offset
+                if not unblocked[nxt] or closed[nxt] == generation:
+                    continue
+                if sides is not None and not (unblocked[current + sides[0]] and unblocked[current + sides[1]]):
+                    continue
+                g_new = g_current + cost
+                if seen[nxt] != generation or g_new < g[nxt]:
+                    seen[nxt] = generation
+                    g[nxt] = g_new
+                    parent[nxt] = current
+                    heapq.heappush(open_list, (g_new + h(nxt), nxt))
+                    pushed += 1
+                    if seen_other[nxt] == generation and g_new + g_other[nxt] < best:
+                        best = g_new + g_other[nxt]
+                        meeting = nxt
+
+        stats["expanded"] = expanded
+        stats["pushed"] = pushed
+        if meeting is None:
+            return -1
+        stats["path_cost"] = best
+        length = self.path_length(source, meeting)
+        cell = meeting
+        while cell != target:
+            cell = self.parent_back[cell]
+            length += 1
+        return length
+
+
+# Incremental planner for maps whose cells change between queries: D* Lite
+# (Koenig and Likhachev), a version of LPA* that also lets the start move.
+# It searches backward from the goal and keeps g and rhs (the best g its
+# neighbours offer) for every cell between calls, so after update_cells only
+# the cells whose distance to the goal changed are expanded again; the work of
+# a repair grows with the size of the change rather than the size of the map.
+# The grid is copied into the planner's own padded list (as in BatchSearcher)
+# and never modified. The open list is a heap with lazy deletion: an entry is
+# current only while its key is the cell's entry in open_key
+class DStarLite:
+    # Keys are sums of square roots, so two that should tie can differ in the
+    # last bit. Keys closer than this count as equal, or a cell on the path
+    # could be left out of date
+    KEY_TOLERANCE = 1e-9
+
+    def __init__(self, grid, src, dest, heuristic=1, moves=4):
+        self.rows = len(grid)
+        self.cols = len(grid[0])
+        self.width = self.cols + 2
+        size = (self.rows + 2) * self.width
+        self.unblocked = [0] * size
+        for row in range(self.rows):
+            start = (row + 1) * self.width + 1
+            self.unblocked[start:start + self.cols] = [1 if cell else 0 for cell in grid[row]]
+
+        # (flat offset, move cost, offsets of the two cells a diagonal passes)
+        self.neighbours = []
+        for d_row, d_col, cost in DIRECTIONS[:8 if moves == 8 else 4]:
+            sides = (d_row * self.width, d_col) if d_row and d_col else None
+            self.neighbours.append((d_row * self.width + d_col, cost, sides))
+        # Every cell whose moves can change when one cell does
+        self.around = [d_row * self.width + d_col for d_row in (-1, 0, 1) for d_col in (-1, 0, 1)]
+
+        self.calculate_h = HEURISTICS.get(heuristic, calculate_h_value1)
+        self.g = [math.inf] * size
+        self.rhs = [math.inf] * size
+        self.open_key = [None] * size
+        self.open_list = []
+        self.km = 0.0
+        self.expanded = 0
+        self.pushed = 0
+
+        self.start = self.last = self.index(src)
+        self.start_cell = tuple(src)
+        self.goal = self.index(dest)
+        self.rhs[self.goal] = 0.0
+        self.queue(self.goal)
+
+    def index(self, cell):
+        return (cell[0] + 1) * self.width + (cell[1] + 1)
+
+    def cell(self, index):
+        return index // self.width - 1, index % self.width - 1
+
+    def key(self, cell):
+        # Distances are to the goal, so the heuristic is the distance from the start
+        best = min(self.g[cell], self.rhs[cell])
+        return best + self.calculate_h(cell // self.width - 1, cell % self.width - 1, self.start_cell) + self.km, best
+
+    def key_less(self, a, b):
+        if abs(a[0] - b[0]) > self.KEY_TOLERANCE:
+            return a[0] < b[0]
+        return a[1] < b[1] - self.KEY_TOLERANCE
+
+    def queue(self, cell):
+        key = self.key(cell)
+        self.open_key[cell] = key
+        heapq.heappush(self.open_list, (key[0], key[1], cell))
+        self.pushed += 1
+
+    def cost(self, cell, offset, cost, sides):
+        # Cost of a move from cell, or inf if it is blocked or cuts a corner
+        unblocked = self.unblocked
+        if not unblocked[cell] or not unblocked[cell + offset]:
+            return math.inf
+        if sides is not None and not (unblocked[cell + sides[0]] and unblocked[cell + sides[1]]):
+            return math.inf
+        return cost
+
+    def update_vertex(self, cell):
+        if cell != self.goal:
+            g = self.g
+            self.rhs[cell] = min((self.cost(cell, offset, cost, sides) + g[cell + offset]
+                                  for offset, cost, sides in self.neighbours), default=math.inf)
+        if self.g[cell] != self.rhs[cell]:
+            self.queue(cell)
+        else:
+            self.open_key[cell] = None
+
+    def top_key(self):
+        # Smallest current key on the open list, dropping stale entries
+        open_list, open_key = self.open_list, self.open_key
+        while open_list and open_key[open_list[0][2]] != open_list[0][:2]:
+            heapq.heappop(open_list)
+        return open_list[0][:2] if open_list else (math.inf, math.inf)
+
+    def compute_shortest_path(self):
+        g, rhs, unblocked = self.g, self.rhs, self.unblocked
+        start = self.start
+        while self.key_less(self.top_key(), self.key(start)) or rhs[start] != g[start]:
+            if not self.open_list:
+                break
+            k_first, k_second, cell = heapq.heappop(self.open_list)
+            self.open_key[cell] = None
+            self.expanded += 1
+            new_key = self.key(cell)
+            if self.key_less((k_first, k_second), new_key):
+                self.queue(cell)
+                continue
+            if g[cell] > rhs[cell]:
+                g[cell] = rhs[cell]
+            else:
+                g[cell] = math.inf
+                self.update_vertex(cell)
+            for offset, _, _ in self.neighbours:
+                if unblocked[cell + offset]:
+                    self.update_vertex(cell + offset)
+
+    # Set cells passable or blocked: changes holds (row, col, passable)
+    # triples. The repair happens in the next plan()
+    def update_cells(self, changes):
+        self.km += self.calculate_h(*self.cell(self.last), self.start_cell)
+        self.last = self.start
+        touched = set()
+        for row, col, passable in changes:
+            if 0 <= row < self.rows and 0 <= col < self.cols:
+                cell = self.index((row, col))
+                self.unblocked[cell] = 1 if passable else 0
+                touched.update(cell + offset for offset in self.around)
+        for cell in touched:
+            if 0 < cell // self.width <= self.rows and 0 < cell % self.width <= self.cols:
+                self.update_vertex(cell)
+
+    # The agent has moved to cell; the next plan() searches from there
+    def move_start(self, cell):
+        self.start = self.index(cell)
+        self.start_cell = tuple(cell)
+
+    # Bring the plan up to date. Same contract as aStarSearch: the number of
+    # cells on the path from the start to the goal, or -1. stats gets the
+    # work done since the previous plan()
+    def plan(self, stats=None):
+        if stats is None:
+            stats = {}
+        self.compute_shortest_path()
+        path = self.path()
+        stats["expanded"] = self.expanded
+        stats["pushed"] = self.pushed
+        stats["path_cost"] = self.g[self.start] if path else -1
+        self.expanded = self.pushed = 0
+        return len(path) if path else -1
+
+    # The cells of the current path from the start to the goal, or [] if there
+    # is none. With an inconsistent heuristic the g values need not lead to the
+    # goal, so a walk that gets stuck or comes back to a cell also gives []
+    def path(self):
+        cell = self.start
+        if self.g[cell] == math.inf or not self.unblocked[cell]:
+            return []
+        path = [self.cell(cell)]
+        visited = {cell}
+        while cell != self.goal:
+            through, offset = min((self.cost(cell, *move) + self.g[cell + move[0]], move[0])
+                                  for move in self.neighbours)
+            if through == math.inf or cell + offset in visited:
+                return []
+            cell += offset
+            visited.add(cell)
+            path.append(self.cell(cell))
+        return path
+
+
+# Engines that are BatchSearchers, by their --engine name
+SEARCHERS = {"jps": JumpPointSearcher, "bidir": BidirectionalSearcher}
+
+
+# Answer many queries on one map. queries holds (src, dest, heuristic)
+# triples and the result is one QueryResult per query, in the same order. All
+# queries share one BatchSearcher's buffers (pass searcher to keep them across
+# calls too). With share_source, the queries from each source are answered
+# together by one uniform-cost search tree (BatchSearcher.search_from), which
+# ignores their heuristics
+def solve_many(grid, queries, moves=4, share_source=False, components=None, searcher=None):
+    searcher = searcher or BatchSearcher(grid, components)
+    queries = [(tuple(src), tuple(dest), heuristic) for src, dest, heuristic in queries]
+    if share_source:
+        goals_by_source = {}
+        for src, dest, _ in queries:
+            goals_by_source.setdefault(src, []).append(dest)
+        trees = {src: searcher.search_from(src, goals, moves) for src, goals in goals_by_source.items()}
+        return [trees[src][dest] for src, dest, _ in queries]
+
+    results = []
+    for src, dest, heuristic in queries:
+        stats = {}
+        search_start = time.perf_counter()
+        length = searcher.search(src, dest, heuristic, stats, moves)
+        search_time = time.perf_counter() - search_start
+        results.append(QueryResult(length, stats["path_cost"], stats["expanded"], stats["pushed"], search_time))
+    return results
+
+
+# Build the search function for the chosen engine: search(start, goal, heuristic, stats, moves).
+# The classic engine computes the heuristic per node as it always has; with
+# cache_heuristics, and always for the landmark heuristic, it reads cached
+# per-goal fields instead, as do the jps and bidir engines. cache_bytes
+# bounds that cache
+def make_search(grid, engine, components=None, cache_heuristics=False, cache_bytes=FIELD_CACHE_BYTES):
+    if engine == "numpy":
+        return NumpyAStar(grid, components, HeuristicProvider(grid, cache_bytes, pad=1)).search
+    if engine in SEARCHERS:
+        return SEARCHERS[engine](grid, components, HeuristicProvider(grid, cache_bytes, pad=1), cache_heuristics).search
+    provider = HeuristicProvider(grid, cache_bytes)
+
+    def search(start, goal, heuristic, stats=None, moves=4):
+        heuristics = provider if cache_heuristics or heuristic == LANDMARK_HEURISTIC else None
+        return aStarSearch(grid, start, goal, heuristic, stats, moves, components, heuristics)
+    return search
+
+
+# Load a Moving-AI .map file: a header ("type", "height", "width", "map")
+# followed by one line per row. Passable cells become 1, everything else 0.
+# A binary .grid file is recognised by its magic and memory-mapped instead
 def load_map(filename):
+    with open(filename, 'rb') as f:
+        if f.read(len(GRID_MAGIC)) == GRID_MAGIC:
+            return load_binary_map(filename)
+
     with open(filename, 'r') as f:
-        lines = f.readlines()
-    
-    # Skip the first 4 lines and process the rest
-    grid = []
-    for line in lines[4:]:  # Start reading from the 5th line (index 4)
-        if not line.startswith("type"):  # Skip lines that start with "type"
-            # Convert good spaces ('.') to 0 and bad spaces ('T' or '@') to 1
-            grid.append([1 if char == '.' else 0 for char in line.strip()])
-    
+        height = width = None
+        for line in f:
+            parts = line.split()
+            if not parts:
+                continue
+            if parts[0] == "height":
+                height = int(parts[1])
+            elif parts[0] == "width":
+                width = int(parts[1])
+            elif parts[0] == "map":
+                break
+
+        if height is None or width is None:
+            raise ValueError(f"{filename}: missing height/width in the map header")
+
+        grid = []
+        for _ in range(height):
+            line = f.readline().rstrip("\r\n")
+            if len(line) < width:
+                raise ValueError(f"{filename}: row {len(grid)} is shorter than the declared width {width}")
+            grid.append([1 if char in PASSABLE else 0 for char in line[:width]])
+
     return grid
 
 
+# Map a .grid file read-only. Each row is a memoryview of the mapping, so
+# grid[row][col] reads the page cache directly and nothing is copied
+def load_binary_map(filename):
+    with open(filename, 'rb') as f:
+        data = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+    if len(data) < GRID_HEADER.size:
+        raise ValueError(f"{filename}: not a complete .grid file")
+    magic, height, width = GRID_HEADER.unpack_from(data)
+    if magic != GRID_MAGIC or len(data) < GRID_HEADER.size + height * width:
+        raise ValueError(f"{filename}: not a complete .grid file")
+    cells = memoryview(data)[GRID_HEADER.size:GRID_HEADER.size + height * width]
+    return [cells[row * width:(row + 1) * width] for row in range(height)]
+
+
+# Write a loaded map as a .grid file
+def write_binary_map(grid, filename):
+    height, width = len(grid), len(grid[0])
+    with open(filename, 'wb') as f:
+        f.write(GRID_HEADER.pack(GRID_MAGIC, height, width))
+        for row in grid:
+            f.write(bytes(row))
+
+
+# Flat (row * cols + col) component label of every cell, found by flood fill
+def component_labels(grid):
+    rows, cols = len(grid), len(grid[0])
+    labels = [0] * (rows * cols)
+    label = 0
+    for first in range(rows * cols):
+        if labels[first] or not grid[first // cols][first % cols]:
+            continue
+        label += 1
+        labels[first] = label
+        stack = [first]
+        while stack:
+            row, col = divmod(stack.pop(), cols)
+            for n_row, n_col in ((row + 1, col), (row - 1, col), (row, col + 1), (row, col - 1)):
+                if 0 <= n_row < rows and 0 <= n_col < cols and grid[n_row][n_col] and not labels[n_row * cols + n_col]:
+                    labels[n_row * cols + n_col] = label
+                    stack.append(n_row * cols + n_col)
+    return labels
+
+
+def same_component(components, cols, src, dest):
+    return components[src[0] * cols + src[1]] == components[dest[0] * cols + dest[1]]
+
+
+# Where the component index of a map file lives
+def components_file(map_file):
+    return os.path.splitext(map_file)[0] + ".comp"
+
+
+def write_components(grid, filename):
+    labels = array.array('i', component_labels(grid))
+    if sys.byteorder != "little":
+        labels.byteswap()
+    with open(filename, 'wb') as f:
+        f.write(GRID_HEADER.pack(COMP_MAGIC, len(grid), len(grid[0])))
+        f.write(labels.tobytes())
+
+
+# Memory-map a .comp file as a flat sequence of labels, checking it matches the grid
+def load_components(filename, grid):
+    with open(filename, 'rb') as f:
+        data = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+    magic, height, width = GRID_HEADER.unpack_from(data)
+    if magic != COMP_MAGIC or (height, width) != (len(grid), len(grid[0])) \
+            or len(data) < GRID_HEADER.size + 4 * height * width:
+        raise ValueError(f"{filename}: not a component index for this map")
+    cells = memoryview(data)[GRID_HEADER.size:GRID_HEADER.size + 4 * height * width]
+    if sys.byteorder != "little":
+        labels = array.array('i', cells)
+        labels.byteswap()
+        return labels
+    return cells.cast('i')
+
+
+# The component index next to map_file, or None if it has none
+def find_components(map_file, grid):
+    filename = components_file(map_file)
+    return load_components(filename, grid) if os.path.exists(filename) else None
+
+
+# Run one query and print "<path_length> <search_seconds> <expanded> <pushed> <path_cost>"
+def run_query(search, start, goal, heuristic, moves=4):
+    stats = {}
+    search_start = time.perf_counter()
+    length = search(start, goal, heuristic, stats, moves)
+    search_time = time.perf_counter() - search_start
+    print(f"{length} {search_time:.9f} {stats['expanded']} {stats['pushed']} {stats['path_cost']:.9f}", flush=True)
+
+
+# Persistent mode: the map is already loaded, answer one query per stdin line
+# of the form "<start_row> <start_col> <goal_row> <goal_col> <heuristic> [<moves>]"
+def serve(search):
+    for line in sys.stdin:
+        parts = line.split()
+        if not parts:
+            continue
+        if parts[0] == "quit":
+            break
+        # Five integers, and the moves if there is a sixth; a line that is
+        # not can name no cell, so it gets the no-path answer
+        query_start = time.perf_counter()
+        try:
+            fields = [int(part) for part in parts[:6]]
+        except ValueError:
+            fields = []
+        if len(fields) < 5:
+            print(f"-1 {time.perf_counter() - query_start:.9f} 0 0 {-1:.9f}", flush=True)
+            continue
+        moves = fields[5] if len(fields) > 5 else 4
+        run_query(search, (fields[0], fields[1]), (fields[2], fields[3]), fields[4], moves)
+
+
+# Batch mode: answer every query line of a file ("-" for stdin) with
+# solve_many, then print the answers in the order of the queries. engine
+# picks the searcher ("jps" or "bidir"; anything else is plain A*)
+def batch(grid, components, filename, share_source=False, engine="classic"):
+    with (sys.stdin if filename == "-" else open(filename)) as f:
+        lines = [line.split() for line in f]
+    queries = [(parts, int(parts[5]) if len(parts) > 5 else 4) for parts in lines if parts and parts[0] != "quit"]
+
+    # solve_many takes one movement model, so group the queries by theirs
+    searcher = SEARCHERS.get(engine, BatchSearcher)(grid, components)
+    results = [None] * len(queries)
+    for moves in sorted({moves for _, moves in queries}):
+        indices = [k for k, (_, query_moves) in enumerate(queries) if query_moves == moves]
+        triples = [((int(queries[k][0][0]), int(queries[k][0][1])), (int(queries[k][0][2]), int(queries[k][0][3])),
+                    int(queries[k][0][4])) for k in indices]
+        for k, result in zip(indices, solve_many(grid, triples, moves, share_source, searcher=searcher)):
+            results[k] = result
+    for result in results:
+        print(f"{result.path_length} {result.search_time:.9f} {result.expanded} {result.pushed} {result.path_cost:.9f}")
+
+
+# Apply one replan line to the session's planner and return the planner to
+# plan with, or None if the line cannot be applied: a field that is not an
+# integer, a plan with too few fields or a cell off the map, an update before
+# any plan, or another verb
+def apply_replan(grid, planner, parts):
+    try:
+        numbers = [int(part) for part in parts[1:]]
+    except ValueError:
+        numbers = None
+    if parts[0] == "plan":
+        if numbers is None or len(numbers) < 5 or not (is_valid(grid, numbers[0], numbers[1])
+                                                      and is_valid(grid, numbers[2], numbers[3])):
+            return None
+        moves = numbers[5] if len(numbers) > 5 else 4
+        return DStarLite(grid, (numbers[0], numbers[1]), (numbers[2], numbers[3]), numbers[4], moves)
+    if parts[0] == "update" and planner is not None and numbers is not None:
+        planner.update_cells([tuple(numbers[k:k + 3]) for k in range(0, len(numbers) - 2, 3)])
+        return planner
+    return None
+
+
+# Replanning mode: incremental D* Lite sessions over stdin. A line
+# "plan <start_row> <start_col> <goal_row> <goal_col> <heuristic> [<moves>]"
+# starts a planner on the map as loaded, and "update <row> <col> <passable> ..."
+# (any number of triples) changes cells for the current planner and repairs its
+# plan. Both print a result line as run_query does, timing the planner's work.
+# A line that cannot be applied gets the no-path line; a plan line ends the
+# previous planner even then
+def replan(grid):
+    planner = None
+    for line in sys.stdin:
+        parts = line.split()
+        if not parts:
+            continue
+        if parts[0] == "quit":
+            break
+        search_start = time.perf_counter()
+        if parts[0] == "plan":
+            planner = None
+        applied = apply_replan(grid, planner, parts)
+        if applied is None:
+            print(f"-1 {time.perf_counter() - search_start:.9f} 0 0 {-1:.9f}", flush=True)
+            continue
+        planner = applied
+        stats = {}
+        length = planner.plan(stats)
+        search_time = time.perf_counter() - search_start
+        print(f"{length} {search_time:.9f} {stats['expanded']} {stats['pushed']} {stats['path_cost']:.9f}", flush=True)
+
+
 def main():
-    if len(sys.argv) != 7:
-        print("Usage: python a_star_python.py <map_file> <start_x> <start_y> <goal_x> <goal_y> <heuristic>")
+    # "--engine classic|numpy|jps|bidir" and "--heuristic-cache <MB>" may appear anywhere
+    # on the command line. The cache makes the classic engine read cached
+    # per-goal heuristic fields, and sets the size of every engine's cache
+    args = sys.argv[1:]
+    engine = "classic"
+    if "--engine" in args:
+        idx = args.index("--engine")
+        engine = args[idx + 1] if idx + 1 < len(args) else ""
+        del args[idx:idx + 2]
+    cache_heuristics = "--heuristic-cache" in args
+    cache_bytes = FIELD_CACHE_BYTES
+    if cache_heuristics:
+        idx = args.index("--heuristic-cache")
+        cache_bytes = int(float(args[idx + 1]) * 1024 * 1024) if idx + 1 < len(args) else FIELD_CACHE_BYTES
+        del args[idx:idx + 2]
+    share_source = "--share-source" in args
+    if share_source:
+        args.remove("--share-source")
+
+    if len(args) == 3 and args[0] == "--convert":
+        write_binary_map(load_map(args[1]), args[2])
+        return
+    if len(args) == 3 and args[0] == "--components":
+        write_components(load_map(args[1]), args[2])
+        return
+
+    serve_mode = len(args) == 2 and args[1] == "--serve"
+    batch_mode = len(args) == 3 and args[1] == "--batch"
+    replan_mode = len(args) == 2 and args[1] == "--replan"
+    if (len(args) not in (6, 7) and not serve_mode and not batch_mode and not replan_mode) or engine not in ("classic", "numpy", *SEARCHERS):
+        print("Usage: python a_star.py [--engine classic|numpy|jps|bidir] [--heuristic-cache <MB>] <map_file> <start_row> <start_col> <goal_row> <goal_col> <heuristic> [<moves>]")
+        print("       python a_star.py [--engine classic|numpy|jps|bidir] [--heuristic-cache <MB>] <map_file> --serve")
+        print("       python a_star.py [--engine jps|bidir] [--share-source] <map_file> --batch <query_file>")
+        print("       python a_star.py <map_file> --replan")
+        print("       python a_star.py --convert <map_file> <grid_file>")
+        print("       python a_star.py --components <map_file> <comp_file>")
         return
 
-    print("WELCOME TO PYTHON")
-    map_file = sys.argv[1]
-    start = (int(sys.argv[2]), int(sys.argv[3]))
-    goal = (int(sys.argv[4]), int(sys.argv[5]))
-    heuristic = int(sys.argv[6])
+    map_file = args[0]
 
-    # Load the map
+    # Load the map (and build the engine's buffers), reporting how long it took
+    # before any query is answered
+    load_start = time.perf_counter()
     grid = load_map(map_file)
+    if replan_mode:
+        # Cells change during a session, so a component index would go stale
+        print(f"READY {time.perf_counter() - load_start:.9f}", flush=True)
+        replan(grid)
+        return
+    components = find_components(map_file, grid)
+    if batch_mode:
+        print(f"READY {time.perf_counter() - load_start:.9f}", flush=True)
+        batch(grid, components, args[2], share_source, engine)
+        return
+    search = make_search(grid, engine, components, cache_heuristics, cache_bytes)
+    print(f"READY {time.perf_counter() - load_start:.9f}", flush=True)
+
+    if serve_mode:
+        serve(search)
+        return
+
+    start = (int(args[1]), int(args[2]))
+    goal = (int(args[3]), int(args[4]))
+    heuristic = int(args[5])
+    moves = int(args[6]) if len(args) > 6 else 4
 
-    # Run A* search
-    path = aStarSearch(grid, start, goal, heuristic)
-    
-    # Output the path length
-    print(len(path) if path else 0)
+    # Run A* search and output the path length
+    run_query(search, start, goal, heuristic, moves)
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    main()
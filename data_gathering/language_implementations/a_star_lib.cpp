@@ -0,0 +1,262 @@
+// A* search built as a shared library, so it can be called in-process
+// (see a_star_native.py) instead of through a separate program. The search is
+// the same as in a_star.cpp: 4- or 8-connected moves without corner-cutting,
+// the four heuristics, and the goal tested when it is popped. The differences
+// are in the data layout:
+//   - the grid is read straight from the caller's buffer: rows * cols bytes,
+//     row by row, nonzero for a passable cell;
+//   - cells are flat indices (row * cols + col);
+//   - the g/parent/closed buffers belong to a handle and are reused between
+//     queries, with a generation stamp instead of clearing them.
+#include <algorithm>
+#include <chrono>
+#include <cmath>
+#include <cstdint>
+#include <functional>
+#include <queue>
+#include <vector>
+
+using namespace std;
+
+namespace {
+
+const double SQRT2 = sqrt(2.0);
+
+// Moves as {d_row, d_col}: North, South, East, West, then the four
+// diagonals that are only used in 8-connected mode
+const int DIRECTIONS[8][2] = { { -1, 0 }, { 1, 0 }, { 0, 1 }, { 0, -1 },
+                               { -1, 1 }, { -1, -1 }, { 1, 1 }, { 1, -1 } };
+
+// Heuristic 4 combines landmark (ALT) bounds with the octile or Manhattan distance
+const int LANDMARK_HEURISTIC = 4;
+
+// 0 Euclidean, 1 Manhattan, 2 octile, 3 Chebyshev. Any other number means Manhattan
+double heuristicValue(int dRow, int dCol, int heuristic)
+{
+    dRow = abs(dRow);
+    dCol = abs(dCol);
+    switch (heuristic) {
+    case 0:
+        return sqrt((double)dRow * dRow + (double)dCol * dCol);
+    case 2:
+        return (dRow + dCol) + (SQRT2 - 2.0) * min(dRow, dCol);
+    case 3:
+        return (double)max(dRow, dCol);
+    default:
+        return (double)(dRow + dCol);
+    }
+}
+
+// <f, cell index>
+typedef pair<double, int> pNode;
+
+struct Searcher {
+    const uint8_t* grid;
+    int rows;
+    int cols;
+
+    // g and parent of a cell are only meaningful when seen[cell] == generation,
+    // and a cell is closed when closed[cell] == generation
+    vector<double> g;
+    vector<int> parent;
+    vector<uint32_t> seen;
+    vector<uint32_t> closed;
+    uint32_t generation;
+
+    // Connected-component label of every cell, or nullptr; cells with different
+    // labels have no path between them
+    const int32_t* components;
+
+    // Landmark distance tables for heuristic 4, one per movement model ([0] for
+    // 4 moves, [1] for 8), cell-major: table[cell * count + landmark]. The
+    // goal's own row is copied out once per query
+    const double* landmarks[2];
+    int landmarkCount[2];
+    vector<double> goalDistances;
+
+    Searcher(const uint8_t* grid, int rows, int cols)
+        : grid(grid), rows(rows), cols(cols), g((size_t)rows * cols),
+          parent((size_t)rows * cols), seen((size_t)rows * cols, 0),
+          closed((size_t)rows * cols, 0), generation(0), components(nullptr),
+          landmarks { nullptr, nullptr }, landmarkCount { 0, 0 }
+    {
+    }
+
+    // max over landmarks L of |d(L, cell) - d(L, goal)|, skipping landmarks
+    // that cannot reach both, and at least the octile/Manhattan distance
+    double landmarkValue(int cell, int dRow, int dCol, int moves) const
+    {
+        double h = heuristicValue(dRow, dCol, moves == 8 ? 2 : 1);
+        int model = moves == 8 ? 1 : 0;
+        const double* table = landmarks[model] + (size_t)cell * landmarkCount[model];
+        for (int l = 0; l < landmarkCount[model]; l++) {
+            if (isfinite(table[l]) && isfinite(goalDistances[l]))
+                h = max(h, fabs(table[l] - goalDistances[l]));
+        }
+        return h;
+    }
+
+    bool isUnBlocked(int row, int col) const
+    {
+        return grid[(size_t)row * cols + col] != 0;
+    }
+
+    // Number of cells on the path, or -1 if there is none
+    int search(int srcRow, int srcCol, int destRow, int destCol, int heuristic,
+               int moves, int64_t& expanded, int64_t& pushed, double& cost)
+    {
+        expanded = 0;
+        pushed = 0;
+        cost = -1;
+
+        if (srcRow < 0 || srcRow >= rows || srcCol < 0 || srcCol >= cols
+            || destRow < 0 || destRow >= rows || destCol < 0 || destCol >= cols)
+            return -1;
+        if (!isUnBlocked(srcRow, srcCol) || !isUnBlocked(destRow, destCol))
+            return -1;
+        if (components != nullptr
+            && components[(size_t)srcRow * cols + srcCol]
+                   != components[(size_t)destRow * cols + destCol])
+            return -1;
+        if (srcRow == destRow && srcCol == destCol) {
+            cost = 0;
+            return 1;
+        }
+
+        // A new generation invalidates every buffer entry at once; on the rare
+        // wrap-around the stamps are cleared for real
+        if (++generation == 0) {
+            fill(seen.begin(), seen.end(), 0);
+            fill(closed.begin(), closed.end(), 0);
+            generation = 1;
+        }
+
+        int source = srcRow * cols + srcCol;
+        int target = destRow * cols + destCol;
+        int numMoves = moves == 8 ? 8 : 4;
+
+        bool useLandmarks = heuristic == LANDMARK_HEURISTIC;
+        if (useLandmarks) {
+            int model = moves == 8 ? 1 : 0;
+            const double* goalRow = landmarks[model] + (size_t)target * landmarkCount[model];
+            goalDistances.assign(goalRow, goalRow + landmarkCount[model]);
+        }
+
+        priority_queue<pNode, vector<pNode>, greater<pNode> > openList;
+        g[source] = 0.0;
+        parent[source] = source;
+        seen[source] = generation;
+        openList.push(make_pair(0.0, source));
+        pushed++;
+
+        while (!openList.empty()) {
+            int current = openList.top().second;
+            openList.pop();
+
+            // Skip the stale copies of a cell that was improved after it was pushed
+            if (closed[current] == generation)
+                continue;
+
+            if (current == target) {
+                cost = g[target];
+                int length = 1;
+                while (current != source) {
+                    current = parent[current];
+                    length++;
+                }
+                return length;
+            }
+
+            closed[current] = generation;
+            expanded++;
+
+            int i = current / cols;
+            int j = current % cols;
+            for (int d = 0; d < numMoves; d++) {
+                int ni = i + DIRECTIONS[d][0];
+                int nj = j + DIRECTIONS[d][1];
+                if (ni < 0 || ni >= rows || nj < 0 || nj >= cols
+                    || !isUnBlocked(ni, nj))
+                    continue;
+
+                // A diagonal move may not cut the corner of a blocked cell
+                if (d >= 4 && (!isUnBlocked(ni, j) || !isUnBlocked(i, nj)))
+                    continue;
+
+                int next = ni * cols + nj;
+                if (closed[next] == generation)
+                    continue;
+
+                double gNew = g[current] + (d < 4 ? 1.0 : SQRT2);
+                if (seen[next] != generation || gNew < g[next]) {
+                    seen[next] = generation;
+                    g[next] = gNew;
+                    parent[next] = current;
+                    double h = useLandmarks
+                        ? landmarkValue(next, ni - destRow, nj - destCol, moves)
+                        : heuristicValue(ni - destRow, nj - destCol, heuristic);
+                    openList.push(make_pair(gNew + h, next));
+                    pushed++;
+                }
+            }
+        }
+        return -1;
+    }
+};
+
+} // namespace
+
+extern "C" {
+
+// Create a search handle for a grid of rows * cols bytes. The grid is not
+// copied, so it must stay alive and unchanged until astar_destroy
+void* astar_create(const uint8_t* grid, int rows, int cols)
+{
+    return new Searcher(grid, rows, cols);
+}
+
+// Give the handle a component index: rows * cols int32 labels, row by row.
+// Like the grid it is not copied; pass nullptr to stop using one
+void astar_set_components(void* handle, const int32_t* labels)
+{
+    static_cast<Searcher*>(handle)->components = labels;
+}
+
+// Give the handle the landmark tables heuristic 4 uses with this movement
+// model: rows * cols * count doubles, cell-major (cell * count + landmark),
+// inf where a landmark cannot reach a cell. Not copied. Until they are set,
+// heuristic 4 is the octile (8 moves) or Manhattan (4 moves) distance alone
+void astar_set_landmarks(void* handle, int moves, const double* tables, int count)
+{
+    Searcher* searcher = static_cast<Searcher*>(handle);
+    int model = moves == 8 ? 1 : 0;
+    searcher->landmarks[model] = tables;
+    searcher->landmarkCount[model] = tables == nullptr ? 0 : count;
+}
+
+void astar_destroy(void* handle)
+{
+    delete static_cast<Searcher*>(handle);
+}
+
+// Answer count queries, each five int32 values: start row, start column,
+// goal row, goal column, heuristic. For query k the path length (cells, or -1),
+// path cost (-1 if there is no path), search time in seconds and the
+// expanded/pushed node counts are written to the k-th entry of the output arrays
+void astar_search_batch(void* handle, const int32_t* queries, int64_t count,
+                        int moves, int32_t* lengths, double* costs,
+                        double* times, int64_t* expanded, int64_t* pushed)
+{
+    Searcher* searcher = static_cast<Searcher*>(handle);
+    for (int64_t k = 0; k < count; k++) {
+        const int32_t* q = queries + 5 * k;
+        auto search_start = chrono::steady_clock::now();
+        lengths[k] = searcher->search(q[0], q[1], q[2], q[3], q[4], moves,
+                                      expanded[k], pushed[k], costs[k]);
+        chrono::duration<double> search_time
+            = chrono::steady_clock::now() - search_start;
+        times[k] = search_time.count();
+    }
+}
+
+}
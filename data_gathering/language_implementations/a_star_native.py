@@ -0,0 +1,182 @@
+# In-process A* backend: the C++ search in a_star_lib.cpp, built as a shared
+# library and called through ctypes, so queries need no process spawn. The
+# grid is handed to the library as a pointer into a NumPy uint8 array (no
+# copy) and queries are answered in batches, with results returned as arrays.
+#
+# Build the library with the harness (run_tests.py builds it for every
+# profile) or by hand:
+#   g++ -O2 -shared -fPIC -o build/O2/liba_star.so a_star_lib.cpp
+
+import ctypes
+import os
+import sys
+import time
+
+import numpy as np
+from numpy.ctypeslib import ndpointer
+
+import a_star
+
+# Where the harness puts the default (O2) build
+DEFAULT_LIBRARY = os.path.join(os.path.dirname(os.path.abspath(__file__)), "build", "O2", "liba_star.so")
+
+
+def load_library(path=None):
+    # path, else $A_STAR_NATIVE_LIB, else the harness's default build
+    lib = ctypes.CDLL(path or os.environ.get("A_STAR_NATIVE_LIB", DEFAULT_LIBRARY))
+    lib.astar_create.restype = ctypes.c_void_p
+    lib.astar_create.argtypes = [ndpointer(np.uint8, flags="C_CONTIGUOUS"), ctypes.c_int, ctypes.c_int]
+    lib.astar_set_components.restype = None
+    lib.astar_set_components.argtypes = [ctypes.c_void_p, ndpointer(np.int32, flags="C_CONTIGUOUS")]
+    lib.astar_set_landmarks.restype = None
+    lib.astar_set_landmarks.argtypes = [ctypes.c_void_p, ctypes.c_int, ndpointer(np.float64, flags="C_CONTIGUOUS"),
+                                        ctypes.c_int]
+    lib.astar_destroy.restype = None
+    lib.astar_destroy.argtypes = [ctypes.c_void_p]
+    lib.astar_search_batch.restype = None
+    lib.astar_search_batch.argtypes = [
+        ctypes.c_void_p,
+        ndpointer(np.int32, flags="C_CONTIGUOUS"), ctypes.c_int64, ctypes.c_int,
+        ndpointer(np.int32, flags="C_CONTIGUOUS"), ndpointer(np.float64, flags="C_CONTIGUOUS"),
+        ndpointer(np.float64, flags="C_CONTIGUOUS"), ndpointer(np.int64, flags="C_CONTIGUOUS"),
+        ndpointer(np.int64, flags="C_CONTIGUOUS"),
+    ]
+    return lib
+
+
+# The map as a 2-D uint8 array. A .grid file is memory-mapped read-only, so the
+# library searches the page-cached file itself; a text .map is parsed
+def load_grid(filename):
+    with open(filename, 'rb') as f:
+        header = f.read(a_star.GRID_HEADER.size)
+    if header[:len(a_star.GRID_MAGIC)] != a_star.GRID_MAGIC:
+        return np.array(a_star.load_map(filename), dtype=np.uint8)
+    if len(header) < a_star.GRID_HEADER.size:
+        raise ValueError(f"{filename}: not a complete .grid file")
+    _, height, width = a_star.GRID_HEADER.unpack(header)
+    return np.memmap(filename, dtype=np.uint8, mode='r', offset=a_star.GRID_HEADER.size, shape=(height, width))
+
+
+# The component index next to map_file (see a_star.components_file) as a
+# memory-mapped int32 array, or None if the map has none
+def load_components(map_file, shape):
+    filename = a_star.components_file(map_file)
+    if not os.path.exists(filename):
+        return None
+    with open(filename, 'rb') as f:
+        magic, height, width = a_star.GRID_HEADER.unpack(f.read(a_star.GRID_HEADER.size))
+    if magic != a_star.COMP_MAGIC or (height, width) != tuple(shape):
+        raise ValueError(f"{filename}: not a component index for this map")
+    return np.memmap(filename, dtype="<i4", mode='r', offset=a_star.GRID_HEADER.size, shape=(height, width))
+
+
+class NativeAStar:
+    # grid: a 2-D array (or nested lists) with nonzero for passable cells. A
+    # C-contiguous uint8 array is used as is; anything else is converted once.
+    # library: a path, or a library already returned by load_library.
+    # components: optional per-cell component labels with the grid's shape
+
+    def __init__(self, grid, library=None, components=None):
+        self.lib = library if isinstance(library, ctypes.CDLL) else load_library(library)
+        # The library keeps a pointer into this array, so hold on to it
+        self.grid = np.ascontiguousarray(grid, dtype=np.uint8)
+        if self.grid.ndim != 2:
+            raise ValueError("grid must be two-dimensional")
+        self.rows, self.cols = self.grid.shape
+        self.handle = self.lib.astar_create(self.grid, self.rows, self.cols)
+        # Landmark tables for heuristic 4, by movement model, built on first use
+        self.heuristics = None
+        self.landmark_tables = {}
+        self.components = None
+        if components is not None:
+            self.components = np.ascontiguousarray(components, dtype=np.int32)
+            if self.components.shape != self.grid.shape:
+                raise ValueError("components must have the same shape as the grid")
+            self.lib.astar_set_components(self.handle, self.components)
+
+    # queries: (n, 5) integers, one (start_row, start_col, goal_row, goal_col, heuristic)
+    # per row. Returns a dict of length-n arrays: path_length, path_cost,
+    # search_time (seconds), expanded and pushed
+    def search_batch(self, queries, moves=4):
+        queries = np.ascontiguousarray(queries, dtype=np.int32).reshape(-1, 5)
+        if (queries[:, 4] == a_star.LANDMARK_HEURISTIC).any():
+            self.prepare_landmarks(moves)
+        count = len(queries)
+        results = {
+            "path_length": np.empty(count, dtype=np.int32),
+            "path_cost": np.empty(count, dtype=np.float64),
+            "search_time": np.empty(count, dtype=np.float64),
+            "expanded": np.empty(count, dtype=np.int64),
+            "pushed": np.empty(count, dtype=np.int64),
+        }
+        self.lib.astar_search_batch(self.handle, queries, count, moves, results["path_length"], results["path_cost"],
+                                    results["search_time"], results["expanded"], results["pushed"])
+        return results
+
+    # Select landmarks and hand their distance tables (cell-major) to the library
+    def prepare_landmarks(self, moves):
+        if moves in self.landmark_tables:
+            return
+        if self.heuristics is None:
+            self.heuristics = a_star.HeuristicProvider(self.grid.tolist())
+        landmarks, _ = self.heuristics.landmarks(moves)
+        tables = np.zeros((self.rows * self.cols, 0))
+        if landmarks:
+            tables = np.ascontiguousarray(self.heuristics.landmark_array(moves).T)
+        self.landmark_tables[moves] = tables
+        self.lib.astar_set_landmarks(self.handle, moves, tables, len(landmarks))
+
+    # Same contract as a_star.aStarSearch: number of cells on the path, or -1
+    def search(self, src, dest, heuristic, stats=None, moves=4):
+        results = self.search_batch([(src[0], src[1], dest[0], dest[1], heuristic)], moves)
+        if stats is not None:
+            stats["expanded"] = int(results["expanded"][0])
+            stats["pushed"] = int(results["pushed"][0])
+            stats["path_cost"] = float(results["path_cost"][0])
+        return int(results["path_length"][0])
+
+    def close(self):
+        if self.handle:
+            self.lib.astar_destroy(self.handle)
+            self.handle = None
+
+    def __del__(self):
+        self.close()
+
+
+# Answer a file of "<start_row> <start_col> <goal_row> <goal_col> <heuristic>" lines in
+# one batch and print one "<path_length> <search_seconds> <expanded> <pushed> <path_cost>"
+# line per query. Given the query itself instead of a file, answer it after the
+# usual "READY <load_seconds>" line, as the harness's cold mode runs it: one
+# fresh interpreter per query. "--library <path>" picks the build to load
+def main():
+    args = sys.argv[1:]
+    library = None
+    if len(args) > 1 and args[0] == "--library":
+        library, args = args[1], args[2:]
+    if len(args) not in (2, 3, 6, 7):
+        print("Usage: python a_star_native.py [--library <path>] <map_file> <query_file> [<moves>]")
+        print("       python a_star_native.py [--library <path>] <map_file> <start_row> <start_col> <goal_row> <goal_col> "
+              "<heuristic> [<moves>]")
+        return
+    lib = load_library(library)
+    if len(args) >= 6:
+        load_start = time.perf_counter()
+        grid = load_grid(args[0])
+        engine = NativeAStar(grid, lib, load_components(args[0], grid.shape))
+        print(f"READY {time.perf_counter() - load_start:.9f}", flush=True)
+        queries = [[int(value) for value in args[1:6]]]
+        moves = int(args[6]) if len(args) > 6 else 4
+    else:
+        grid = load_grid(args[0])
+        engine = NativeAStar(grid, lib, load_components(args[0], grid.shape))
+        queries = np.loadtxt(args[1], dtype=np.int32, ndmin=2)
+        moves = int(args[2]) if len(args) > 2 else 4
+    results = engine.search_batch(queries, moves)
+    for k in range(len(queries)):
+        print(f"{results['path_length'][k]} {results['search_time'][k]:.9f} {results['expanded'][k]} "
+              f"{results['pushed'][k]} {results['path_cost'][k]:.9f}")
+
+
+if __name__ == "__main__":
+    main()
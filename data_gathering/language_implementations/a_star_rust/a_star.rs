@@ -1,11 +1,38 @@
-use std::collections::{BinaryHeap, HashSet};
+// A* search on Moving-AI grid maps, built as the crate's library so the
+// benchmark binary (src/main.rs) and any other program can embed the engine.
+// A SearchContext owns the map and every buffer a search needs; they are
+// allocated once and cleared between queries, so repeated searches do not
+// allocate once the open list has grown to its working size.
 use std::cmp::Ordering;
+use std::collections::BinaryHeap;
 use std::fs::File;
-use std::io::{self, BufRead};
-use std::path::Path;
+use std::io::{self, BufRead, Read};
+use std::path::{Path, PathBuf};
 
-const ROW: usize = 64;
-const COL: usize = 64;
+// Incremental replanning for maps whose cells change (d_star_lite.rs)
+pub mod d_star_lite;
+pub use d_star_lite::DStarLite;
+
+// Characters that mark a passable cell in a Moving-AI .map file
+const PASSABLE: &str = ".GS";
+
+// Binary map (.grid) files: the magic, the height and width as little-endian
+// u32, then one byte per cell row by row, 1 for passable and 0 for blocked
+const GRID_MAGIC: &[u8; 4] = b"GRID";
+const GRID_HEADER_SIZE: usize = 12;
+
+// Connected-component index (.comp) files: the magic, the same header, then
+// one little-endian i32 label per cell. Cells with different labels have no
+// path between them (diagonal moves never cut corners, so this holds for 4- and
+// 8-connected movement alike)
+const COMP_MAGIC: &[u8; 4] = b"COMP";
+
+// The map, sized from its header: 1 for passable cells, 0 for blocked
+pub type Grid = Vec<Vec<usize>>;
+
+// Moves as (d_row, d_col): the four straight moves, then the four diagonals
+// that are only used in 8-connected mode
+const DIRECTIONS: [(isize, isize); 8] = [(0, 1), (0, -1), (1, 0), (-1, 0), (1, 1), (1, -1), (-1, 1), (-1, -1)];
 
 #[derive(Clone, PartialEq)]
 struct Cell {
@@ -28,6 +55,15 @@ impl Cell {
     }
 }
 
+// Work done by one search: nodes taken off and put on the open list, and the
+// cost of the path it found
+#[derive(Default)]
+pub struct SearchStats {
+    pub expanded: u64,
+    pub pushed: u64,
+    pub path_cost: f64,
+}
+
 #[derive(PartialEq)]
 struct PriorityQueueItem {
     priority: f64,
@@ -49,158 +85,637 @@ impl PartialOrd for PriorityQueueItem {
     }
 }
 
-fn is_valid(row: isize, col: isize) -> bool {
-    row >= 0 && row < ROW as isize && col >= 0 && col < COL as isize
-}
-
-fn is_unblocked(grid: &[[usize; COL]], row: usize, col: usize) -> bool {
-    grid[row][col] == 1
-}
-
-fn is_destination(row: usize, col: usize, dest: (usize, usize)) -> bool {
-    row == dest.0 && col == dest.1
-}
-
+// 0 Euclidean, 1 Manhattan, 2 octile (the cost of the best path on an empty
+// 8-connected grid), 3 Chebyshev (diagonal moves counted as 1). Any other
+// number means Manhattan
 fn calculate_h_value(row: usize, col: usize, dest: (usize, usize), heuristic: usize) -> f64 {
+    let d_row = (row as isize - dest.0 as isize).abs() as f64;
+    let d_col = (col as isize - dest.1 as isize).abs() as f64;
     match heuristic {
-        0 => (((row as isize - dest.0 as isize).pow(2)
-            + (col as isize - dest.1 as isize).pow(2)) as f64)
-            .sqrt(),
-        _ => (row as isize - dest.0 as isize).abs() as f64
-            + (col as isize - dest.1 as isize).abs() as f64,
+        0 => (d_row * d_row + d_col * d_col).sqrt(),
+        2 => d_row + d_col + (std::f64::consts::SQRT_2 - 2.0) * d_row.min(d_col),
+        3 => d_row.max(d_col),
+        _ => d_row + d_col,
     }
 }
 
-fn trace_path(cell_details: &[[Cell; COL]], dest: (usize, usize)) -> Vec<(usize, usize)> {
-    let mut path = Vec::new();
-    let mut row = dest.0;
-    let mut col = dest.1;
+// A map together with the buffers for searching it. Cells are stored row by
+// row in flat vectors; only the cells a search touched are reset before the
+// next one
+pub struct SearchContext {
+    grid: Grid,
+    rows: usize,
+    cols: usize,
+    cell_details: Vec<Cell>,
+    closed_list: Vec<bool>,
+    open_list: BinaryHeap<PriorityQueueItem>,
+    touched: Vec<usize>,
+    components: Option<Vec<i32>>,
+    // The backward half of bidirectional_search, allocated on its first use
+    back_details: Vec<Cell>,
+    back_closed: Vec<bool>,
+    back_open: BinaryHeap<PriorityQueueItem>,
+}
 
-    while !(cell_details[row][col].parent_i == row
-        && cell_details[row][col].parent_j == col)
-    {
-        path.push((row, col));
-        let temp_row = cell_details[row][col].parent_i;
-        let temp_col = cell_details[row][col].parent_j;
-        row = temp_row;
-        col = temp_col;
+impl SearchContext {
+    pub fn new(grid: Grid) -> Self {
+        let (rows, cols) = (grid.len(), grid.first().map_or(0, |row| row.len()));
+        SearchContext {
+            grid,
+            rows,
+            cols,
+            cell_details: vec![Cell::new(); rows * cols],
+            closed_list: vec![false; rows * cols],
+            open_list: BinaryHeap::new(),
+            touched: Vec::new(),
+            components: None,
+            back_details: Vec::new(),
+            back_closed: Vec::new(),
+            back_open: BinaryHeap::new(),
+        }
     }
 
-    path.push((row, col));
-    path.reverse();
-    path
-}
+    // Use a component index (one label per cell, row by row) to answer
+    // queries between different components without searching
+    pub fn set_components(&mut self, labels: Vec<i32>) {
+        self.components = Some(labels);
+    }
 
-fn a_star_search(
-    grid: &[[usize; COL]],
-    src: (usize, usize),
-    dest: (usize, usize),
-    heuristic: usize,
-) -> Option<Vec<(usize, usize)>> {
-    if !is_valid(src.0 as isize, src.1 as isize) || !is_valid(dest.0 as isize, dest.1 as isize) {
-        return None;
+    pub fn grid(&self) -> &Grid {
+        &self.grid
     }
 
-    if !is_unblocked(grid, src.0, src.1) || !is_unblocked(grid, dest.0, dest.1) {
-        return None;
+    fn is_valid(&self, row: isize, col: isize) -> bool {
+        row >= 0 && row < self.rows as isize && col >= 0 && col < self.cols as isize
     }
 
-    if is_destination(src.0, src.1, dest) {
-        return Some(vec![src]);
+    fn is_unblocked(&self, row: usize, col: usize) -> bool {
+        self.grid[row][col] == 1
     }
 
-    let mut closed_list = vec![vec![false; COL]; ROW];
-    let mut cell_details = vec![vec![Cell::new(); COL]; ROW];
+    // Undo everything the previous search wrote
+    fn reset(&mut self) {
+        for &index in &self.touched {
+            self.cell_details[index] = Cell::new();
+            self.closed_list[index] = false;
+            if !self.back_details.is_empty() {
+                self.back_details[index] = Cell::new();
+                self.back_closed[index] = false;
+            }
+        }
+        self.touched.clear();
+        self.open_list.clear();
+        self.back_open.clear();
+    }
 
-    cell_details[src.0][src.1].f = 0.0;
-    cell_details[src.0][src.1].g = 0.0;
-    cell_details[src.0][src.1].h = 0.0;
-    cell_details[src.0][src.1].parent_i = src.0;
-    cell_details[src.0][src.1].parent_j = src.1;
+    // Number of cells on the cheapest path from src to dest, or None if there
+    // is none. moves is 4 (straight moves only) or 8 (diagonals too, at cost
+    // sqrt(2), without cutting corners)
+    pub fn search(
+        &mut self,
+        src: (usize, usize),
+        dest: (usize, usize),
+        heuristic: usize,
+        moves: usize,
+        stats: &mut SearchStats,
+    ) -> Option<usize> {
+        *stats = SearchStats::default();
+
+        if !self.is_valid(src.0 as isize, src.1 as isize) || !self.is_valid(dest.0 as isize, dest.1 as isize) {
+            return None;
+        }
 
-    let mut open_list = BinaryHeap::new();
-    open_list.push(PriorityQueueItem {
-        priority: 0.0,
-        position: src,
-    });
+        if !self.is_unblocked(src.0, src.1) || !self.is_unblocked(dest.0, dest.1) {
+            return None;
+        }
 
-    while let Some(current) = open_list.pop() {
-        let (i, j) = current.position;
+        // The source and destination are in different connected components
+        if let Some(labels) = &self.components {
+            if labels[src.0 * self.cols + src.1] != labels[dest.0 * self.cols + dest.1] {
+                return None;
+            }
+        }
 
-        if closed_list[i][j] {
-            continue;
+        if src == dest {
+            return Some(1);
         }
 
-        closed_list[i][j] = true;
+        self.reset();
+        let cols = self.cols;
+        let start = src.0 * cols + src.1;
+        self.cell_details[start].f = 0.0;
+        self.cell_details[start].g = 0.0;
+        self.cell_details[start].h = 0.0;
+        self.cell_details[start].parent_i = src.0;
+        self.cell_details[start].parent_j = src.1;
+        self.touched.push(start);
+
+        self.open_list.push(PriorityQueueItem {
+            priority: 0.0,
+            position: src,
+        });
+        stats.pushed += 1;
+
+        let directions = if moves == 8 { &DIRECTIONS[..] } else { &DIRECTIONS[..4] };
+
+        while let Some(current) = self.open_list.pop() {
+            let (i, j) = current.position;
+            let index = i * cols + j;
+
+            if self.closed_list[index] {
+                continue;
+            }
 
-        for (di, dj) in &[(0, 1), (0, -1), (1, 0), (-1, 0)] {
-            let new_i = i as isize + di;
-            let new_j = j as isize + dj;
+            // The destination is tested when it is popped rather than when it is
+            // generated, so the path is the cheapest one even with diagonal costs
+            if current.position == dest {
+                stats.path_cost = self.cell_details[index].g;
+                return Some(self.path_length(dest));
+            }
 
-            if is_valid(new_i, new_j) {
+            self.closed_list[index] = true;
+            stats.expanded += 1;
+
+            for &(di, dj) in directions {
+                let new_i = i as isize + di;
+                let new_j = j as isize + dj;
+
+                if !self.is_valid(new_i, new_j) {
+                    continue;
+                }
                 let new_i = new_i as usize;
                 let new_j = new_j as usize;
+                let new_index = new_i * cols + new_j;
 
-                if is_destination(new_i, new_j, dest) {
-                    cell_details[new_i][new_j].parent_i = i;
-                    cell_details[new_i][new_j].parent_j = j;
-                    return Some(trace_path(&cell_details, dest));
+                if self.closed_list[new_index] || !self.is_unblocked(new_i, new_j) {
+                    continue;
                 }
 
-                if !closed_list[new_i][new_j] && is_unblocked(grid, new_i, new_j) {
-                    let g_new = cell_details[i][j].g + 1.0;
-                    let h_new = calculate_h_value(new_i, new_j, dest, heuristic);
-                    let f_new = g_new + h_new;
-
-                    if cell_details[new_i][new_j].f > f_new {
-                        cell_details[new_i][new_j].f = f_new;
-                        cell_details[new_i][new_j].g = g_new;
-                        cell_details[new_i][new_j].h = h_new;
-                        cell_details[new_i][new_j].parent_i = i;
-                        cell_details[new_i][new_j].parent_j = j;
-                        open_list.push(PriorityQueueItem {
-                            priority: f_new,
-                            position: (new_i, new_j),
-                        });
+                // A diagonal move may not cut the corner of a blocked cell
+                let diagonal = di != 0 && dj != 0;
+                if diagonal && !(self.is_unblocked(new_i, j) && self.is_unblocked(i, new_j)) {
+                    continue;
+                }
+
+                let g_new = self.cell_details[index].g + if diagonal { std::f64::consts::SQRT_2 } else { 1.0 };
+                let h_new = calculate_h_value(new_i, new_j, dest, heuristic);
+                let f_new = g_new + h_new;
+
+                let cell = &mut self.cell_details[new_index];
+                if cell.f > f_new {
+                    if cell.f == f64::INFINITY {
+                        self.touched.push(new_index);
                     }
+                    cell.f = f_new;
+                    cell.g = g_new;
+                    cell.h = h_new;
+                    cell.parent_i = i;
+                    cell.parent_j = j;
+                    self.open_list.push(PriorityQueueItem {
+                        priority: f_new,
+                        position: (new_i, new_j),
+                    });
+                    stats.pushed += 1;
+                }
+            }
+        }
+
+        None
+    }
+
+    // Whether a search from src to dest can find anything: both cells are on the
+    // map, passable and (if there is a component index) in the same component
+    fn endpoints_ok(&self, src: (usize, usize), dest: (usize, usize)) -> bool {
+        if !self.is_valid(src.0 as isize, src.1 as isize) || !self.is_valid(dest.0 as isize, dest.1 as isize) {
+            return false;
+        }
+        if !self.is_unblocked(src.0, src.1) || !self.is_unblocked(dest.0, dest.1) {
+            return false;
+        }
+        match &self.components {
+            Some(labels) => labels[src.0 * self.cols + src.1] == labels[dest.0 * self.cols + dest.1],
+            None => true,
+        }
+    }
+
+    // A cell a search may enter: on the map and not blocked
+    fn is_open(&self, row: isize, col: isize) -> bool {
+        self.is_valid(row, col) && self.is_unblocked(row as usize, col as usize)
+    }
+
+    // Jump Point Search: follow a straight move from (row, col) until it
+    // reaches dest or a jump point, a cell where an optimal path may have to
+    // turn. Diagonals never cut corners, so these are the only forced turns
+    fn jump_straight(&self, mut row: isize, mut col: isize, d_row: isize, d_col: isize, dest: (usize, usize), moves: usize) -> Option<(usize, usize)> {
+        // The two cells beside the line of the move
+        let (side_row, side_col) = if d_col != 0 { (1, 0) } else { (0, 1) };
+        loop {
+            row += d_row;
+            col += d_col;
+            if !self.is_open(row, col) {
+                return None;
+            }
+            let point = (row as usize, col as usize);
+            if point == dest {
+                return Some(point);
+            }
+
+            // A side cell that could only be reached through this one
+            for s in [-1, 1] {
+                let (r, c) = (row + s * side_row, col + s * side_col);
+                if self.is_open(r, c) && !self.is_open(r - d_row, c - d_col) {
+                    return Some(point);
                 }
             }
+
+            // Without diagonals, a vertical jump stops where a horizontal one would find something
+            if moves == 4
+                && d_row != 0
+                && (self.jump_straight(row, col, 0, 1, dest, moves).is_some()
+                    || self.jump_straight(row, col, 0, -1, dest, moves).is_some())
+            {
+                return Some(point);
+            }
         }
     }
 
-    None
+    // As jump_straight, for any of the eight directions. A diagonal jump stops
+    // where one of its two straight parts would find a jump point; like a single
+    // diagonal move it may not cut the corner of a blocked cell
+    fn jump(&self, mut row: isize, mut col: isize, d_row: isize, d_col: isize, dest: (usize, usize), moves: usize) -> Option<(usize, usize)> {
+        if d_row == 0 || d_col == 0 {
+            return self.jump_straight(row, col, d_row, d_col, dest, moves);
+        }
+        loop {
+            if !(self.is_open(row + d_row, col) && self.is_open(row, col + d_col) && self.is_open(row + d_row, col + d_col)) {
+                return None;
+            }
+            row += d_row;
+            col += d_col;
+            let point = (row as usize, col as usize);
+            if point == dest
+                || self.jump_straight(row, col, d_row, 0, dest, moves).is_some()
+                || self.jump_straight(row, col, 0, d_col, dest, moves).is_some()
+            {
+                return Some(point);
+            }
+        }
+    }
+
+    // Jump Point Search (Harabor and Grastien) with the same contract as search.
+    // The open list only ever holds jump points, so expanded and pushed count
+    // those; paths and costs are A*'s, and the length counts every cell between
+    // the jump points
+    pub fn jump_point_search(
+        &mut self,
+        src: (usize, usize),
+        dest: (usize, usize),
+        heuristic: usize,
+        moves: usize,
+        stats: &mut SearchStats,
+    ) -> Option<usize> {
+        *stats = SearchStats::default();
+        if !self.endpoints_ok(src, dest) {
+            return None;
+        }
+        if src == dest {
+            return Some(1);
+        }
+
+        self.reset();
+        let cols = self.cols;
+        let start = src.0 * cols + src.1;
+        self.cell_details[start].f = 0.0;
+        self.cell_details[start].g = 0.0;
+        self.cell_details[start].h = 0.0;
+        self.cell_details[start].parent_i = src.0;
+        self.cell_details[start].parent_j = src.1;
+        self.touched.push(start);
+        self.open_list.push(PriorityQueueItem {
+            priority: 0.0,
+            position: src,
+        });
+        stats.pushed += 1;
+
+        let all_directions = if moves == 8 { &DIRECTIONS[..] } else { &DIRECTIONS[..4] };
+        let mut successors: Vec<(isize, isize)> = Vec::with_capacity(8);
+
+        while let Some(current) = self.open_list.pop() {
+            let (i, j) = current.position;
+            let index = i * cols + j;
+            if self.closed_list[index] {
+                continue;
+            }
+            if current.position == dest {
+                stats.path_cost = self.cell_details[index].g;
+                return Some(self.jump_path_length(dest));
+            }
+            self.closed_list[index] = true;
+            stats.expanded += 1;
+
+            // The directions worth jumping in, given the one this jump point was
+            // reached from: straight on, plus the turns an optimal path could take
+            let d_row = (i as isize - self.cell_details[index].parent_i as isize).signum();
+            let d_col = (j as isize - self.cell_details[index].parent_j as isize).signum();
+            successors.clear();
+            if d_row == 0 && d_col == 0 {
+                successors.extend_from_slice(all_directions);
+            } else if d_row != 0 && d_col != 0 {
+                successors.extend_from_slice(&[(d_row, 0), (0, d_col), (d_row, d_col)]);
+            } else {
+                successors.push((d_row, d_col));
+                for s in [-1, 1] {
+                    successors.push(if d_row == 0 { (s, 0) } else { (0, s) });
+                    if moves == 8 {
+                        successors.push(if d_row == 0 { (s, d_col) } else { (d_row, s) });
+                    }
+                }
+            }
+
+            for &(di, dj) in &successors {
+                let (new_i, new_j) = match self.jump(i as isize, j as isize, di, dj, dest, moves) {
+                    Some(point) => point,
+                    None => continue,
+                };
+                let new_index = new_i * cols + new_j;
+                if self.closed_list[new_index] {
+                    continue;
+                }
+
+                // A jump is straight or exactly diagonal: its octile length is its cost
+                let steps = calculate_h_value(new_i, new_j, (i, j), 2);
+                let g_new = self.cell_details[index].g + steps;
+                let h_new = calculate_h_value(new_i, new_j, dest, heuristic);
+                let f_new = g_new + h_new;
+
+                let cell = &mut self.cell_details[new_index];
+                if cell.f > f_new {
+                    if cell.f == f64::INFINITY {
+                        self.touched.push(new_index);
+                    }
+                    cell.f = f_new;
+                    cell.g = g_new;
+                    cell.h = h_new;
+                    cell.parent_i = i;
+                    cell.parent_j = j;
+                    self.open_list.push(PriorityQueueItem {
+                        priority: f_new,
+                        position: (new_i, new_j),
+                    });
+                    stats.pushed += 1;
+                }
+            }
+        }
+
+        None
+    }
+
+    // Cells on the path found by jump_point_search, counting those a jump passes over
+    fn jump_path_length(&self, dest: (usize, usize)) -> usize {
+        let mut length = 1;
+        let (mut row, mut col) = dest;
+        loop {
+            let cell = &self.cell_details[row * self.cols + col];
+            if cell.parent_i == row && cell.parent_j == col {
+                return length;
+            }
+            length += (row as isize - cell.parent_i as isize).abs().max((col as isize - cell.parent_j as isize).abs()) as usize;
+            row = cell.parent_i;
+            col = cell.parent_j;
+        }
+    }
+
+    // Bidirectional A* with the same contract as search: one search forward from
+    // src towards dest in the usual buffers and one backward from dest towards
+    // src in the back_* buffers, expanding whichever has the shorter open list.
+    // Every cell reached by both gives a candidate path; the search stops once
+    // the best candidate is no dearer than the smallest f on either open list,
+    // which no path left to find can beat while the heuristic is admissible
+    pub fn bidirectional_search(
+        &mut self,
+        src: (usize, usize),
+        dest: (usize, usize),
+        heuristic: usize,
+        moves: usize,
+        stats: &mut SearchStats,
+    ) -> Option<usize> {
+        *stats = SearchStats::default();
+        if !self.endpoints_ok(src, dest) {
+            return None;
+        }
+        if src == dest {
+            return Some(1);
+        }
+
+        self.reset();
+        if self.back_details.is_empty() {
+            self.back_details = vec![Cell::new(); self.rows * self.cols];
+            self.back_closed = vec![false; self.rows * self.cols];
+        }
+        let cols = self.cols;
+        let (start, goal) = (src.0 * cols + src.1, dest.0 * cols + dest.1);
+        for (details, index, (row, col)) in [(&mut self.cell_details, start, src), (&mut self.back_details, goal, dest)] {
+            details[index] = Cell { parent_i: row, parent_j: col, f: 0.0, g: 0.0, h: 0.0 };
+        }
+        self.touched.extend_from_slice(&[start, goal]);
+        self.open_list.push(PriorityQueueItem { priority: 0.0, position: src });
+        self.back_open.push(PriorityQueueItem { priority: 0.0, position: dest });
+        stats.pushed += 2;
+
+        let directions = if moves == 8 { &DIRECTIONS[..] } else { &DIRECTIONS[..4] };
+        let mut best = f64::INFINITY;
+        let mut meeting = None;
+
+        while let (Some(top), Some(back_top)) = (self.open_list.peek(), self.back_open.peek()) {
+            if best <= top.priority.max(back_top.priority) {
+                break;
+            }
+            let forward = self.open_list.len() <= self.back_open.len();
+            let (details, closed, open, other, target) = if forward {
+                (&mut self.cell_details, &mut self.closed_list, &mut self.open_list, &self.back_details, dest)
+            } else {
+                (&mut self.back_details, &mut self.back_closed, &mut self.back_open, &self.cell_details, src)
+            };
+
+            let (i, j) = open.pop().unwrap().position;
+            let index = i * cols + j;
+            if closed[index] {
+                continue;
+            }
+            closed[index] = true;
+            stats.expanded += 1;
+
+            for &(di, dj) in directions {
+                let (new_i, new_j) = (i as isize + di, j as isize + dj);
+                if !(new_i >= 0 && new_i < self.rows as isize && new_j >= 0 && new_j < cols as isize) {
+                    continue;
+                }
+                let (new_i, new_j) = (new_i as usize, new_j as usize);
+                let new_index = new_i * cols + new_j;
+                if closed[new_index] || self.grid[new_i][new_j] != 1 {
+                    continue;
+                }
+                let diagonal = di != 0 && dj != 0;
+                if diagonal && !(self.grid[new_i][j] == 1 && self.grid[i][new_j] == 1) {
+                    continue;
+                }
+
+                let g_new = details[index].g + if diagonal { std::f64::consts::SQRT_2 } else { 1.0 };
+                if g_new < details[new_index].g {
+                    if details[new_index].g == f64::INFINITY && other[new_index].g == f64::INFINITY {
+                        self.touched.push(new_index);
+                    }
+                    let h_new = calculate_h_value(new_i, new_j, target, heuristic);
+                    details[new_index] = Cell { parent_i: i, parent_j: j, f: g_new + h_new, g: g_new, h: h_new };
+                    open.push(PriorityQueueItem {
+                        priority: g_new + h_new,
+                        position: (new_i, new_j),
+                    });
+                    stats.pushed += 1;
+                    if g_new + other[new_index].g < best {
+                        best = g_new + other[new_index].g;
+                        meeting = Some((new_i, new_j));
+                    }
+                }
+            }
+        }
+
+        let meeting = meeting?;
+        stats.path_cost = best;
+        let mut length = self.path_length(meeting);
+        let (mut row, mut col) = meeting;
+        while (row, col) != dest {
+            let cell = &self.back_details[row * cols + col];
+            row = cell.parent_i;
+            col = cell.parent_j;
+            length += 1;
+        }
+        Some(length)
+    }
+
+    fn path_length(&self, dest: (usize, usize)) -> usize {
+        let mut length = 1;
+        let (mut row, mut col) = dest;
+        loop {
+            let cell = &self.cell_details[row * self.cols + col];
+            if cell.parent_i == row && cell.parent_j == col {
+                return length;
+            }
+            row = cell.parent_i;
+            col = cell.parent_j;
+            length += 1;
+        }
+    }
+
+    // The cells of the path found by the last successful search to dest, from
+    // the source to dest
+    pub fn trace_path(&self, dest: (usize, usize)) -> Vec<(usize, usize)> {
+        let mut path = Vec::new();
+        let (mut row, mut col) = dest;
+
+        loop {
+            path.push((row, col));
+            let cell = &self.cell_details[row * self.cols + col];
+            if cell.parent_i == row && cell.parent_j == col {
+                break;
+            }
+            row = cell.parent_i;
+            col = cell.parent_j;
+        }
+
+        path.reverse();
+        path
+    }
 }
 
-fn load_map(filename: &str) -> io::Result<[[usize; COL]; ROW]> {
-    let mut grid = [[0; COL]; ROW];
+// Load a Moving-AI .map file: a header ("type", "height", "width", "map")
+// followed by one line per row. Passable cells become 1, everything else 0.
+// A binary .grid file is recognised by its magic and read with load_binary_map
+pub fn load_map(filename: &str) -> io::Result<Grid> {
+    let invalid = |msg: String| io::Error::new(io::ErrorKind::InvalidData, format!("{}: {}", filename, msg));
+    let mut file = File::open(filename)?;
+    let mut magic = [0u8; 4];
+    if file.read_exact(&mut magic).is_ok() && &magic == GRID_MAGIC {
+        return load_binary_map(filename);
+    }
     let file = File::open(filename)?;
-    let lines = io::BufReader::new(file).lines();
-
-    for (row, line) in lines.skip(4).enumerate() {
-        for (col, char) in line?.chars().enumerate() {
-            grid[row][col] = if char == '.' { 1 } else { 0 };
+    let mut lines = io::BufReader::new(file).lines();
+    let mut height = None;
+    let mut width = None;
+
+    // Read the header up to the "map" line
+    while let Some(line) = lines.next() {
+        let line = line?;
+        let mut parts = line.split_whitespace();
+        match (parts.next(), parts.next()) {
+            (Some("height"), Some(value)) => height = value.parse::<usize>().ok(),
+            (Some("width"), Some(value)) => width = value.parse::<usize>().ok(),
+            (Some("map"), _) => break,
+            _ => {}
+        }
+    }
+    let (height, width) = match (height, width) {
+        (Some(h), Some(w)) => (h, w),
+        _ => return Err(invalid("missing height/width in the map header".to_string())),
+    };
+
+    let mut grid = vec![vec![0; width]; height];
+    for row in 0..height {
+        let line = match lines.next() {
+            Some(line) => line?,
+            None => String::new(),
+        };
+        let bytes = line.as_bytes();
+        if bytes.len() < width {
+            return Err(invalid(format!("row {} is shorter than the declared width {}", row, width)));
+        }
+        for col in 0..width {
+            grid[row][col] = if PASSABLE.as_bytes().contains(&bytes[col]) { 1 } else { 0 };
         }
     }
 
     Ok(grid)
 }
 
-fn main() {
-    let args: Vec<String> = std::env::args().collect();
-    if args.len() != 7 {
-        eprintln!("Usage: <map_file> <start_x> <start_y> <goal_x> <goal_y> <heuristic>");
-        return;
+// Read a .grid file in one call (the standard library has no memory mapping)
+// and copy its cells into the grid; nothing is parsed
+pub fn load_binary_map(filename: &str) -> io::Result<Grid> {
+    let data = std::fs::read(filename)?;
+    let field = |at: usize| u32::from_le_bytes([data[at], data[at + 1], data[at + 2], data[at + 3]]) as usize;
+    if data.len() < GRID_HEADER_SIZE || &data[..4] != GRID_MAGIC {
+        return Err(io::Error::new(io::ErrorKind::InvalidData, format!("{}: not a .grid file", filename)));
+    }
+    let (height, width) = (field(4), field(8));
+    if data.len() < GRID_HEADER_SIZE + height * width {
+        return Err(io::Error::new(io::ErrorKind::InvalidData, format!("{}: not a complete .grid file", filename)));
     }
 
-    let map_file = &args[1];
-    let start = (args[2].parse::<usize>().unwrap(), args[3].parse::<usize>().unwrap());
-    let goal = (args[4].parse::<usize>().unwrap(), args[5].parse::<usize>().unwrap());
-    let heuristic = args[6].parse::<usize>().unwrap();
+    Ok(data[GRID_HEADER_SIZE..GRID_HEADER_SIZE + height * width]
+        .chunks(width)
+        .map(|row| row.iter().map(|&cell| cell as usize).collect())
+        .collect())
+}
 
-    let grid = load_map(map_file).expect("Failed to load map file");
+// Where the component index of a map file lives: same name, .comp extension
+pub fn components_file(map_file: &str) -> PathBuf {
+    Path::new(map_file).with_extension("comp")
+}
 
-    match a_star_search(&grid, start, goal, heuristic) {
-        Some(path) => println!("Path length: {}", path.len()),
-        None => println!("No path found"),
+// Read a .comp file, checking that it was built for a rows x cols map
+pub fn load_components(filename: &Path, rows: usize, cols: usize) -> io::Result<Vec<i32>> {
+    let data = std::fs::read(filename)?;
+    let field = |at: usize| u32::from_le_bytes([data[at], data[at + 1], data[at + 2], data[at + 3]]) as usize;
+    if data.len() < GRID_HEADER_SIZE + 4 * rows * cols
+        || &data[..4] != COMP_MAGIC
+        || field(4) != rows
+        || field(8) != cols
+    {
+        let msg = format!("{}: not a component index for this map", filename.display());
+        return Err(io::Error::new(io::ErrorKind::InvalidData, msg));
     }
+
+    Ok(data[GRID_HEADER_SIZE..GRID_HEADER_SIZE + 4 * rows * cols]
+        .chunks(4)
+        .map(|label| i32::from_le_bytes([label[0], label[1], label[2], label[3]]))
+        .collect())
 }
@@ -0,0 +1,294 @@
+// Incremental planner for maps whose cells change between queries: D* Lite
+// (Koenig and Likhachev), a version of LPA* that also lets the start move.
+// It searches backward from the goal and keeps g and rhs (the best g its
+// neighbours offer) for every cell between calls, so after update_cells only
+// the cells whose distance to the goal changed are expanded again; the work of
+// a repair grows with the size of the change rather than the size of the map.
+// The same planner as DStarLite in a_star.py, on the same padded layout: the
+// map is copied with a one-cell blocked border, so moves need no bounds checks.
+use super::{calculate_h_value, Grid, SearchStats, DIRECTIONS};
+use std::cmp::Ordering;
+use std::collections::{BinaryHeap, HashSet};
+
+// Keys are sums of square roots, so two that should tie can differ in the last
+// bit. Keys closer than this count as equal, or a cell on the path could be
+// left out of date
+const KEY_TOLERANCE: f64 = 1e-9;
+
+type Key = (f64, f64);
+
+fn key_less(a: Key, b: Key) -> bool {
+    if (a.0 - b.0).abs() > KEY_TOLERANCE {
+        return a.0 < b.0;
+    }
+    a.1 < b.1 - KEY_TOLERANCE
+}
+
+struct QueueItem {
+    key: Key,
+    cell: usize,
+}
+
+impl PartialEq for QueueItem {
+    fn eq(&self, other: &Self) -> bool {
+        self.key == other.key && self.cell == other.cell
+    }
+}
+
+impl Eq for QueueItem {}
+
+impl Ord for QueueItem {
+    fn cmp(&self, other: &Self) -> Ordering {
+        // Flip the ordering because BinaryHeap is a max-heap
+        other.key.partial_cmp(&self.key).unwrap()
+    }
+}
+
+impl PartialOrd for QueueItem {
+    fn partial_cmp(&self, other: &Self) -> Option<Ordering> {
+        Some(self.cmp(other))
+    }
+}
+
+// The open list is a heap with lazy deletion: an entry is current only while
+// its key is the cell's entry in open_key
+pub struct DStarLite {
+    rows: usize,
+    cols: usize,
+    width: usize,
+    unblocked: Vec<bool>,
+    // (flat offset, move cost, offsets of the two cells a diagonal passes)
+    moves: Vec<(isize, f64, Option<(isize, isize)>)>,
+    // Every cell whose moves can change when one cell does
+    around: Vec<isize>,
+    heuristic: usize,
+    g: Vec<f64>,
+    rhs: Vec<f64>,
+    open_key: Vec<Option<Key>>,
+    open_list: BinaryHeap<QueueItem>,
+    km: f64,
+    start: usize,
+    start_cell: (usize, usize),
+    last_cell: (usize, usize),
+    goal: usize,
+    expanded: u64,
+    pushed: u64,
+}
+
+impl DStarLite {
+    pub fn new(grid: &Grid, src: (usize, usize), dest: (usize, usize), heuristic: usize, moves: usize) -> Self {
+        let rows = grid.len();
+        let cols = grid.first().map_or(0, |row| row.len());
+        let width = cols + 2;
+        let size = (rows + 2) * width;
+        let mut unblocked = vec![false; size];
+        for (row, cells) in grid.iter().enumerate() {
+            for (col, &cell) in cells.iter().enumerate() {
+                unblocked[(row + 1) * width + col + 1] = cell == 1;
+            }
+        }
+        let w = width as isize;
+        let count = if moves == 8 { 8 } else { 4 };
+        let moves = DIRECTIONS[..count]
+            .iter()
+            .map(|&(d_row, d_col)| {
+                if d_row != 0 && d_col != 0 {
+                    (d_row * w + d_col, std::f64::consts::SQRT_2, Some((d_row * w, d_col)))
+                } else {
+                    (d_row * w + d_col, 1.0, None)
+                }
+            })
+            .collect();
+        let around = (-1..=1).flat_map(|d_row| (-1..=1).map(move |d_col| d_row * w + d_col)).collect();
+
+        let mut planner = DStarLite {
+            rows,
+            cols,
+            width,
+            unblocked,
+            moves,
+            around,
+            heuristic,
+            g: vec![f64::INFINITY; size],
+            rhs: vec![f64::INFINITY; size],
+            open_key: vec![None; size],
+            open_list: BinaryHeap::new(),
+            km: 0.0,
+            start: (src.0 + 1) * width + src.1 + 1,
+            start_cell: src,
+            last_cell: src,
+            goal: (dest.0 + 1) * width + dest.1 + 1,
+            expanded: 0,
+            pushed: 0,
+        };
+        planner.rhs[planner.goal] = 0.0;
+        planner.queue(planner.goal);
+        planner
+    }
+
+    fn cell(&self, index: usize) -> (usize, usize) {
+        (index / self.width - 1, index % self.width - 1)
+    }
+
+    fn key(&self, cell: usize) -> Key {
+        // Distances are to the goal, so the heuristic is the distance from the start
+        let best = self.g[cell].min(self.rhs[cell]);
+        let (row, col) = self.cell(cell);
+        (best + calculate_h_value(row, col, self.start_cell, self.heuristic) + self.km, best)
+    }
+
+    fn queue(&mut self, cell: usize) {
+        let key = self.key(cell);
+        self.open_key[cell] = Some(key);
+        self.open_list.push(QueueItem { key, cell });
+        self.pushed += 1;
+    }
+
+    // Cost of a move from cell, or inf if it is blocked or cuts a corner
+    fn cost(&self, cell: usize, (offset, cost, sides): (isize, f64, Option<(isize, isize)>)) -> f64 {
+        let at = |offset: isize| self.unblocked[(cell as isize + offset) as usize];
+        if !self.unblocked[cell] || !at(offset) {
+            return f64::INFINITY;
+        }
+        match sides {
+            Some((first, second)) if !(at(first) && at(second)) => f64::INFINITY,
+            _ => cost,
+        }
+    }
+
+    fn update_vertex(&mut self, cell: usize) {
+        if cell != self.goal {
+            self.rhs[cell] = self
+                .moves
+                .iter()
+                .map(|&step| self.cost(cell, step) + self.g[(cell as isize + step.0) as usize])
+                .fold(f64::INFINITY, f64::min);
+        }
+        if self.g[cell] != self.rhs[cell] {
+            self.queue(cell);
+        } else {
+            self.open_key[cell] = None;
+        }
+    }
+
+    // Smallest current key on the open list, dropping stale entries
+    fn top_key(&mut self) -> Key {
+        while let Some(top) = self.open_list.peek() {
+            if self.open_key[top.cell] == Some(top.key) {
+                return top.key;
+            }
+            self.open_list.pop();
+        }
+        (f64::INFINITY, f64::INFINITY)
+    }
+
+    fn compute_shortest_path(&mut self) {
+        loop {
+            let top = self.top_key();
+            let start = self.start;
+            if !(key_less(top, self.key(start)) || self.rhs[start] != self.g[start]) {
+                break;
+            }
+            let item = match self.open_list.pop() {
+                Some(item) => item,
+                None => break,
+            };
+            let cell = item.cell;
+            self.open_key[cell] = None;
+            self.expanded += 1;
+            let new_key = self.key(cell);
+            if key_less(item.key, new_key) {
+                self.queue(cell);
+                continue;
+            }
+            if self.g[cell] > self.rhs[cell] {
+                self.g[cell] = self.rhs[cell];
+            } else {
+                self.g[cell] = f64::INFINITY;
+                self.update_vertex(cell);
+            }
+            for k in 0..self.moves.len() {
+                let next = (cell as isize + self.moves[k].0) as usize;
+                if self.unblocked[next] {
+                    self.update_vertex(next);
+                }
+            }
+        }
+    }
+
+    // Set cells passable or blocked: changes holds (row, col, passable). The
+    // repair happens in the next plan()
+    pub fn update_cells(&mut self, changes: &[(usize, usize, bool)]) {
+        self.km += calculate_h_value(self.last_cell.0, self.last_cell.1, self.start_cell, self.heuristic);
+        self.last_cell = self.start_cell;
+        let mut touched = Vec::new();
+        for &(row, col, passable) in changes {
+            if row < self.rows && col < self.cols {
+                let cell = (row + 1) * self.width + col + 1;
+                self.unblocked[cell] = passable;
+                touched.extend(self.around.iter().map(|&offset| (cell as isize + offset) as usize));
+            }
+        }
+        touched.sort_unstable();
+        touched.dedup();
+        for cell in touched {
+            let (row, col) = (cell / self.width, cell % self.width);
+            if row >= 1 && row <= self.rows && col >= 1 && col <= self.cols {
+                self.update_vertex(cell);
+            }
+        }
+    }
+
+    // The agent has moved to cell; the next plan() searches from there
+    pub fn move_start(&mut self, cell: (usize, usize)) {
+        self.start = (cell.0 + 1) * self.width + cell.1 + 1;
+        self.start_cell = cell;
+    }
+
+    // Bring the plan up to date. Same contract as SearchContext::search: the
+    // number of cells on the path from the start to the goal, or None. stats
+    // gets the work done since the previous plan()
+    pub fn plan(&mut self, stats: &mut SearchStats) -> Option<usize> {
+        self.compute_shortest_path();
+        let path = self.path();
+        stats.expanded = self.expanded;
+        stats.pushed = self.pushed;
+        stats.path_cost = if path.is_empty() { -1.0 } else { self.g[self.start] };
+        self.expanded = 0;
+        self.pushed = 0;
+        if path.is_empty() {
+            None
+        } else {
+            Some(path.len())
+        }
+    }
+
+    // The cells of the current path from the start to the goal, or an empty
+    // vector if there is none. With an inconsistent heuristic the g values need
+    // not lead to the goal, so a walk that gets stuck or comes back to a cell
+    // also gives an empty vector
+    pub fn path(&self) -> Vec<(usize, usize)> {
+        let mut cell = self.start;
+        if self.g[cell] == f64::INFINITY || !self.unblocked[cell] {
+            return Vec::new();
+        }
+        let mut path = vec![self.cell(cell)];
+        let mut visited = HashSet::from([cell]);
+        while cell != self.goal {
+            let mut best = (f64::INFINITY, cell);
+            for &step in &self.moves {
+                let next = (cell as isize + step.0) as usize;
+                let through = self.cost(cell, step) + self.g[next];
+                if through < best.0 {
+                    best = (through, next);
+                }
+            }
+            if best.0 == f64::INFINITY || !visited.insert(best.1) {
+                return Vec::new();
+            }
+            cell = best.1;
+            path.push(self.cell(cell));
+        }
+        path
+    }
+}
@@ -1,3 +1,213 @@
+// Benchmark front end for the a_star library (a_star.rs). The map is loaded
+// into one SearchContext that is reused for every query, in three modes:
+//   <map_file> <start_row> <start_col> <goal_row> <goal_col> <heuristic> [<moves>]   one query
+//   <map_file> --serve                 one query per stdin line, answered as it arrives
+//   <map_file> --batch <query_file>    every query line of a file ("-" for stdin)
+//   <map_file> --replan                incremental D* Lite sessions over stdin (see replan)
+// "--engine astar|jps|bidir" may appear anywhere and picks the search: plain
+// A*, Jump Point Search or bidirectional A*
+use a_star::{components_file, load_components, load_map, DStarLite, SearchContext, SearchStats};
+use std::fs::File;
+use std::io::{self, BufRead, BufReader, BufWriter, Write};
+use std::time::Instant;
+
+// A SearchContext method with the contract of SearchContext::search
+type Search = fn(&mut SearchContext, (usize, usize), (usize, usize), usize, usize, &mut SearchStats) -> Option<usize>;
+
+// Run one query and print "<path_length> <search_seconds> <expanded> <pushed> <path_cost>", timing
+// only the search itself with the monotonic high-resolution clock
+fn run_query(
+    context: &mut SearchContext,
+    search: Search,
+    start: (usize, usize),
+    goal: (usize, usize),
+    heuristic: usize,
+    moves: usize,
+    out: &mut impl Write,
+) {
+    let search_start = Instant::now();
+    let mut stats = SearchStats::default();
+    let (length, cost) = match search(context, start, goal, heuristic, moves, &mut stats) {
+        Some(length) => (length as i64, stats.path_cost),
+        None => (-1, -1.0),
+    };
+    let search_time = search_start.elapsed().as_secs_f64();
+    writeln!(out, "{} {:.9} {} {} {:.9}", length, search_time, stats.expanded, stats.pushed, cost).unwrap();
+}
+
+// The fields of a query, or None if one of them is negative or not an integer: such a
+// query can name no cell, so it has no path, as an out-of-range one has
+fn query_fields<S: AsRef<str>>(parts: &[S]) -> Option<Vec<usize>> {
+    parts.iter().map(|p| p.as_ref().parse::<i64>().ok().and_then(|n| usize::try_from(n).ok())).collect()
+}
+
+// Print the answer to a query that has no path, timed from query_start
+fn no_path(query_start: Instant, out: &mut impl Write) {
+    writeln!(out, "-1 {:.9} 0 0 {:.9}", query_start.elapsed().as_secs_f64(), -1.0).unwrap();
+}
+
+// Answer every line of the form "<start_row> <start_col> <goal_row> <goal_col> <heuristic> [<moves>]"
+// until "quit" or the end of the input. With flush_each, every answer is written out as
+// soon as it is known (for the harness's persistent runners); otherwise output is buffered
+fn answer_queries(context: &mut SearchContext, search: Search, input: impl BufRead, out: &mut impl Write, flush_each: bool) {
+    for line in input.lines() {
+        let line = line.expect("Failed to read query");
+        let parts: Vec<&str> = line.split_whitespace().collect();
+        if parts.is_empty() {
+            continue;
+        }
+        if parts[0] == "quit" {
+            break;
+        }
+        let query_start = Instant::now();
+        match query_fields(&parts) {
+            Some(nums) if nums.len() >= 5 => {
+                let moves = nums.get(5).copied().unwrap_or(4);
+                run_query(context, search, (nums[0], nums[1]), (nums[2], nums[3]), nums[4], moves, out);
+            }
+            _ => no_path(query_start, out),
+        }
+        if flush_each {
+            out.flush().unwrap();
+        }
+    }
+    out.flush().unwrap();
+}
+
+// The cell at (row, col) if it is on the map
+fn map_cell(grid: &a_star::Grid, row: i64, col: i64) -> Option<(usize, usize)> {
+    let (row, col) = (usize::try_from(row).ok()?, usize::try_from(col).ok()?);
+    (row < grid.len() && col < grid[row].len()).then_some((row, col))
+}
+
+// Apply one replan line to the session's planner and return it, or None if the line cannot
+// be applied: a field that is not an integer, a plan with too few fields or a cell off the
+// map, an update before any plan, or another verb. A plan that fails leaves no planner
+fn apply_replan<'a>(grid: &a_star::Grid, planner: &'a mut Option<DStarLite>, parts: &[&str]) -> Option<&'a mut DStarLite> {
+    let fields: Option<Vec<i64>> = parts[1..].iter().map(|p| p.parse::<i64>().ok()).collect();
+    match parts[0] {
+        "plan" => {
+            *planner = None;
+            let f = fields.filter(|f| f.len() >= 5)?;
+            let (start, goal) = (map_cell(grid, f[0], f[1])?, map_cell(grid, f[2], f[3])?);
+            let heuristic = usize::try_from(f[4]).ok()?;
+            let moves = f.get(5).map_or(Some(4), |&m| usize::try_from(m).ok())?;
+            Some(planner.insert(DStarLite::new(grid, start, goal, heuristic, moves)))
+        }
+        "update" => {
+            let planner = planner.as_mut()?;
+            // Cells off the map are left out, as update_cells would ignore them
+            let changes: Vec<(usize, usize, bool)> = fields?
+                .chunks_exact(3)
+                .filter_map(|c| map_cell(grid, c[0], c[1]).map(|(row, col)| (row, col, c[2] != 0)))
+                .collect();
+            planner.update_cells(&changes);
+            Some(planner)
+        }
+        _ => None,
+    }
+}
+
+// Replanning mode: a line "plan <start_row> <start_col> <goal_row> <goal_col> <heuristic> [<moves>]"
+// starts a DStarLite planner on the map as loaded, and "update <row> <col> <passable> ..."
+// (any number of triples) changes cells for the current planner and repairs its plan. Both
+// print a result line as run_query does, timing the planner's work
+fn replan(grid: &a_star::Grid, input: impl BufRead, out: &mut impl Write) {
+    let mut planner: Option<DStarLite> = None;
+    for line in input.lines() {
+        let line = line.expect("Failed to read query");
+        let parts: Vec<&str> = line.split_whitespace().collect();
+        if parts.is_empty() {
+            continue;
+        }
+        if parts[0] == "quit" {
+            break;
+        }
+        let search_start = Instant::now();
+        match apply_replan(grid, &mut planner, &parts) {
+            Some(planner) => {
+                let mut stats = SearchStats::default();
+                let length = planner.plan(&mut stats).map_or(-1, |length| length as i64);
+                let search_time = search_start.elapsed().as_secs_f64();
+                writeln!(out, "{} {:.9} {} {} {:.9}", length, search_time, stats.expanded, stats.pushed, stats.path_cost)
+                    .unwrap();
+            }
+            None => no_path(search_start, out),
+        }
+        out.flush().unwrap();
+    }
+}
+
 fn main() {
-    println!("Hello, world!");
+    let mut args: Vec<String> = std::env::args().collect();
+    let mut search: Option<Search> = Some(SearchContext::search);
+    if let Some(idx) = args.iter().position(|arg| arg == "--engine") {
+        search = match args.get(idx + 1).map(String::as_str) {
+            Some("astar") => Some(SearchContext::search),
+            Some("jps") => Some(SearchContext::jump_point_search),
+            Some("bidir") => Some(SearchContext::bidirectional_search),
+            _ => None,
+        };
+        args.drain(idx..(idx + 2).min(args.len()));
+    }
+    let serve_mode = args.len() == 3 && args[2] == "--serve";
+    let batch_mode = args.len() == 4 && args[2] == "--batch";
+    let replan_mode = args.len() == 3 && args[2] == "--replan";
+    let search = match search {
+        Some(search) if args.len() == 7 || args.len() == 8 || serve_mode || batch_mode || replan_mode => search,
+        _ => {
+            eprintln!("Usage: [--engine astar|jps|bidir] <map_file> <start_row> <start_col> <goal_row> <goal_col> <heuristic> [<moves>]");
+            eprintln!("       [--engine astar|jps|bidir] <map_file> --serve");
+            eprintln!("       [--engine astar|jps|bidir] <map_file> --batch <query_file>");
+            eprintln!("       <map_file> --replan");
+            return;
+        }
+    };
+
+    let map_file = &args[1];
+
+    let load_start = Instant::now();
+    let grid = load_map(map_file).expect("Failed to load map file");
+    let (rows, cols) = (grid.len(), grid.first().map_or(0, |row| row.len()));
+    if replan_mode {
+        // Cells change during a session, so a component index would go stale
+        println!("READY {:.9}", load_start.elapsed().as_secs_f64());
+        io::stdout().flush().unwrap();
+        replan(&grid, io::stdin().lock(), &mut io::stdout().lock());
+        return;
+    }
+    let mut context = SearchContext::new(grid);
+
+    // Use the map's component index if one sits next to it
+    let comp_file = components_file(map_file);
+    if comp_file.exists() {
+        context.set_components(load_components(&comp_file, rows, cols).expect("Failed to load component index"));
+    }
+    println!("READY {:.9}", load_start.elapsed().as_secs_f64());
+    io::stdout().flush().unwrap();
+
+    let stdout = io::stdout();
+    if serve_mode {
+        answer_queries(&mut context, search, io::stdin().lock(), &mut stdout.lock(), true);
+        return;
+    }
+    if batch_mode {
+        let mut out = BufWriter::new(stdout.lock());
+        if args[3] == "-" {
+            answer_queries(&mut context, search, io::stdin().lock(), &mut out, false);
+        } else {
+            let file = File::open(&args[3]).expect("Failed to open query file");
+            answer_queries(&mut context, search, BufReader::new(file), &mut out, false);
+        }
+        return;
+    }
+
+    let query_start = Instant::now();
+    match query_fields(&args[2..]) {
+        Some(nums) => {
+            let moves = nums.get(5).copied().unwrap_or(4);
+            run_query(&mut context, search, (nums[0], nums[1]), (nums[2], nums[3]), nums[4], moves, &mut stdout.lock());
+        }
+        None => no_path(query_start, &mut stdout.lock()),
+    }
 }
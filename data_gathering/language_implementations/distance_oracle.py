@@ -0,0 +1,407 @@
+# Exact distance oracles: the cost of every shortest path on a map, computed
+# offline, written to a file and memory-mapped at query time, so a query is a
+# lookup instead of a search. Maps with few passable cells get a table of all
+# pairs; larger ones get hub labels (pruned landmark labelling), where every
+# cell stores its distance to a few hub cells and a query combines two labels.
+# An oracle is for one map and one movement model, and the heuristic of a
+# query is ignored.
+#
+# Build the oracles once per map (run_tests.py does this for the Python-Oracle
+# series), then query them with the same protocol as a_star.py:
+#   python distance_oracle.py --build maps/random-64-64-20.map 8
+#   python distance_oracle.py maps/random-64-64-20.map --serve
+
+import array
+import heapq
+import math
+import mmap
+import os
+import struct
+import sys
+import time
+from collections import deque
+
+import a_star
+
+# Oracle files: the magic, then the map's height and width, the movement model
+# and the number of nodes (passable cells) as little-endian uint32, then the
+# node of every cell as an int32 (-1 for blocked cells, nodes numbered row by
+# row). What follows depends on the magic:
+#   APSP (all pairs): for every pair of nodes i < j, row by row through the
+#     upper triangle, the straight and diagonal moves of a shortest path as two
+#     uint16 (both UNREACHABLE if there is none)
+#   HUBS (hub labels): the uint32 start of every node's label and one past the
+#     last, then the hub, straight moves and diagonal moves of every label
+#     entry, as three uint32 arrays. Each label is sorted by hub
+# A path costs straight + diagonal * sqrt(2). sqrt(2) is irrational, so all
+# the shortest paths between two cells have the same counts, which also give
+# their length (straight + diagonal + 1 cells), and are half the size of a
+# float64 cost
+ORACLE_HEADER = struct.Struct("<4sIIII")
+TABLE_MAGIC = b"APSP"
+HUBS_MAGIC = b"HUBS"
+UNREACHABLE = 0xFFFF
+
+# Maps with at most this many passable cells get an all-pairs table: 4 bytes a
+# pair, 32 MiB at the limit, and no path is long enough to overflow a uint16.
+# Larger maps get hub labels, which grow far more slowly
+ALL_PAIRS_MAX_NODES = 4096
+
+# Hub label costs are sums of square roots; a label that covers a pair within
+# this much of the best cost counts as covering it
+COST_TOLERANCE = 1e-9
+
+
+# Where the oracle of a map file for a movement model lives: next to the map,
+# or in directory under the map's name
+def oracle_file(map_file, moves=4, directory=None):
+    base = os.path.splitext(map_file)[0]
+    if directory is not None:
+        base = os.path.join(directory, os.path.basename(base))
+    return f"{base}.{moves}.oracle"
+
+
+# The node of every cell (flat row * cols + col index, -1 if blocked) and the
+# cell of every node
+def number_nodes(grid):
+    cols = len(grid[0])
+    nodes = array.array('i', [-1]) * (len(grid) * cols)
+    cells = []
+    for row in range(len(grid)):
+        for col in range(cols):
+            if grid[row][col]:
+                nodes[row * cols + col] = len(cells)
+                cells.append((row, col))
+    return nodes, cells
+
+
+# The moves out of every node as (node, cost, straight, diagonal), under the
+# search's rules: diagonals only with moves 8, and never cutting a corner
+def node_moves(grid, nodes, cells, moves=4):
+    rows, cols = len(grid), len(grid[0])
+    adjacency = []
+    for row, col in cells:
+        out = []
+        for d_row, d_col, cost in a_star.DIRECTIONS[:8 if moves == 8 else 4]:
+            n_row, n_col = row + d_row, col + d_col
+            if not (0 <= n_row < rows and 0 <= n_col < cols and grid[n_row][n_col]):
+                continue
+            if d_row and d_col:
+                if grid[n_row][col] and grid[row][n_col]:
+                    out.append((nodes[n_row * cols + n_col], cost, 0, 1))
+            else:
+                out.append((nodes[n_row * cols + n_col], cost, 1, 0))
+        adjacency.append(out)
+    return adjacency
+
+
+# Straight and diagonal moves of a shortest path from source to every node,
+# UNREACHABLE in both where there is none. Straight moves only is a
+# breadth-first search, otherwise Dijkstra
+def node_distances(adjacency, source, moves=4):
+    straight = [UNREACHABLE] * len(adjacency)
+    diagonal = [UNREACHABLE] * len(adjacency)
+    straight[source] = diagonal[source] = 0
+    if moves != 8:
+        queue = deque([source])
+        while queue:
+            node = queue.popleft()
+            for nxt, _, _, _ in adjacency[node]:
+                if straight[nxt] == UNREACHABLE:
+                    straight[nxt] = straight[node] + 1
+                    diagonal[nxt] = 0
+                    queue.append(nxt)
+        return straight, diagonal
+
+    costs = [math.inf] * len(adjacency)
+    costs[source] = 0.0
+    heap = [(0.0, source)]
+    while heap:
+        cost, node = heapq.heappop(heap)
+        if cost > costs[node]:
+            continue
+        for nxt, step, d_straight, d_diagonal in adjacency[node]:
+            if cost + step < costs[nxt]:
+                costs[nxt] = cost + step
+                straight[nxt] = straight[node] + d_straight
+                diagonal[nxt] = diagonal[node] + d_diagonal
+                heapq.heappush(heap, (cost + step, nxt))
+    return straight, diagonal
+
+
+def write_array(f, values):
+    if sys.byteorder != "little":
+        values = array.array(values.typecode, values)
+        values.byteswap()
+    f.write(values.tobytes())
+
+
+def write_header(f, magic, grid, moves, nodes, count):
+    f.write(ORACLE_HEADER.pack(magic, len(grid), len(grid[0]), moves, count))
+    write_array(f, nodes)
+
+
+# All-pairs table: one search from every node, each writing its row of the
+# upper triangle as soon as it is done
+def write_table(grid, filename, moves=4):
+    nodes, cells = number_nodes(grid)
+    if len(cells) > ALL_PAIRS_MAX_NODES:
+        raise ValueError(f"{len(cells)} passable cells is too many for an all-pairs table")
+    adjacency = node_moves(grid, nodes, cells, moves)
+    with open(filename, 'wb') as f:
+        write_header(f, TABLE_MAGIC, grid, moves, nodes, len(cells))
+        for source in range(len(cells)):
+            straight, diagonal = node_distances(adjacency, source, moves)
+            row = array.array('H', [0]) * (2 * (len(cells) - source - 1))
+            row[0::2] = array.array('H', straight[source + 1:])
+            row[1::2] = array.array('H', diagonal[source + 1:])
+            write_array(f, row)
+
+
+# Nodes in the order they become hubs: nested dissection. The middle row or
+# column of the map (across its longer side) comes first, then those of the
+# two halves, level by level. A path between the halves has to cross the line
+# between them, so early hubs lie on many shortest paths and labels stay short
+def hub_order(grid, nodes):
+    cols = len(grid[0])
+    order = []
+    parts = deque([(0, len(grid), 0, cols)])
+    while parts:
+        top, bottom, left, right = parts.popleft()
+        if top >= bottom or left >= right:
+            continue
+        if bottom - top >= right - left:
+            middle = (top + bottom) // 2
+            line = [middle * cols + col for col in range(left, right)]
+            parts.extend([(top, middle, left, right), (middle + 1, bottom, left, right)])
+        else:
+            middle = (left + right) // 2
+            line = [row * cols + middle for row in range(top, bottom)]
+            parts.extend([(top, bottom, left, middle), (top, bottom, middle + 1, right)])
+        order.extend(nodes[cell] for cell in line if nodes[cell] >= 0)
+    return order
+
+
+# Pruned landmark labelling (Akiba, Iwata and Yoshida): a Dijkstra search from
+# each hub in turn, which adds the hub to the label of every node it settles
+# unless the labels built so far already give that node's distance to the hub,
+# and then goes no further from that node. Returns the (hubs, straight,
+# diagonal) lists of every node, hubs numbered by their place in the order
+def hub_labels(grid, moves=4):
+    nodes, cells = number_nodes(grid)
+    adjacency = node_moves(grid, nodes, cells, moves)
+    labels = [([], [], []) for _ in cells]
+    # Cost from the current hub to each earlier hub, from the hub's own label
+    hub_cost = [math.inf] * len(cells)
+    settled = [-1] * len(cells)
+
+    for rank, hub in enumerate(hub_order(grid, nodes)):
+        hub_hubs, hub_straight, hub_diagonal = labels[hub]
+        for other, straight, diagonal in zip(hub_hubs, hub_straight, hub_diagonal):
+            hub_cost[other] = straight + diagonal * a_star.SQRT2
+
+        heap = [(0.0, 0, 0, hub)]
+        while heap:
+            cost, straight, diagonal, node = heapq.heappop(heap)
+            if settled[node] == rank:
+                continue
+            settled[node] = rank
+            node_hubs, node_straight, node_diagonal = labels[node]
+            if any(hub_cost[other] + s + d * a_star.SQRT2 <= cost + COST_TOLERANCE
+                   for other, s, d in zip(node_hubs, node_straight, node_diagonal)):
+                continue
+            node_hubs.append(rank)
+            node_straight.append(straight)
+            node_diagonal.append(diagonal)
+            for nxt, step, d_straight, d_diagonal in adjacency[node]:
+                if settled[nxt] != rank:
+                    heapq.heappush(heap, (cost + step, straight + d_straight, diagonal + d_diagonal, nxt))
+
+        for other in hub_hubs:
+            hub_cost[other] = math.inf
+    return nodes, labels
+
+
+def write_hubs(grid, filename, moves=4):
+    nodes, labels = hub_labels(grid, moves)
+    starts = array.array('I', [0])
+    hubs, straight, diagonal = array.array('I'), array.array('I'), array.array('I')
+    for node_hubs, node_straight, node_diagonal in labels:
+        hubs.extend(node_hubs)
+        straight.extend(node_straight)
+        diagonal.extend(node_diagonal)
+        starts.append(len(hubs))
+    with open(filename, 'wb') as f:
+        write_header(f, HUBS_MAGIC, grid, moves, nodes, len(labels))
+        for values in (starts, hubs, straight, diagonal):
+            write_array(f, values)
+
+
+# Write the oracle of a loaded map. kind is "table" or "hubs"; by default a
+# table when the map has at most ALL_PAIRS_MAX_NODES passable cells
+def build_oracle(grid, filename, moves=4, kind=None):
+    if kind is None:
+        count = sum(1 for row in grid for cell in row if cell)
+        kind = "table" if count <= ALL_PAIRS_MAX_NODES else "hubs"
+    if kind == "table":
+        write_table(grid, filename, moves)
+    elif kind == "hubs":
+        write_hubs(grid, filename, moves)
+    else:
+        raise ValueError(f"unknown oracle kind {kind!r}")
+
+
+class DistanceOracle:
+    # A memory-mapped oracle file. Nothing is read until a query touches it,
+    # and lookups read the page-cached file directly
+
+    def __init__(self, filename):
+        with open(filename, 'rb') as f:
+            self.data = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        if len(self.data) < ORACLE_HEADER.size:
+            raise ValueError(f"{filename}: not a distance oracle")
+        magic, self.rows, self.cols, self.moves, self.count = ORACLE_HEADER.unpack_from(self.data)
+        if magic not in (TABLE_MAGIC, HUBS_MAGIC):
+            raise ValueError(f"{filename}: not a distance oracle")
+        self.filename = filename
+        self.table = magic == TABLE_MAGIC
+        self.offset = ORACLE_HEADER.size
+        self.nodes = self.section('i', self.rows * self.cols)
+        if self.table:
+            self.pairs = self.section('H', self.count * (self.count - 1))
+        else:
+            self.starts = self.section('I', self.count + 1)
+            entries = self.starts[self.count]
+            self.hubs = self.section('I', entries)
+            self.straight = self.section('I', entries)
+            self.diagonal = self.section('I', entries)
+
+    def section(self, typecode, count):
+        # The next count values of the file, as a flat sequence
+        size = array.array(typecode).itemsize * count
+        if self.offset + size > len(self.data):
+            raise ValueError(f"{self.filename}: truncated distance oracle")
+        cells = memoryview(self.data)[self.offset:self.offset + size]
+        self.offset += size
+        if sys.byteorder != "little":
+            values = array.array(typecode, cells)
+            values.byteswap()
+            return values
+        return cells.cast(typecode)
+
+    # Straight and diagonal moves of a shortest path between two nodes, or None
+    def counts(self, source, target):
+        if source == target:
+            return 0, 0
+        if self.table:
+            if source > target:
+                source, target = target, source
+            pair = 2 * (source * (2 * self.count - source - 1) // 2 + target - source - 1)
+            straight = self.pairs[pair]
+            return None if straight == UNREACHABLE else (straight, self.pairs[pair + 1])
+
+        # Both labels are sorted by hub, so walk them together
+        hubs, straight, diagonal = self.hubs, self.straight, self.diagonal
+        i, i_end = self.starts[source], self.starts[source + 1]
+        j, j_end = self.starts[target], self.starts[target + 1]
+        best, best_cost = None, math.inf
+        while i < i_end and j < j_end:
+            if hubs[i] < hubs[j]:
+                i += 1
+            elif hubs[i] > hubs[j]:
+                j += 1
+            else:
+                s, d = straight[i] + straight[j], diagonal[i] + diagonal[j]
+                if s + d * a_star.SQRT2 < best_cost:
+                    best, best_cost = (s, d), s + d * a_star.SQRT2
+                i += 1
+                j += 1
+        return best
+
+    # (path_length, path_cost) of a shortest path between two cells, (-1, -1)
+    # if there is none
+    def lookup(self, src, dest):
+        if not (0 <= src[0] < self.rows and 0 <= src[1] < self.cols) or \
+                not (0 <= dest[0] < self.rows and 0 <= dest[1] < self.cols):
+            return -1, -1
+        source = self.nodes[src[0] * self.cols + src[1]]
+        target = self.nodes[dest[0] * self.cols + dest[1]]
+        counts = self.counts(source, target) if source >= 0 and target >= 0 else None
+        if counts is None:
+            return -1, -1
+        return counts[0] + counts[1] + 1, counts[0] + counts[1] * a_star.SQRT2
+
+    # Same contract as a_star.aStarSearch, with nothing expanded or pushed
+    def search(self, src, dest, heuristic, stats=None, moves=4):
+        if (8 if moves == 8 else 4) != self.moves:
+            raise ValueError(f"{self.filename} is for {self.moves}-connected moves, not {moves}")
+        length, cost = self.lookup(src, dest)
+        if stats is not None:
+            stats["expanded"] = 0
+            stats["pushed"] = 0
+            stats["path_cost"] = cost
+        return length
+
+
+# A search function (same contract as a_star.aStarSearch) answering from the
+# oracles of map_file, one per movement model built for it. The map itself is
+# not loaded
+def oracle_search(map_file, directory=None, moves=(4, 8)):
+    oracles = {}
+    for model in moves:
+        filename = oracle_file(map_file, model, directory)
+        if os.path.exists(filename):
+            oracles[model] = DistanceOracle(filename)
+    if not oracles:
+        raise FileNotFoundError(f"no distance oracle for {map_file}; build one with --build")
+
+    def search(src, dest, heuristic, stats=None, moves=4):
+        oracle = oracles.get(8 if moves == 8 else 4)
+        if oracle is None:
+            raise ValueError(f"no {moves}-connected distance oracle for {map_file}")
+        return oracle.search(src, dest, heuristic, stats, moves)
+    return search
+
+
+def main():
+    # "--dir <directory>" (where the oracles are, instead of next to the map)
+    # and "--kind table|hubs" (for --build) may appear anywhere
+    args = sys.argv[1:]
+    options = {}
+    for option in ("--dir", "--kind"):
+        if option in args:
+            idx = args.index(option)
+            options[option] = args[idx + 1] if idx + 1 < len(args) else ""
+            del args[idx:idx + 2]
+
+    build_mode = len(args) in (2, 3) and args[0] == "--build"
+    serve_mode = len(args) == 2 and args[1] == "--serve"
+    if (len(args) not in (6, 7) and not build_mode and not serve_mode) or \
+            options.get("--kind", "table") not in ("table", "hubs"):
+        print("Usage: python distance_oracle.py [--dir <dir>] [--kind table|hubs] --build <map_file> [<moves>]")
+        print("       python distance_oracle.py [--dir <dir>] <map_file> <start_row> <start_col> <goal_row> <goal_col> <heuristic> [<moves>]")
+        print("       python distance_oracle.py [--dir <dir>] <map_file> --serve")
+        return
+
+    if build_mode:
+        moves = int(args[2]) if len(args) > 2 else 4
+        filename = oracle_file(args[1], moves, options.get("--dir"))
+        build_start = time.perf_counter()
+        build_oracle(a_star.load_map(args[1]), filename, moves, options.get("--kind"))
+        print(f"Wrote {filename} ({os.path.getsize(filename)} bytes) in {time.perf_counter() - build_start:.3f}s")
+        return
+
+    # A single query only needs the oracle for its own movement model
+    load_start = time.perf_counter()
+    moves = (4, 8) if serve_mode else (int(args[6]) if len(args) > 6 else 4,)
+    search = oracle_search(args[0], options.get("--dir"), moves)
+    print(f"READY {time.perf_counter() - load_start:.9f}", flush=True)
+
+    if serve_mode:
+        a_star.serve(search)
+        return
+    a_star.run_query(search, (int(args[1]), int(args[2])), (int(args[3]), int(args[4])), int(args[5]), moves[0])
+
+
+if __name__ == "__main__":
+    main()
@@ -1,184 +1,1578 @@
 import argparse
+import glob
+import hashlib
+import json
 import os
+import re
 import subprocess
 import time
 import psutil
 import shutil
+import tempfile
 import csv
 import sys
+import math
+import random
+from collections import Counter, deque
+from concurrent.futures import ThreadPoolExecutor
+import statistics
+import importlib.util
+import multiprocessing
+import platform
+import asyncio
+import queue
+import threading
+import ctypes
+import signal
+from datetime import datetime, timezone
 
 # Add the implementations folder to the Python path
 sys.path.insert(0, os.path.join(os.path.dirname(__file__), "language_implementations"))
 
 import a_star  # Assuming this is the Python implementation
+import distance_oracle
 
-def load_map(filename):
-    with open(filename, 'r') as f:
-        lines = f.readlines()
-    
-    # Skip the first 4 lines and process the rest
-    grid = []
-    for line in lines[4:]:  # Start reading from the 5th line (index 4)
-        if not line.startswith("type"):  # Skip lines that start with "type"
-            # Convert good spaces ('.') to 0 and bad spaces ('T' or '@') to 1
-            grid.append([1 if char == '.' else 0 for char in line.strip()])
-    
-    return grid
+try:
+    import a_star_native  # ctypes wrapper of the C++ library; needs NumPy
+except ImportError:
+    a_star_native = None
+
+try:
+    import pyarrow  # only needed for --parquet
+    import pyarrow.csv
+    import pyarrow.dataset
+except ImportError:
+    pyarrow = None
+
+# Columns of the results file, in order
+RESULT_FIELDS = ["time", "startup_time", "load_time", "search_time",
+                 "cpu_user", "cpu_sys", "peak_rss_kb", "expanded", "pushed", "path_length", "path_cost",
+                 "optimal", "reachable", "valid", "language", "profile",
+                 "map", "scen_file", "bucket", "instance_num", "heuristic", "moves", "step", "rep"]
+
+# Arrow types of the result columns in a --parquet dataset
+RESULT_TYPES = {"time": "float64", "startup_time": "float64", "load_time": "float64", "search_time": "float64",
+                "cpu_user": "float64", "cpu_sys": "float64", "peak_rss_kb": "int64", "expanded": "int64",
+                "pushed": "int64", "path_length": "int32", "path_cost": "float64", "optimal": "float64",
+                "reachable": "bool", "valid": "bool", "language": "string", "profile": "string", "map": "string",
+                "scen_file": "string", "bucket": "int32", "instance_num": "int32", "heuristic": "int8",
+                "moves": "int8", "step": "int16", "rep": "int16"}
+
+# A --parquet dataset has one directory level per column, e.g.
+# map=random-64-64-20.map/language=C%2B%2B/heuristic=0/, so readers can skip
+# whole partitions
+RESULT_PARTITIONING = ["map", "language", "heuristic"]
+
+# Heuristics by the number passed on an implementation's command line
+HEURISTIC_NAMES = {0: "euclidean", 1: "manhattan", 2: "octile", 3: "chebyshev", 4: "landmark"}
+
+# Heuristics every implementation understands; a Language lists any others it does
+BASIC_HEURISTICS = frozenset({0, 1, 2, 3})
+
+# Consistent heuristics by movement model. Manhattan overestimates diagonal
+# moves, so it is not one of them with moves 8
+CONSISTENT_HEURISTICS = {4: BASIC_HEURISTICS, 8: frozenset({0, 2, 3})}
 
+# Heuristics run when --heuristics is not given: Euclidean against the movement
+# model's own distance, Manhattan or octile
+DEFAULT_HEURISTICS = {4: [0, 1], 8: [0, 2]}
 
+# How often each (scenario, language, heuristic) is run: untimed warmup runs,
+# then up to `repeat` measured runs. With ci_target set, measuring stops once at
+# least min_repeat samples are in and the 95% CI of the median time is narrower
+# than ci_target times the median
+DEFAULT_TRIALS = {"warmup": 0, "repeat": 1, "min_repeat": 3, "ci_target": None}
+
+# Named build profiles: compiler flags for each compiled language. Languages that
+# are not listed here do not depend on the profile and are recorded with profile "-"
+BUILD_PROFILES = {
+    "O0": {"C++": ["-O0"], "Rust": ["-C", "opt-level=0"]},
+    "O2": {"C++": ["-O2"], "Rust": ["-C", "opt-level=2"]},
+    "O3-native": {"C++": ["-O3", "-march=native"], "Rust": ["-C", "opt-level=3", "-C", "target-cpu=native"]},
+}
+DEFAULT_PROFILE = "O2"
+
+SOURCE_DIR = "language_implementations"
+PYTHON_SOURCE = os.path.join(SOURCE_DIR, "a_star.py")
+ORACLE_SOURCE = os.path.join(SOURCE_DIR, "distance_oracle.py")
+NATIVE_SOURCE = os.path.join(SOURCE_DIR, "a_star_native.py")
+
+# Build artifacts live here, one subfolder per profile, next to a manifest of
+# the hash each artifact was built from
+BUILD_DIR = os.path.join(SOURCE_DIR, "build")
+BUILD_CACHE = os.path.join(BUILD_DIR, "cache.json")
+
+# Binary (.grid) copies of the maps, their component indexes (.comp) and
+# distance oracles (.oracle), written once per map and cached like the builds
+MAP_CACHE_DIR = os.path.join(BUILD_DIR, "maps")
+
+def load_map(filename):
+    # Same parser as the Python implementation, sized from the map header
+    return a_star.load_map(filename)
 
 
 def load_scen(filename):
+    # Columns: bucket, map, map width, map height, start x, start y, goal x, goal y,
+    # optimal length. x is the column and y the row, so cells are kept as
+    # (row, col) = (y, x). The optimal length is for 8-connected movement
     scenarios = []
     with open(filename, 'r') as f:
         for line in f.readlines()[1:]:  # Skip the header
             parts = line.split()
+            if not parts:
+                continue
             scenarios.append({
-                'start': (int(parts[4]), int(parts[5])),
-                'goal': (int(parts[6]), int(parts[7])),
+                'bucket': int(parts[0]),
+                'start': (int(parts[5]), int(parts[4])),
+                'goal': (int(parts[7]), int(parts[6])),
+                'optimal': float(parts[8]),
             })
     return scenarios
 
 
-def compile_executables():
-    executables = {}
-    cpp_source = os.path.join("language_implementations", "a_star.cpp")
-    java_source = os.path.join("language_implementations", "a_star.java")
-    js_source = os.path.join("language_implementations", "a_star.js")
-    python_source = os.path.join("language_implementations", "a_star.py")
-    rust_source = os.path.join("language_implementations", "a_star_rust")
-
-    # C++ Compilation
-    if shutil.which("g++"):
-        print("Compiling C++...")
-        cpp_exec = os.path.join("language_implementations", "a_star_cpp.exe")
+def bfs_distance(grid, start, goal):
+    # Number of moves on the shortest 4-connected path, or -1 if there is none.
+    # The .scen optimal lengths assume diagonal moves, so 4-connected runs are
+    # checked against this instead
+    rows, cols = len(grid), len(grid[0])
+    if not (0 <= start[0] < rows and 0 <= start[1] < cols and 0 <= goal[0] < rows and 0 <= goal[1] < cols) \
+            or not grid[start[0]][start[1]] or not grid[goal[0]][goal[1]]:
+        return -1
+    distance = {start: 0}
+    queue = deque([start])
+    while queue:
+        cell = queue.popleft()
+        if cell == goal:
+            return distance[cell]
+        row, col = cell
+        for nxt in ((row + 1, col), (row - 1, col), (row, col + 1), (row, col - 1)):
+            if 0 <= nxt[0] < rows and 0 <= nxt[1] < cols and grid[nxt[0]][nxt[1]] and nxt not in distance:
+                distance[nxt] = distance[cell] + 1
+                queue.append(nxt)
+    return -1
+
+
+def is_reachable(components, cols, start, goal):
+    # Whether the scenario's cells are passable and in the same connected component
+    return components[start[0] * cols + start[1]] != 0 and a_star.same_component(components, cols, start, goal)
+
+
+def is_correct(path_cost, optimal):
+    # The scenario files give optimal lengths to 8 decimal places
+    return abs(path_cost - optimal) <= 1e-5
+
+
+def scen_map_name(filename):
+    # The map a .scen file belongs to, taken from the second column of its first query
+    with open(filename, 'r') as f:
+        for line in f.readlines()[1:]:
+            parts = line.split()
+            if len(parts) >= 2:
+                return os.path.basename(parts[1])
+    return None
+
+
+def natural_key(path):
+    # Sort "random-2.scen" before "random-10.scen"
+    return [int(part) if part.isdigit() else part for part in re.split(r"(\d+)", path)]
+
+
+def find_scen_files(pattern):
+    return sorted(glob.glob(pattern), key=natural_key)
+
+
+def find_map_scenarios(map_dir, scen_files):
+    # Pair every .map in map_dir with the given .scen files that refer to it
+    scen_by_map = {}
+    for scen_file in scen_files:
+        scen_by_map.setdefault(scen_map_name(scen_file), []).append(scen_file)
+
+    pairs = []
+    for name in sorted(os.listdir(map_dir)):
+        if not name.endswith(".map"):
+            continue
+        if name in scen_by_map:
+            pairs.append((os.path.join(map_dir, name), scen_by_map[name]))
+        else:
+            print(f"Warning: No scenarios found for map {name}, skipping.")
+    return pairs
+
+
+def profile_label(lang, profile):
+    # The profile column of a row; "-" for languages the profile does not affect
+    return profile if LANGUAGES[lang].toolchain is not None else "-"
+
+
+def toolchain_version(command):
+    # First line of the compiler's version banner, so upgrading the compiler invalidates the cache
+    try:
+        result = subprocess.run(command, capture_output=True, text=True)
+    except OSError:
+        return ""
+    output = (result.stdout or result.stderr).strip()
+    return output.splitlines()[0] if output else ""
+
+
+def build_hash(sources, toolchain, flags):
+    digest = hashlib.sha256()
+    for source in sorted(sources):
+        digest.update(source.encode())
+        with open(source, 'rb') as f:
+            digest.update(f.read())
+    digest.update(toolchain.encode())
+    digest.update(" ".join(flags).encode())
+    return digest.hexdigest()
+
+
+def cached_build(name, sources, toolchain, flags, artifact, build, rebuild=False):
+    # Runs build() unless artifact exists and was built from the same sources,
+    # toolchain and flags. Returns False if the build failed
+    cache = {}
+    if os.path.exists(BUILD_CACHE):
+        with open(BUILD_CACHE, 'r') as f:
+            cache = json.load(f)
+
+    key = build_hash(sources, toolchain, flags)
+    if not rebuild and cache.get(name) == key and os.path.exists(artifact):
+        print(f"{name} is up to date.")
+        return True
+
+    print(f"Compiling {name}...")
+    try:
+        build()
+    except subprocess.CalledProcessError as e:
+        print(f"Error compiling {name}: {e}")
+        return False
+
+    cache[name] = key
+    os.makedirs(BUILD_DIR, exist_ok=True)
+    with open(BUILD_CACHE, 'w') as f:
+        json.dump(cache, f, indent=2, sort_keys=True)
+    return True
+
+
+def binary_map(map_file, rebuild=False):
+    # The .grid copy of map_file, converted only when the map has changed.
+    # Returns the text map itself if the conversion failed
+    grid_file = os.path.join(MAP_CACHE_DIR, os.path.splitext(os.path.basename(map_file))[0] + ".grid")
+    os.makedirs(MAP_CACHE_DIR, exist_ok=True)
+
+    def convert():
         try:
-            subprocess.run(["g++", "-o", cpp_exec, cpp_source], check=True)
-            executables["C++"] = cpp_exec
-        except subprocess.CalledProcessError as e:
-            print(f"Error compiling C++: {e}")
-    else:
-        print("Warning: g++ not found. Skipping C++.")
+            a_star.write_binary_map(load_map(map_file), grid_file)
+        except (OSError, ValueError) as e:
+            raise subprocess.CalledProcessError(1, ["convert", map_file], stderr=str(e))
 
-    # Java Compilation
-    if shutil.which("javac"):
-        print("Compiling Java...")
+    if cached_build(f"map/{os.path.basename(map_file)}", [map_file], "", [], grid_file, convert, rebuild):
+        return grid_file
+    return map_file
+
+
+def component_index(map_file, rebuild=False):
+    # Write the component index next to the .grid copy of map_file, where the
+    # implementations look for it. Returns False if it could not be built
+    comp_file = a_star.components_file(os.path.join(MAP_CACHE_DIR, os.path.basename(map_file)))
+    os.makedirs(MAP_CACHE_DIR, exist_ok=True)
+
+    def build():
         try:
-            subprocess.run(["javac", java_source], check=True)
-            java_exec = os.path.splitext(os.path.basename(java_source))[0]
-            executables["Java"] = java_exec
-        except subprocess.CalledProcessError as e:
-            print(f"Error compiling Java: {e}")
-    else:
-        print("Warning: javac not found. Skipping Java.")
+            a_star.write_components(load_map(map_file), comp_file)
+        except (OSError, ValueError) as e:
+            raise subprocess.CalledProcessError(1, ["components", map_file], stderr=str(e))
 
-    # JavaScript (Node.js)
-    if shutil.which("node"):
-        executables["JavaScript"] = "node"
-    else:
-        print("Warning: Node.js not found. Skipping JavaScript.")
+    return cached_build(f"components/{os.path.basename(map_file)}", [map_file], "", [], comp_file, build, rebuild)
 
-    # Python "Executable"
-    if os.path.exists(python_source):
-        executables["Python"] = "python"
-    else:
-        print("Warning: Python implementation not found.")
 
-    # Rust Compilation
-    rust_exec = os.path.join(rust_source, "target", "release", "a_star_rust")
-    if shutil.which("cargo"):
-        print("Compiling Rust...")
+def oracle_index(map_file, moves, rebuild=False):
+    # Precompute the distance oracle of map_file for a movement model in
+    # MAP_CACHE_DIR, where the Python-Oracle series looks for it. Returns False
+    # if it could not be built
+    oracle_file = distance_oracle.oracle_file(map_file, moves, MAP_CACHE_DIR)
+    os.makedirs(MAP_CACHE_DIR, exist_ok=True)
+
+    def build():
         try:
-            subprocess.run(["cargo", "build", "--release"], cwd=rust_source, check=True)
-            executables["Rust"] = rust_exec
-        except subprocess.CalledProcessError as e:
-            print(f"Error compiling Rust: {e}")
-    else:
+            distance_oracle.build_oracle(load_map(map_file), oracle_file, moves)
+        except (OSError, ValueError) as e:
+            raise subprocess.CalledProcessError(1, ["oracle", map_file], stderr=str(e))
+
+    return cached_build(f"oracle/{os.path.basename(map_file)}/{moves}", [map_file, ORACLE_SOURCE], "", [],
+                        oracle_file, build, rebuild)
+
+
+# Each benchmarked series is declared once, as a Language in LANGUAGES: how it
+# is built, the command that runs it, how the harness talks to it and what it
+# supports. Everything else (building, launching, pooling runners, choosing
+# jobs) goes through the registry, so a variant such as another interpreter or
+# runtime flags is one more register_language call.
+class Language:
+    # name: the series, recorded in the language column
+    # build(profile, rebuild): the executable (or library, or directory) to
+    #   run, or None if the series cannot be built here. Builds should go
+    #   through cached_build
+    # command(executable, map_file): the command line up to and including the
+    #   map file; the query or --serve is appended to it
+    # toolchain: the key of its compiler flags in BUILD_PROFILES, or None if
+    #   the build profile does not affect it (its profile column is then "-")
+    # serve: answers queries over stdin with --serve, so warm mode can keep one
+    #   process per map; otherwise every query starts a process
+    # in_process: called as a library through InProcessRunner instead of run as
+    #   a program while the harness keeps runners. In cold mode its command
+    #   (a fresh interpreter loading the library) answers each query
+    # heuristics: the heuristic numbers it understands, or {moves: heuristics}
+    #   when that depends on the movement model
+    # replan: an incremental planner that answers --replan sessions. Such series
+    #   are only run by --mode replan, and that mode runs nothing else
+    # precompute(map_file, moves, rebuild): an offline step run for every map
+    #   before it is benchmarked, such as oracle_index. Returns False if it failed
+
+    def __init__(self, name, build, command=None, toolchain=None, serve=True, in_process=False,
+                 heuristics=BASIC_HEURISTICS, replan=False, precompute=None):
+        self.name = name
+        self.build = build
+        self.command = command
+        self.toolchain = toolchain
+        self.serve = serve
+        self.in_process = in_process
+        if not isinstance(heuristics, dict):
+            heuristics = {4: heuristics, 8: heuristics}
+        self.heuristics = {moves: frozenset(numbers) for moves, numbers in heuristics.items()}
+        self.replan = replan
+        self.precompute = precompute
+
+
+LANGUAGES = {}
+
+
+def register_language(language):
+    LANGUAGES[language.name] = language
+    return language
+
+
+def build_cpp(profile, rebuild):
+    if not shutil.which("g++"):
+        print("Warning: g++ not found. Skipping C++.")
+        return None
+    profile_dir = os.path.join(BUILD_DIR, profile)
+    cpp_source = os.path.join(SOURCE_DIR, "a_star.cpp")
+    cpp_exec = os.path.join(profile_dir, "a_star_cpp.exe")
+    cpp_flags = BUILD_PROFILES[profile]["C++"]
+    os.makedirs(profile_dir, exist_ok=True)
+    if cached_build(f"C++/{profile}", [cpp_source], toolchain_version(["g++", "--version"]), cpp_flags, cpp_exec,
+                    lambda: subprocess.run(["g++", *cpp_flags, "-o", cpp_exec, cpp_source], check=True), rebuild):
+        return cpp_exec
+    return None
+
+
+def build_cpp_library(profile, rebuild):
+    # The C++ compiler and flags build the shared library that Python calls in-process
+    if not shutil.which("g++"):
+        print("Warning: g++ not found. Skipping Python-ctypes.")
+        return None
+    if a_star_native is None:
+        print("Warning: NumPy not found. Skipping Python-ctypes.")
+        return None
+    profile_dir = os.path.join(BUILD_DIR, profile)
+    lib_source = os.path.join(SOURCE_DIR, "a_star_lib.cpp")
+    lib_path = os.path.join(profile_dir, "liba_star.so")
+    cpp_flags = BUILD_PROFILES[profile]["C++"]
+    os.makedirs(profile_dir, exist_ok=True)
+    if cached_build(f"Python-ctypes/{profile}", [lib_source], toolchain_version(["g++", "--version"]), cpp_flags,
+                    lib_path, lambda: subprocess.run(["g++", *cpp_flags, "-shared", "-fPIC", "-o", lib_path,
+                                                      lib_source], check=True), rebuild):
+        return lib_path
+    return None
+
+
+def build_java(profile, rebuild):
+    # javac has no optimization levels; the JIT does that work
+    if not shutil.which("javac"):
+        print("Warning: javac not found. Skipping Java.")
+        return None
+    java_source = os.path.join(SOURCE_DIR, "a_star.java")
+    java_dir = os.path.join(BUILD_DIR, "java")
+    if cached_build("Java", [java_source], toolchain_version(["javac", "-version"]), [],
+                    os.path.join(java_dir, "a_star.class"),
+                    lambda: subprocess.run(["javac", "-d", java_dir, java_source], check=True), rebuild):
+        return java_dir
+    return None
+
+
+def build_rust(profile, rebuild):
+    # The profile's flags are passed to rustc through RUSTFLAGS
+    if not shutil.which("cargo"):
         print("Warning: Cargo not found. Skipping Rust.")
+        return None
+    rust_source = os.path.join(SOURCE_DIR, "a_star_rust")
+    rust_target = os.path.abspath(os.path.join(BUILD_DIR, profile, "rust"))
+    rust_exec = os.path.join(rust_target, "release", "a_star_rust")
+    rust_flags = BUILD_PROFILES[profile]["Rust"]
+    rust_sources = [os.path.join(rust_source, "Cargo.toml")] + \
+        glob.glob(os.path.join(rust_source, "*.rs")) + glob.glob(os.path.join(rust_source, "src", "*.rs"))
+    env = dict(os.environ, RUSTFLAGS=" ".join(rust_flags))
+    if cached_build(f"Rust/{profile}", rust_sources, toolchain_version(["rustc", "--version"]), rust_flags, rust_exec,
+                    lambda: subprocess.run(["cargo", "build", "--release", "--target-dir", rust_target],
+                                           cwd=rust_source, env=env, check=True), rebuild):
+        return rust_exec
+    return None
+
+
+def find_program(program, name):
+    # A build step for interpreted series: the interpreter's path, if installed
+    def build(profile, rebuild):
+        path = shutil.which(program)
+        if path is None:
+            print(f"Warning: {program} not found. Skipping {name}.")
+        return path
+    return build
+
+
+def python_build(name, requires=None):
+    # Build step for a series of a_star.py run by this interpreter, optionally
+    # needing a module (e.g. numpy) to be importable
+    def build(profile, rebuild):
+        if not os.path.exists(PYTHON_SOURCE):
+            print(f"Warning: Python implementation not found. Skipping {name}.")
+            return None
+        if requires and importlib.util.find_spec(requires) is None:
+            print(f"Warning: {requires} not found. Skipping {name}.")
+            return None
+        return sys.executable
+    return build
+
+
+register_language(Language(
+    "C++", build_cpp, lambda exe, map_file: [exe, "C++", map_file], toolchain="C++"))
+register_language(Language(
+    "Python-ctypes", build_cpp_library,
+    lambda exe, map_file: [sys.executable, NATIVE_SOURCE, "--library", exe, map_file], toolchain="C++", in_process=True,
+    heuristics=BASIC_HEURISTICS | {4}))
+register_language(Language(
+    "Java", build_java, lambda exe, map_file: ["java", "-cp", exe, "a_star", "Java", map_file]))
+register_language(Language(
+    "JavaScript", find_program("node", "JavaScript"),
+    lambda exe, map_file: [exe, os.path.join(SOURCE_DIR, "a_star.js"), map_file]))
+register_language(Language(
+    "Python", python_build("Python"), lambda exe, map_file: [exe, PYTHON_SOURCE, map_file],
+    heuristics=BASIC_HEURISTICS | {4}))
+# Same script with the NumPy engine, benchmarked as its own series
+register_language(Language(
+    "Python-NumPy", python_build("Python-NumPy", requires="numpy"),
+    lambda exe, map_file: [exe, PYTHON_SOURCE, "--engine", "numpy", map_file],
+    heuristics=BASIC_HEURISTICS | {4}))
+register_language(Language(
+    "Rust", build_rust, lambda exe, map_file: [exe, map_file], toolchain="Rust"))
+# The classic Python engine under PyPy's JIT, when pypy3 is installed
+register_language(Language(
+    "PyPy", find_program("pypy3", "PyPy"), lambda exe, map_file: [exe, PYTHON_SOURCE, map_file],
+    heuristics=BASIC_HEURISTICS | {4}))
+# Jump Point Search and bidirectional A* (--engine jps|bidir), each benchmarked
+# as its own series of the implementation it runs in
+for engine, suffix in (("jps", "JPS"), ("bidir", "Bidir")):
+    register_language(Language(
+        f"Python-{suffix}", python_build(f"Python-{suffix}"),
+        lambda exe, map_file, engine=engine: [exe, PYTHON_SOURCE, "--engine", engine, map_file],
+        heuristics=BASIC_HEURISTICS | {4}))
+    register_language(Language(
+        f"C++-{suffix}", build_cpp, lambda exe, map_file, engine=engine: [exe, "--engine", engine, "C++", map_file],
+        toolchain="C++"))
+    register_language(Language(
+        f"Rust-{suffix}", build_rust, lambda exe, map_file, engine=engine: [exe, "--engine", engine, map_file],
+        toolchain="Rust"))
+# Distance oracle lookups, precomputed per map and movement model, against
+# which the online searches are compared. It ignores the heuristic, so it is
+# registered for heuristic 0 only; more would record the same lookups again
+register_language(Language(
+    "Python-Oracle", python_build("Python-Oracle"),
+    lambda exe, map_file: [exe, ORACLE_SOURCE, "--dir", MAP_CACHE_DIR, map_file],
+    heuristics={0}, precompute=oracle_index))
+# D* Lite (--replan) in Python and Rust, for --mode replan. Its repairs are
+# only correct with a consistent heuristic
+register_language(Language(
+    "Python-DStarLite", python_build("Python-DStarLite"), lambda exe, map_file: [exe, PYTHON_SOURCE, map_file],
+    heuristics=CONSISTENT_HEURISTICS, replan=True))
+register_language(Language(
+    "Rust-DStarLite", build_rust, lambda exe, map_file: [exe, map_file], toolchain="Rust",
+    heuristics=CONSISTENT_HEURISTICS, replan=True))
+
+
+def compile_executables(profile=DEFAULT_PROFILE, rebuild=False, languages=None):
+    # Build every registered series, or only those named in languages, for a
+    # profile. Returns {name: executable} in registry order. Series that share
+    # a build step (an engine variant and its implementation) share its result
+    executables = {}
+    built = {}
+    for name, language in LANGUAGES.items():
+        if languages and name not in languages:
+            continue
+        if language.build not in built:
+            built[language.build] = language.build(profile, rebuild)
+        executable = built[language.build]
+        if executable is not None:
+            executables[name] = executable
 
     print(f"Executables: {executables}")
     return executables
 
-def run_astar_executable(executable, lang, map_file, start, goal, heuristic):
-    if lang == "Java":
-        command = ["java", "-cp", "language_implementations", executable, "Java", map_file, str(start[0]), str(start[1]), str(goal[0]), str(goal[1]), str(heuristic)]
-    elif lang == "C++":
-        command = [executable, "C++", map_file, str(start[0]), str(start[1]), str(goal[0]), str(goal[1]), str(heuristic)]
-    elif lang == "JavaScript":
-        command = ["node", os.path.join("language_implementations", "a_star.js"), map_file, str(start[0]), str(start[1]), str(goal[0]), str(goal[1]), str(heuristic)]
-    elif lang == "Python":
-        command = [sys.executable, os.path.join("language_implementations", "a_star.py"), map_file, str(start[0]), str(start[1]), str(goal[0]), str(goal[1]), str(heuristic)]
-    elif lang == "Rust":
-        command = [executable, map_file, str(start[0]), str(start[1]), str(goal[0]), str(goal[1]), str(heuristic)]
-    else:
-        command = [executable, map_file, str(start[0]), str(start[1]), str(goal[0]), str(goal[1]), str(heuristic)]
+def build_command(executable, lang, map_file):
+    # Everything up to and including the map file; the query (or --serve) is appended by the caller
+    return LANGUAGES[lang].command(executable, map_file)
+
+
+def parse_ready(line):
+    # Every implementation prints "READY <load_seconds>" once the map is loaded
+    parts = line.split()
+    if len(parts) != 2 or parts[0] != "READY":
+        raise ValueError(f"Expected 'READY <load_seconds>', got '{line.strip()}'")
+    return float(parts[1])
+
+
+def parse_result(line):
+    # Each answered query is printed as "<path_length> <search_seconds> <expanded> <pushed> <path_cost>"
+    parts = line.split()
+    if len(parts) < 5:
+        raise ValueError(f"Expected '<path_length> <search_seconds> <expanded> <pushed> <path_cost>', got '{line.strip()}'")
+    return {
+        "path_length": int(parts[0]),
+        "search_time": float(parts[1]),
+        "expanded": int(parts[2]),
+        "pushed": int(parts[3]),
+        "path_cost": float(parts[4])
+    }
+
+
+# ptrace requests, option and event used by run_child
+PTRACE_TRACEME = 0
+PTRACE_CONT = 7
+PTRACE_SETOPTIONS = 0x4200
+PTRACE_O_TRACEEXIT = 0x40
+PTRACE_EVENT_EXIT = 6
+
 
-    # Track execution time and CPU usage
-    process = psutil.Process()
-    start_time = time.time()
+def load_ptrace():
+    # libc's ptrace, or None off Linux
+    if not sys.platform.startswith("linux"):
+        return None
+    try:
+        ptrace = ctypes.CDLL(None, use_errno=True).ptrace
+    except (OSError, AttributeError):
+        return None
+    ptrace.argtypes = [ctypes.c_long, ctypes.c_long, ctypes.c_void_p, ctypes.c_void_p]
+    ptrace.restype = ctypes.c_long
+    return ptrace
+
+
+PTRACE = load_ptrace()
+
+
+def trace_me():
+    # Runs in the child between fork and exec: the exec then stops it for run_child
+    PTRACE(PTRACE_TRACEME, 0, None, None)
+
+
+def vm_hwm_kb(pid):
+    with open(f"/proc/{pid}/status") as f:
+        for line in f:
+            if line.startswith("VmHWM:"):
+                return int(line.split()[1])
+    return None
 
+
+def run_child(command, timeout=None, trace=False):
+    # Run a process to completion, returning (returncode, stdout, stderr, rusage,
+    # peak_rss_kb). The child is reaped with os.wait4 so its own CPU time is
+    # available; rusage is None where wait4 does not exist (Windows). A child
+    # still running after timeout seconds is killed and TimeoutExpired raised.
+    #
+    # ru_maxrss cannot give the child's peak memory: Linux carries the parent's
+    # high-water mark through fork and exec, so it is never below the
+    # harness's own. With trace (Linux only) the child is traced instead, and
+    # stopped just before it exits to read its VmHWM, which only counts the
+    # memory mapped since the exec. Tracing slows the child down, so a traced
+    # run is not to be timed. peak_rss_kb is None when the child is not traced
+    trace = trace and PTRACE is not None
+    with tempfile.TemporaryFile(mode='w+') as err:
+        process = subprocess.Popen(command, stdout=subprocess.PIPE, stderr=err, text=True,
+                                   preexec_fn=trace_me if trace else None)
+        killed = []
+        watchdog = None
+        if timeout is not None:
+            watchdog = threading.Timer(timeout, lambda: killed.append(process.kill()))
+            watchdog.start()
+        # A traced child stops until it is continued, so its output is read on a thread
+        output = []
+        reader = threading.Thread(target=lambda: output.append(process.stdout.read()))
+        reader.start()
+        peak_rss = None
+        if hasattr(os, "wait4"):
+            while True:
+                _, status, rusage = os.wait4(process.pid, 0)
+                if not os.WIFSTOPPED(status):
+                    break
+                # A traced child stops at its exec (SIGTRAP), once more when it
+                # starts to exit, and whenever it is sent a signal, which is passed on
+                stop_signal = os.WSTOPSIG(status)
+                if status >> 8 == signal.SIGTRAP | (PTRACE_EVENT_EXIT << 8):
+                    peak_rss = vm_hwm_kb(process.pid)
+                    stop_signal = 0
+                elif stop_signal == signal.SIGTRAP and peak_rss is None:
+                    PTRACE(PTRACE_SETOPTIONS, process.pid, None, PTRACE_O_TRACEEXIT)
+                    stop_signal = 0
+                PTRACE(PTRACE_CONT, process.pid, None, stop_signal)
+            process.returncode = os.waitstatus_to_exitcode(status)
+        else:
+            process.wait()
+            rusage = None
+        reader.join()
+        process.stdout.close()
+        if watchdog is not None:
+            watchdog.cancel()
+        if killed:
+            raise subprocess.TimeoutExpired(command, timeout)
+        err.seek(0)
+        stderr = err.read()
+    return process.returncode, output[0], stderr, rusage, peak_rss
+
+
+def rusage_columns(rusage, peak_rss=None):
+    # CPU times from the child's rusage; peak_rss_kb is left empty when it was not measured
+    if rusage is None:
+        return {"cpu_user": "", "cpu_sys": "", "peak_rss_kb": ""}
+    return {"cpu_user": rusage.ru_utime, "cpu_sys": rusage.ru_stime, "peak_rss_kb": "" if peak_rss is None else peak_rss}
+
+
+def traced_peak_rss(command, timeout=None):
+    # The child's peak memory from a second, untimed run of the same command
+    # under trace, or None if that run fails or cannot be traced
     try:
-        result = subprocess.run(command, stdout=subprocess.PIPE, stderr=subprocess.PIPE, text=True, check=True)
-        end_time = time.time()
-        cpu_usage = process.cpu_percent(interval=end_time-start_time)
-
-        #output = result.stdout.strip()
-
-        #if output:
-            #try:
-            #    path_length = int(output)
-                #print(f"Path Length from {lang}: {path_length}")
-            #except ValueError:
-                # Handle case where output is not a valid integer
-                #print(f"Error: Unable to convert output to an integer: '{output}'")
-            #    path_length = -1  # Indicate an error in parsing the path length
-        #else:
-            #print(f"Error: Empty output received from {lang}.")
-            #path_length = 0  # Indicate no path length found
+        returncode, _, _, _, peak_rss = run_child(command, timeout, trace=True)
+    except subprocess.TimeoutExpired:
+        return None
+    return peak_rss if returncode == 0 else None
 
-        return {
-            "time": end_time - start_time
+
+def run_astar_executable(executable, lang, map_file, start, goal, heuristic, moves=4, timeout=None, peak_rss=False):
+    # With peak_rss, the query is run again untimed to measure its peak memory
+    command = build_command(executable, lang, map_file) + [str(start[0]), str(start[1]), str(goal[0]), str(goal[1]),
+                                                           str(heuristic), str(moves)]
+
+    # Track execution time of the whole process
+    start_time = time.perf_counter()
+
+    try:
+        returncode, stdout, stderr, rusage, _ = run_child(command, timeout)
+        end_time = time.perf_counter()
+        if returncode != 0:
+            raise subprocess.CalledProcessError(returncode, command, stdout, stderr)
+
+        lines = stdout.strip().splitlines()
+        load_time = parse_ready(lines[0])
+        query = parse_result(lines[1])
+        wall_time = end_time - start_time
+
+        result = {
+            "time": wall_time,
+            "startup_time": wall_time - load_time - query["search_time"],
+            "load_time": load_time,
+            "search_time": query["search_time"],
+            "expanded": query["expanded"],
+            "pushed": query["pushed"],
+            "path_length": query["path_length"],
+            "path_cost": query["path_cost"]
         }
+        result.update(rusage_columns(rusage, traced_peak_rss(command, timeout) if peak_rss else None))
+        return result
     except subprocess.CalledProcessError as e:
         print(f"Error running {lang} executable: {e}")
         print(f"Standard Error Output: {e.stderr}")
         return None
+    except subprocess.TimeoutExpired as e:
+        print(f"Error running {lang} executable: {e}")
+        return None
+    except (IndexError, ValueError) as e:
+        print(f"Error parsing {lang} output: {e}")
+        return None
 
 
+def peak_rss_kb(process):
+    # High-water mark of a running process: VmHWM on Linux, the peak working set on Windows
+    try:
+        with open(f"/proc/{process.pid}/status") as f:
+            for line in f:
+                if line.startswith("VmHWM:"):
+                    return int(line.split()[1])
+    except OSError:
+        pass
+    memory = process.memory_info()
+    return getattr(memory, "peak_wset", memory.rss) // 1024
 
-def benchmark_languages(map_file, scen_file):
-    grid = load_map(map_file)
-    scenarios = load_scen(scen_file)
-    results = []
 
-    print("Compiling executables...")
-    executables = compile_executables()
+def runner_result(runner, query, wall_time, cpu_before, cpu_after, peak_rss):
+    # The measurement columns of one query answered by a persistent runner
+    return {
+        "time": wall_time,
+        "startup_time": runner.startup_time,
+        "load_time": runner.load_time,
+        "search_time": query["search_time"],
+        "cpu_user": cpu_after.user - cpu_before.user,
+        "cpu_sys": cpu_after.system - cpu_before.system,
+        "peak_rss_kb": peak_rss,
+        "expanded": query["expanded"],
+        "pushed": query["pushed"],
+        "path_length": query["path_length"],
+        "path_cost": query["path_cost"]
+    }
+
+
+class PersistentRunner:
+    # A long-lived implementation process started with --serve (or another
+    # line-based mode flag): it loads the map once and then answers one query
+    # per line over stdin/stdout. A query with no answer after timeout seconds
+    # kills the process
+
+    def __init__(self, executable, lang, map_file, flag="--serve", timeout=None):
+        self.lang = lang
+        self.timeout = timeout
+        launch_time = time.perf_counter()
+        self.process = subprocess.Popen(build_command(executable, lang, map_file) + [flag],
+                                        stdin=subprocess.PIPE, stdout=subprocess.PIPE, text=True, bufsize=1)
+        try:
+            self.load_time = parse_ready(self.process.stdout.readline())
+        except ValueError:
+            self.close()
+            raise
+        # Whatever is left of the time-to-ready is process/runtime startup
+        self.startup_time = time.perf_counter() - launch_time - self.load_time
+        self.ps_process = psutil.Process(self.process.pid)
+
+    def query(self, start, goal, heuristic, moves=4):
+        return self.request(f"{start[0]} {start[1]} {goal[0]} {goal[1]} {heuristic} {moves}")
+
+    def request(self, line):
+        # Send one line and measure the answer. CPU time is sampled outside the timed
+        # window; /proc reports it in clock ticks, so per-query deltas of very short
+        # searches are coarse
+        cpu_before = self.ps_process.cpu_times()
+        killed = []
+        watchdog = None
+        if self.timeout is not None:
+            watchdog = threading.Timer(self.timeout, lambda: killed.append(self.process.kill()))
+            watchdog.start()
+        start_time = time.perf_counter()
+        self.process.stdin.write(line + "\n")
+        self.process.stdin.flush()
+        line = self.process.stdout.readline()
+        end_time = time.perf_counter()
+        if watchdog is not None:
+            watchdog.cancel()
+        if killed:
+            raise RuntimeError(f"{self.lang} runner gave no answer within {self.timeout}s")
+        if not line:
+            raise RuntimeError(f"{self.lang} runner exited with code {self.process.poll()}")
+        try:
+            cpu_after = self.ps_process.cpu_times()
+            peak_rss = peak_rss_kb(self.ps_process)
+        except psutil.Error as e:
+            raise RuntimeError(f"{self.lang} runner could not be inspected: {e}")
+
+        return runner_result(self, parse_result(line), end_time - start_time, cpu_before, cpu_after, peak_rss)
+
+    def close(self):
+        if self.process.poll() is None:
+            try:
+                self.process.stdin.write("quit\n")
+                self.process.stdin.close()
+            except (BrokenPipeError, OSError):
+                pass
+            try:
+                self.process.wait(timeout=5)
+            except subprocess.TimeoutExpired:
+                self.process.kill()
+
+
+class ReplanRunner(PersistentRunner):
+    # A --replan runner: plan() starts a D* Lite session on the map as loaded
+    # and update() changes cells of the current one; both return the result
+    # of bringing its plan up to date
+
+    def __init__(self, executable, lang, map_file, timeout=None):
+        super().__init__(executable, lang, map_file, "--replan", timeout)
+
+    def plan(self, start, goal, heuristic, moves=4):
+        return self.request(f"plan {start[0]} {start[1]} {goal[0]} {goal[1]} {heuristic} {moves}")
+
+    def update(self, changes):
+        return self.request("update " + " ".join(f"{row} {col} {int(passable)}" for row, col, passable in changes))
+
+
+class InProcessRunner:
+    # The PersistentRunner interface for a library called from this process
+    # (a_star_native): the map is loaded once into a search handle. startup_time
+    # is the time to load the library, and CPU time and peak RSS are those of
+    # the harness process itself
+
+    def __init__(self, library, lang, map_file):
+        self.lang = lang
+        launch_time = time.perf_counter()
+        lib = a_star_native.load_library(os.path.abspath(library))
+        self.startup_time = time.perf_counter() - launch_time
+        load_start = time.perf_counter()
+        grid = a_star_native.load_grid(map_file)
+        self.engine = a_star_native.NativeAStar(grid, lib, a_star_native.load_components(map_file, grid.shape))
+        self.load_time = time.perf_counter() - load_start
+        self.ps_process = psutil.Process()
+
+    def query(self, start, goal, heuristic, moves=4):
+        cpu_before = self.ps_process.cpu_times()
+        start_time = time.perf_counter()
+        query = self.engine.search_batch([(start[0], start[1], goal[0], goal[1], heuristic)], moves)
+        end_time = time.perf_counter()
+        cpu_after = self.ps_process.cpu_times()
+
+        return {
+            "time": end_time - start_time,
+            "startup_time": self.startup_time,
+            "load_time": self.load_time,
+            "search_time": float(query["search_time"][0]),
+            "cpu_user": cpu_after.user - cpu_before.user,
+            "cpu_sys": cpu_after.system - cpu_before.system,
+            "peak_rss_kb": peak_rss_kb(self.ps_process),
+            "expanded": int(query["expanded"][0]),
+            "pushed": int(query["pushed"][0]),
+            "path_length": int(query["path_length"][0]),
+            "path_cost": float(query["path_cost"][0])
+        }
+
+    def close(self):
+        self.engine.close()
+
+
+def start_runners(executables, map_file, runner_class=None, timeout=None):
+    # One runner per language: runner_class, else the kind the language needs.
+    # Runners of processes give up on a query after timeout seconds
+    runners = {}
+    for lang, executable in executables.items():
+        kind = runner_class or (InProcessRunner if LANGUAGES[lang].in_process else PersistentRunner)
+        try:
+            if kind is InProcessRunner:
+                runners[lang] = kind(executable, lang, map_file)
+            else:
+                runners[lang] = kind(executable, lang, map_file, timeout=timeout)
+            print(f"{lang} runner ready (startup {runners[lang].startup_time:.4f}s, map load {runners[lang].load_time:.4f}s)")
+        except (OSError, ValueError) as e:
+            print(f"Warning: could not start persistent {lang} runner, skipping: {e}")
+    return runners
+
+
+def median_ci(samples, confidence=0.95):
+    # Distribution-free confidence interval for the median from order statistics:
+    # the number of samples below the median is Binomial(n, 0.5). Returns None
+    # when there are too few samples for the requested confidence
+    xs = sorted(samples)
+    n = len(xs)
+    alpha = 1 - confidence
+    cumulative = 0.0
+    k = 0
+    while k < n:
+        p = math.comb(n, k) / 2 ** n
+        if cumulative + p > alpha / 2:
+            break
+        cumulative += p
+        k += 1
+    if k == 0:
+        return None
+    return xs[k - 1], xs[n - k]
+
+
+def ci_is_tight(samples, ci_target):
+    interval = median_ci(samples)
+    if interval is None:
+        return False
+    median = statistics.median(samples)
+    return median > 0 and (interval[1] - interval[0]) <= ci_target * median
+
+
+def job_row(result, job, rep, map_file, profile, step=0):
+    # A measured result, completed with the columns that describe its job.
+    # step numbers the answers of a replan session (0 for a plain query)
+    scen_file, bucket, instance_num, start, goal, optimal, reachable, lang, heuristic, moves = job
+    result.update({
+        "optimal": optimal,
+        "reachable": reachable,
+        "valid": is_correct(result["path_cost"], optimal),
+        "language": lang,
+        "profile": profile_label(lang, profile),
+        "map": os.path.basename(map_file),
+        "scen_file": os.path.basename(scen_file),
+        "bucket": bucket,
+        "instance_num": instance_num,
+        "heuristic": heuristic,
+        "moves": moves,
+        "step": step,
+        "rep": rep
+    })
+    return result
+
+
+def trials_done(rows, trials):
+    # Whether --ci-target lets a configuration stop before its last repetition
+    return trials["ci_target"] is not None and len(rows) >= trials["min_repeat"] \
+        and ci_is_tight([row["time"] for row in rows], trials["ci_target"])
+
+
+class BenchmarkWorker:
+    # Runs benchmark jobs one at a time; in warm mode it owns its own persistent runners,
+    # in-process ones included. In cold mode every query starts a process, so
+    # in-process series are run as their command there too. The implementations
+    # load load_file (a .grid copy of the map, or the map itself); rows are
+    # recorded under map_file. With peak_rss, cold mode runs every query a
+    # second time, untimed, to measure its peak memory
+
+    def __init__(self, executables, map_file, mode, trials=DEFAULT_TRIALS, profile=DEFAULT_PROFILE, load_file=None,
+                 timeout=None, peak_rss=False):
+        self.executables = executables
+        self.map_file = map_file
+        self.load_file = load_file or map_file
+        self.mode = mode
+        self.trials = trials
+        self.profile = profile
+        self.timeout = timeout
+        self.peak_rss = peak_rss
+        self.runners = start_runners({lang: exe for lang, exe in executables.items()
+                                      if self.keeps_runner(lang)}, self.load_file, timeout=timeout)
+
+    def keeps_runner(self, lang):
+        # Only warm mode keeps runners: in-process series, and others if they can serve
+        language = LANGUAGES[lang]
+        return self.mode == "warm" and (language.in_process or language.serve)
+
+    def measure(self, lang, start, goal, heuristic, moves):
+        if lang in self.runners:
+            try:
+                return self.runners[lang].query(start, goal, heuristic, moves)
+            except (RuntimeError, ValueError) as e:
+                print(f"Error querying {lang} runner: {e}")
+                self.runners.pop(lang).close()
+                return None
+        if self.keeps_runner(lang):
+            return None
+        return run_astar_executable(self.executables[lang], lang, self.load_file, start, goal, heuristic, moves,
+                                    self.timeout, self.peak_rss)
+
+    def run(self, job):
+        # Returns one row per measured repetition, or an empty list if the configuration failed
+        scen_file, bucket, instance_num, start, goal, optimal, reachable, lang, heuristic, moves = job
+
+        for _ in range(self.trials["warmup"]):
+            if self.measure(lang, start, goal, heuristic, moves) is None:
+                break
+
+        rows = []
+        for rep in range(1, self.trials["repeat"] + 1):
+            result = self.measure(lang, start, goal, heuristic, moves)
+            if result is None:
+                print(f"Warning: No valid result for language {lang} with heuristic {heuristic} on instance {instance_num}, skipping.")
+                return []
+            rows.append(job_row(result, job, rep, self.map_file, self.profile))
+            if trials_done(rows, self.trials):
+                break
+        return rows
+
+    def close(self):
+        for runner in self.runners.values():
+            runner.close()
+
+
+# Replan mode: every query becomes a D* Lite session that replays a sequence
+# of obstacle changes. All series see the same sequence for a query, and each
+# answer is checked against a fresh A* search on the changed map
+DEFAULT_CHANGES = {"changes": 10, "change_size": 2}
+
+
+def change_sequence(grid, start, goal, moves, changes, change_size, seed):
+    # The obstacle changes replayed for one query: a list of (batch, optimal),
+    # each batch a list of (row, col, passable) and optimal the cost of the
+    # best path once it is applied (-1 for none). Each batch reopens the cells
+    # the previous one blocked and blocks change_size cells of the current
+    # best path (never its ends), so every change matters to the plan
+    rng = random.Random(seed)
+    grid = [list(row) for row in grid]
+    # Octile is the admissible one of the two with diagonal moves
+    heuristic = 2 if moves == 8 else 1
+    planner = a_star.DStarLite(grid, start, goal, heuristic, moves)
+    planner.plan()
+    sequence = []
+    blocked = []
+    for _ in range(changes):
+        path = planner.path()[1:-1]
+        batch = [(row, col, True) for row, col in blocked]
+        blocked = rng.sample(path, min(change_size, len(path)))
+        batch += [(row, col, False) for row, col in blocked]
+        for row, col, passable in batch:
+            grid[row][col] = 1 if passable else 0
+        planner.update_cells(batch)
+        planner.plan()
+        stats = {}
+        a_star.BatchSearcher(grid).search(start, goal, heuristic, stats, moves)
+        sequence.append((batch, stats["path_cost"]))
+    return sequence
+
+
+class ReplanWorker(BenchmarkWorker):
+    # Runs replan jobs: one long-lived --replan runner per language, which
+    # answers the initial plan (step 0) and then one repair per change batch.
+    # Each repetition replays the whole session and records a row per step. A
+    # runner that fails or misses the timeout fails that session, and is
+    # started again for the next one, up to MAX_RESTARTS times
+
+    def __init__(self, executables, map_file, trials=DEFAULT_TRIALS, profile=DEFAULT_PROFILE, load_file=None,
+                 replan=DEFAULT_CHANGES, seed=0, timeout=None):
+        super().__init__(executables, map_file, "replan", trials, profile, load_file, timeout)
+        self.runners = start_runners(executables, self.load_file, ReplanRunner, timeout)
+        self.restarts = {}
+        self.replan = replan
+        self.seed = seed
+        self.sequences = {}
+        self.grid = None
+
+    def sequence(self, job):
+        # The change sequence of a job's query, shared by its languages and heuristics
+        scen_file, _, instance_num, start, goal, _, _, _, _, moves = job
+        key = (os.path.basename(scen_file), instance_num, moves)
+        if key not in self.sequences:
+            if self.grid is None:
+                self.grid = load_map(self.load_file)
+            self.sequences[key] = change_sequence(self.grid, start, goal, moves, self.replan["changes"],
+                                                  self.replan["change_size"], f"{self.seed}:{':'.join(map(str, key))}")
+        return self.sequences[key]
+
+    def session(self, lang, start, goal, heuristic, moves, sequence):
+        # The results of one replay, or None if the runner failed
+        if lang not in self.runners and self.restarts.get(lang, 0) <= MAX_RESTARTS:
+            self.runners.update(start_runners({lang: self.executables[lang]}, self.load_file, ReplanRunner,
+                                              self.timeout))
+        runner = self.runners.get(lang)
+        if runner is None:
+            return None
+        try:
+            results = [runner.plan(start, goal, heuristic, moves)]
+            for batch, _ in sequence:
+                results.append(runner.update(batch))
+            return results
+        except (RuntimeError, ValueError) as e:
+            print(f"Error querying {lang} runner: {e}; restarting it.")
+            self.runners.pop(lang).close()
+            self.restarts[lang] = self.restarts.get(lang, 0) + 1
+            return None
+
+    def run(self, job):
+        scen_file, bucket, instance_num, start, goal, optimal, reachable, lang, heuristic, moves = job
+        sequence = self.sequence(job)
+
+        for _ in range(self.trials["warmup"]):
+            if self.session(lang, start, goal, heuristic, moves, sequence) is None:
+                break
+
+        rows = []
+        for rep in range(1, self.trials["repeat"] + 1):
+            results = self.session(lang, start, goal, heuristic, moves, sequence)
+            if results is None:
+                print(f"Warning: No valid result for language {lang} with heuristic {heuristic} on instance {instance_num}, skipping.")
+                return []
+            for step, result in enumerate(results):
+                row = job_row(result, job, rep, self.map_file, self.profile, step)
+                if step > 0:
+                    step_optimal = sequence[step - 1][1]
+                    row.update(optimal=step_optimal, reachable=step_optimal >= 0,
+                               valid=is_correct(result["path_cost"], step_optimal))
+                rows.append(row)
+            if trials_done([row for row in rows if row["step"] == 0], self.trials):
+                break
+        return rows
+
+
+# Per-process worker used by the process pool
+_worker = None
+
+
+def _init_worker(core_queue, executables, map_file, mode, trials, profile, load_file, timeout, replan, seed,
+                 peak_rss):
+    global _worker
+    # Pin this worker (and every implementation process it launches) to its own core
+    core = core_queue.get()
+    if core is not None:
+        os.sched_setaffinity(0, {core})
+    if mode == "replan":
+        _worker = ReplanWorker(executables, map_file, trials, profile, load_file, replan, seed, timeout)
+    else:
+        _worker = BenchmarkWorker(executables, map_file, mode, trials, profile, load_file, timeout, peak_rss)
+
+
+def _run_job(job):
+    return _worker.run(job)
+
+
+def assign_cores(workers):
+    # One dedicated core per worker, or None when affinity cannot be set on this platform
+    if not hasattr(os, "sched_getaffinity"):
+        print("Warning: CPU pinning is not supported on this platform, workers will not be pinned.")
+        return [None] * workers
+    cores = sorted(os.sched_getaffinity(0))
+    if workers > len(cores):
+        print(f"Warning: {workers} workers but only {len(cores)} usable cores, some workers will share a core.")
+    return [cores[i % len(cores)] for i in range(workers)]
+
+
+# Async mode: the jobs are shared by `workers` lanes, each pinned to its own
+# core. A lane measures one query at a time, so measurements on a core never
+# overlap, while the event loop overlaps the lanes' pipe I/O. Every lane keeps
+# its own long-lived --serve runner per language, started on first use. A
+# query that misses its deadline or whose runner dies fails that configuration,
+# and the runner is killed and started again for the next one
+
+# Times a lane restarts one language's runner before giving that language up
+MAX_RESTARTS = 3
+
+
+class AsyncRunner:
+    # A PersistentRunner driven through asyncio pipes, pinned to one core
+
+    def __init__(self, executable, lang, map_file, core=None, timeout=None):
+        self.command = build_command(executable, lang, map_file) + ["--serve"]
+        self.lang = lang
+        self.core = core
+        self.timeout = timeout
+        self.process = None
+
+    async def start(self):
+        launch_time = time.perf_counter()
+        self.process = await asyncio.create_subprocess_exec(*self.command, stdin=asyncio.subprocess.PIPE,
+                                                            stdout=asyncio.subprocess.PIPE)
+        if self.core is not None:
+            os.sched_setaffinity(self.process.pid, {self.core})
+        try:
+            self.load_time = parse_ready((await self.read_line()).decode())
+        except (ValueError, RuntimeError, asyncio.TimeoutError):
+            await self.kill()
+            raise
+        self.startup_time = time.perf_counter() - launch_time - self.load_time
+        self.ps_process = psutil.Process(self.process.pid)
+
+    async def read_line(self):
+        line = await asyncio.wait_for(self.process.stdout.readline(), self.timeout)
+        if not line:
+            raise RuntimeError(f"{self.lang} runner exited with code {await self.process.wait()}")
+        return line
+
+    async def query(self, start, goal, heuristic, moves=4):
+        cpu_before = self.ps_process.cpu_times()
+        start_time = time.perf_counter()
+        self.process.stdin.write(f"{start[0]} {start[1]} {goal[0]} {goal[1]} {heuristic} {moves}\n".encode())
+        await self.process.stdin.drain()
+        line = await self.read_line()
+        end_time = time.perf_counter()
+        try:
+            cpu_after = self.ps_process.cpu_times()
+            peak_rss = peak_rss_kb(self.ps_process)
+        except psutil.Error as e:
+            raise RuntimeError(f"{self.lang} runner could not be inspected: {e}")
+        return runner_result(self, parse_result(line.decode()), end_time - start_time, cpu_before, cpu_after,
+                             peak_rss)
+
+    async def kill(self):
+        if self.process is not None and self.process.returncode is None:
+            self.process.kill()
+            await self.process.wait()
+
+    async def close(self):
+        if self.process is None or self.process.returncode is not None:
+            return
+        try:
+            self.process.stdin.write(b"quit\n")
+            await self.process.stdin.drain()
+            self.process.stdin.close()
+            await asyncio.wait_for(self.process.wait(), 5)
+        except (BrokenPipeError, ConnectionResetError, asyncio.TimeoutError):
+            await self.kill()
+
+
+def pin_thread(core):
+    # Pin the calling thread, and the processes it starts, to core
+    if core is not None:
+        os.sched_setaffinity(0, {core})
+
+
+class AsyncWorker:
+    # One lane of async mode: BenchmarkWorker's job loop over AsyncRunners.
+    # In-process languages, and languages that cannot serve (one process per
+    # query), run on the lane's own thread, pinned to the lane's core, so they
+    # never hold up the event loop and the other lanes
+
+    def __init__(self, executables, map_file, trials, profile, load_file=None, core=None, timeout=None):
+        self.executables = executables
+        self.map_file = map_file
+        self.load_file = load_file or map_file
+        self.trials = trials
+        self.profile = profile
+        self.core = core
+        self.timeout = timeout
+        self.runners = {}
+        self.restarts = {}
+        self.thread = ThreadPoolExecutor(max_workers=1, initializer=pin_thread, initargs=(core,))
+
+    async def on_thread(self, function, *args):
+        # function(*args), run on the lane's thread
+        return await asyncio.get_running_loop().run_in_executor(self.thread, function, *args)
+
+    async def runner(self, lang):
+        # The lane's runner for lang, started (again) if needed; None once lang is given up
+        if lang in self.runners:
+            return self.runners[lang]
+        if self.restarts.get(lang, 0) > MAX_RESTARTS:
+            return None
+        if LANGUAGES[lang].in_process:
+            try:
+                runner = await self.on_thread(InProcessRunner, self.executables[lang], lang, self.load_file)
+            except (OSError, ValueError) as e:
+                print(f"Warning: could not start in-process {lang} runner: {e}")
+                self.restarts[lang] = MAX_RESTARTS + 1
+                return None
+        else:
+            runner = AsyncRunner(self.executables[lang], lang, self.load_file, self.core, self.timeout)
+            try:
+                await runner.start()
+            except (OSError, ValueError, RuntimeError, asyncio.TimeoutError) as e:
+                print(f"Warning: could not start async {lang} runner: {e}")
+                self.restarts[lang] = MAX_RESTARTS + 1
+                return None
+        self.runners[lang] = runner
+        return runner
+
+    async def measure(self, lang, start, goal, heuristic, moves):
+        language = LANGUAGES[lang]
+        if not language.serve and not language.in_process:
+            return await self.on_thread(run_astar_executable, self.executables[lang], lang, self.load_file,
+                                        start, goal, heuristic, moves, self.timeout)
+        runner = await self.runner(lang)
+        if runner is None:
+            return None
+        if language.in_process:
+            return await self.on_thread(runner.query, start, goal, heuristic, moves)
+        try:
+            return await runner.query(start, goal, heuristic, moves)
+        except (RuntimeError, ValueError, asyncio.TimeoutError) as e:
+            reason = f"no answer within {self.timeout}s" if isinstance(e, asyncio.TimeoutError) else e
+            await self.runners.pop(lang).kill()
+            self.restarts[lang] = self.restarts.get(lang, 0) + 1
+            if self.restarts[lang] > MAX_RESTARTS:
+                print(f"Error querying {lang} runner: {reason}; giving {lang} up on this lane.")
+            else:
+                print(f"Error querying {lang} runner: {reason}; restarting it.")
+            return None
+
+    async def run(self, job):
+        scen_file, bucket, instance_num, start, goal, optimal, reachable, lang, heuristic, moves = job
+
+        for _ in range(self.trials["warmup"]):
+            if await self.measure(lang, start, goal, heuristic, moves) is None:
+                break
+
+        rows = []
+        for rep in range(1, self.trials["repeat"] + 1):
+            result = await self.measure(lang, start, goal, heuristic, moves)
+            if result is None:
+                print(f"Warning: No valid result for language {lang} with heuristic {heuristic} on instance {instance_num}, skipping.")
+                return []
+            rows.append(job_row(result, job, rep, self.map_file, self.profile))
+            if trials_done(rows, self.trials):
+                break
+        return rows
+
+    async def close(self):
+        for runner in self.runners.values():
+            if isinstance(runner, AsyncRunner):
+                await runner.close()
+            else:
+                await self.on_thread(runner.close)
+        self.thread.shutdown()
+
+
+async def async_benchmark(jobs, executables, map_file, workers, trials, profile, load_file, timeout, emit):
+    # Run every job on the lanes, calling emit(rows) as each one finishes
+    pending = deque(jobs)
+
+    async def lane(core):
+        worker = AsyncWorker(executables, map_file, trials, profile, load_file, core, timeout)
+        try:
+            while pending:
+                emit(await worker.run(pending.popleft()))
+        finally:
+            await worker.close()
+
+    await asyncio.gather(*(lane(core) for core in assign_cores(workers)))
+
+
+def run_async(jobs, executables, map_file, workers, trials, profile, load_file, timeout):
+    # The event loop runs on its own thread, so query timings never wait for the
+    # caller to write rows; finished configurations come back through a queue
+    finished = queue.Queue()
+
+    def run():
+        try:
+            asyncio.run(async_benchmark(jobs, executables, map_file, workers, trials, profile, load_file, timeout,
+                                        finished.put))
+        finally:
+            finished.put(None)
+
+    thread = threading.Thread(target=run, daemon=True)
+    thread.start()
+    done_count = 0
+    while (rows := finished.get()) is not None:
+        done_count += 1
+        if rows:
+            yield rows
+        if done_count % 100 == 0:
+            print(f"{done_count}/{len(jobs)} runs complete")
+    thread.join()
+
+
+def result_key(row):
+    # Identifies one (scenario, language, profile, heuristic, moves) run within a sweep
+    return (row["map"], row["scen_file"], int(row["instance_num"]), row["language"], row["profile"], int(row["heuristic"]),
+            int(row["moves"]))
+
 
-    instance_num = 1  # Initialize instance number for scenarios
+def benchmark_languages(map_file, scen_files, executables, mode="cold", workers=1, seed=0, done=frozenset(),
+                        trials=DEFAULT_TRIALS, profile=DEFAULT_PROFILE, heuristics=(0, 1), moves=4, load_file=None,
+                        timeout=None, per_bucket=None, replan=DEFAULT_CHANGES, peak_rss=False):
+    # Yields the list of rows of each finished configuration (one per measured
+    # repetition), in completion order. Configurations whose result_key is in done are skipped
+    # so an interrupted sweep can be resumed. load_file, if given, is what the
+    # implementations load instead of map_file. A query may take up to timeout
+    # seconds (None for no limit). With per_bucket, only the first per_bucket
+    # scenarios of each bucket of a .scen file are run. Replan mode runs only
+    # the replan series, on the queries that have a path, replaying
+    # replan["changes"] batches of replan["change_size"] cells for each. With
+    # peak_rss, cold mode measures each query's peak memory in an untimed rerun
+    executables = {lang: exe for lang, exe in executables.items() if LANGUAGES[lang].replan == (mode == "replan")}
+    if not executables:
+        print(f"No series to run in {mode} mode.")
+        return
+    map_name = os.path.basename(map_file)
+    grid = load_map(load_file or map_file)
+    # Scenarios are classified as reachable or not with the map's component
+    # index, or with labels computed here when it has none
+    components = a_star.find_components(load_file or map_file, grid)
+    if components is None:
+        components = a_star.component_labels(grid)
+    jobs = []
+    unreachable = 0
+    for scen_file in scen_files:
+        scen_name = os.path.basename(scen_file)
+        # Instance numbers start at 1 in every scenario file
+        bucket_counts = Counter()
+        for instance_num, scenario in enumerate(load_scen(scen_file), start=1):
+            bucket_counts[scenario['bucket']] += 1
+            if per_bucket is not None and bucket_counts[scenario['bucket']] > per_bucket:
+                continue
+            reachable = is_reachable(components, len(grid[0]), scenario['start'], scenario['goal'])
+            unreachable += not reachable
+            if mode == "replan" and not reachable:
+                continue
+            optimal = scenario['optimal'] if moves == 8 else None
+            for lang in executables:
+                for heuristic in heuristics:
+                    if heuristic not in LANGUAGES[lang].heuristics.get(moves, ()):
+                        continue
+                    if (map_name, scen_name, instance_num, lang, profile_label(lang, profile), heuristic, moves) in done:
+                        continue
+                    if optimal is None:
+                        optimal = float(bfs_distance(grid, scenario['start'], scenario['goal'])) if reachable else -1.0
+                    jobs.append((scen_file, scenario['bucket'], instance_num, scenario['start'], scenario['goal'], optimal,
+                                 reachable, lang, heuristic, moves))
+    if unreachable:
+        print(f"{unreachable} scenario(s) on {map_name} have no path between their start and goal.")
+
+    if not jobs:
+        print(f"All runs for {map_name} are already recorded.")
+        return
+
+    # Randomize run order so thermal/cache drift over the run is not correlated with instance_num
+    if seed is not None:
+        random.Random(seed).shuffle(jobs)
+
+    if mode == "async":
+        print(f"Running {len(jobs)} jobs on {workers} async lane(s)...")
+        yield from run_async(jobs, executables, map_file, workers, trials, profile, load_file, timeout)
+    elif workers <= 1:
+        if mode == "replan":
+            worker = ReplanWorker(executables, map_file, trials, profile, load_file, replan, seed, timeout)
+        else:
+            worker = BenchmarkWorker(executables, map_file, mode, trials, profile, load_file, timeout, peak_rss)
+        try:
+            for done_count, job in enumerate(jobs, start=1):
+                rows = worker.run(job)
+                if rows:
+                    yield rows
+                if done_count % 100 == 0:
+                    print(f"{done_count}/{len(jobs)} runs complete")
+        finally:
+            worker.close()
+    else:
+        core_queue = multiprocessing.Queue()
+        for core in assign_cores(workers):
+            core_queue.put(core)
+        print(f"Running {len(jobs)} jobs on {workers} workers...")
+        with multiprocessing.Pool(workers, initializer=_init_worker,
+                                  initargs=(core_queue, executables, map_file, mode, trials, profile, load_file,
+                                            timeout, replan, seed, peak_rss)) as pool:
+            for done_count, rows in enumerate(pool.imap_unordered(_run_job, jobs, chunksize=8), start=1):
+                if rows:
+                    yield rows
+                if done_count % 100 == 0:
+                    print(f"{done_count}/{len(jobs)} runs complete")
+
+
+class ResultWriter:
+    # Appends every finished configuration to the results file straight away, so a
+    # crash loses at most the runs in flight. With resume=True an existing file is
+    # kept and the keys of its rows are collected in self.done
 
-    for scenario in scenarios:
-        print(instance_num)
-        start = scenario['start']
-        goal = scenario['goal']
+    def __init__(self, output_file, resume=False):
+        self.done = set()
+        if resume and os.path.exists(output_file):
+            self._drop_partial_line(output_file)
+        resuming = resume and os.path.exists(output_file) and os.path.getsize(output_file) > 0
+        if resuming:
+            with open(output_file, 'r', newline='') as f:
+                reader = csv.DictReader(f)
+                if reader.fieldnames != RESULT_FIELDS:
+                    raise ValueError(f"Cannot resume '{output_file}': its columns {reader.fieldnames} do not match {RESULT_FIELDS}")
+                for row in reader:
+                    self.done.add(result_key(row))
+            print(f"Resuming: {len(self.done)} runs already recorded in {output_file}")
 
-        for lang, executable in executables.items():
-            for heuristic in [0, 1]:
-                result = run_astar_executable(executable, lang, map_file, start, goal, heuristic)
-                if result is not None:
-                    result.update({
-                        "language": lang,
-                        "instance_num": instance_num,
-                        "heuristic": heuristic
-                    })
-                    results.append(result)
-                else:
-                    print(f"Warning: No valid result for language {lang} with heuristic {heuristic}, skipping.")
+        self.file = open(output_file, 'a' if resuming else 'w', newline='')
+        self.writer = csv.DictWriter(self.file, fieldnames=RESULT_FIELDS)
+        if not resuming:
+            self.writer.writeheader()
+            self.file.flush()
 
+    @staticmethod
+    def _drop_partial_line(output_file):
+        # A crash mid-write can leave a truncated last row; cut the file back to the last full line
+        with open(output_file, 'rb+') as f:
+            data = f.read()
+            if not data.endswith(b"\n"):
+                f.truncate(data.rfind(b"\n") + 1)
 
-        # Increment instance number for each scenario
-        instance_num += 1
+    def write(self, rows):
+        # All repetitions of a configuration go out in one flush, so a resume never sees half of them
+        self.writer.writerows(rows)
+        self.file.flush()
+
+    def close(self):
+        self.file.close()
+
+
+def sort_results_file(output_file, lang_order):
+    # Rewrite the finished file in a fixed row order, whatever the run order or
+    # number of resumes. A file with no rows keeps just its header
+    with open(output_file, 'r', newline='') as f:
+        rows = list(csv.DictReader(f))
+    if not rows:
+        print(f"Warning: No results recorded in {output_file}.")
+        return
+    rows.sort(key=lambda r: (r["map"], natural_key(r["scen_file"]), int(r["instance_num"]),
+                             lang_order.get(r["language"], len(lang_order)), r["language"], r["profile"], int(r["heuristic"]), int(r["moves"]),
+                             int(r["rep"]), int(r["step"])))
+    temp_file = output_file + ".tmp"
+    with open(temp_file, 'w', newline='') as f:
+        writer = csv.DictWriter(f, fieldnames=rows[0].keys())
+        writer.writeheader()
+        writer.writerows(rows)
+    os.replace(temp_file, output_file)
+    print(f"Results saved to {output_file}")
+
+
+def summarize_results(output_file, summary_file):
+    # One row per configuration (and replan step) with robust statistics over its repetitions
+    with open(output_file, 'r', newline='') as f:
+        groups = {}
+        for row in csv.DictReader(f):
+            groups.setdefault(result_key(row) + (int(row["step"]),), []).append(row)
+
+    summary = []
+    for (map_name, scen_file, instance_num, lang, profile, heuristic, moves, step), rows in groups.items():
+        entry = {
+            "language": lang, "profile": profile, "map": map_name, "scen_file": scen_file, "bucket": rows[0]["bucket"],
+            "instance_num": instance_num, "heuristic": heuristic, "moves": moves, "step": step, "n": len(rows),
+            "valid": all(row["valid"] == "True" for row in rows)
+        }
+        for metric in ["time", "search_time"]:
+            values = sorted(float(row[metric]) for row in rows)
+            quartiles = statistics.quantiles(values, n=4, method='inclusive') if len(values) > 1 else [values[0]] * 3
+            entry[f"{metric}_median"] = statistics.median(values)
+            entry[f"{metric}_min"] = values[0]
+            entry[f"{metric}_iqr"] = quartiles[2] - quartiles[0]
+        interval = median_ci([float(row["time"]) for row in rows])
+        entry["time_ci_low"], entry["time_ci_high"] = interval if interval is not None else ("", "")
+        summary.append(entry)
+
+    save_to_csv(summary, summary_file)
+
+
+def report_invalid(output_file):
+    # Print how many runs of each language returned a path that is not optimal; returns the total
+    invalid = {}
+    with open(output_file, 'r', newline='') as f:
+        for row in csv.DictReader(f):
+            if row["valid"] != "True":
+                series = row["language"] if row["profile"] == "-" else f"{row['language']} ({row['profile']})"
+                invalid[series] = invalid.get(series, 0) + 1
+    for series, count in invalid.items():
+        print(f"Warning: {count} {series} run(s) did not return the optimal path length (valid=False).")
+    return sum(invalid.values())
+
+
+def export_parquet(output_file, dataset_dir, metadata):
+    # Write the finished results file as a Parquet dataset partitioned by
+    # RESULT_PARTITIONING, converting it batch by batch. The run metadata is
+    # stored in the schema of every file. Partitions this run wrote are
+    # replaced; those of other maps or languages already in dataset_dir are kept
+    schema = pyarrow.schema([(name, pyarrow.type_for_alias(RESULT_TYPES[name])) for name in RESULT_FIELDS],
+                            metadata={key: json.dumps(value) for key, value in metadata.items()})
+    convert_options = pyarrow.csv.ConvertOptions(column_types=schema, true_values=["True"], false_values=["False"])
+    batches = pyarrow.csv.open_csv(output_file, convert_options=convert_options)
+    reader = pyarrow.RecordBatchReader.from_batches(schema, batches)
+    partitioning = pyarrow.dataset.partitioning(
+        pyarrow.schema([schema.field(name) for name in RESULT_PARTITIONING]), flavor="hive")
+    pyarrow.dataset.write_dataset(reader, dataset_dir, format="parquet", partitioning=partitioning,
+                                  existing_data_behavior="delete_matching")
+    print(f"Results saved to {dataset_dir}")
+
+
+def run_metadata(args, profiles):
+    # Where, when and how a run was made, for export_parquet
+    return {
+        "host": platform.node(),
+        "platform": platform.platform(),
+        "python": platform.python_version(),
+        "timestamp": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "profiles": profiles,
+        "mode": args.mode,
+        "changes": args.changes if args.mode == "replan" else None,
+        "change_size": args.change_size if args.mode == "replan" else None,
+        "moves": args.moves,
+        "heuristics": args.heuristics,
+        "map_format": "binary" if args.components else args.map_format,
+        "components": args.components,
+        "warmup": args.warmup,
+        "repeat": args.repeat,
+        "ci_target": args.ci_target,
+        "command": sys.argv,
+    }
 
-    return results
 
 def save_to_csv(results, output_file):
     # Check if results is empty
@@ -202,25 +1596,160 @@ def save_to_csv(results, output_file):
 
 def main():
     parser = argparse.ArgumentParser(description="Run A* benchmarks on different languages.")
-    parser.add_argument("map_file", type=str, help="Path to the .map file.")
-    parser.add_argument("scen_file", type=str, help="Path to the .scen file.")
+    parser.add_argument("map_file", type=str, nargs="?", help="Path to the .map file.")
+    parser.add_argument("scen_file", type=str, nargs="?", help="Path to the .scen file.")
+    parser.add_argument("--scen-glob", type=str, help="Glob of .scen files to run instead of a single scen_file, e.g. 'scenarios/*.scen'.")
+    parser.add_argument("--map-dir", type=str, help="Sweep every .map in this directory instead of a single map.")
+    parser.add_argument("--scen-dir", type=str, help="Where to look for the sweep's .scen files (defaults to --map-dir).")
     parser.add_argument("--output", type=str, default="results.csv", help="Output CSV file.")
+    parser.add_argument("--resume", action="store_true", help="Keep the existing output file and skip runs it already records.")
+    parser.add_argument("--parquet", type=str, metavar="DIR",
+                        help="Also write the results as a Parquet dataset in DIR, partitioned by map, language and "
+                             "heuristic, with the run's metadata in its schema. Needs pyarrow.")
+    parser.add_argument("--mode", choices=["cold", "warm", "async", "replan"], default="cold",
+                        help="cold: launch a fresh process per query; warm: keep one process per language that loads the map once; "
+                             "async: as warm, driven by asyncio with per-query deadlines and restarts of failed runners; "
+                             "replan: replay obstacle changes through the incremental (D* Lite) series.")
+    parser.add_argument("--changes", type=int, default=DEFAULT_CHANGES["changes"],
+                        help="Replan mode: change batches replayed after each query's initial plan.")
+    parser.add_argument("--change-size", type=int, default=DEFAULT_CHANGES["change_size"],
+                        help="Replan mode: cells of the current path each batch blocks (the previous batch's are reopened).")
+    parser.add_argument("--workers", type=int, default=1,
+                        help="Number of parallel workers (async lanes in async mode), each pinned to its own core.")
+    parser.add_argument("--timeout", type=float,
+                        help="Seconds a query may take before its process is killed (cold, warm) or its runner restarted (async, replan).")
+    parser.add_argument("--peak-rss", action="store_true",
+                        help="Cold mode: run every query a second time, untimed and traced, to record its peak memory "
+                             "(Linux only). Without it peak_rss_kb is left empty in cold mode.")
+    parser.add_argument("--seed", type=int, default=0, help="Seed for the randomized run order (and the replan mode change sequences).")
+    parser.add_argument("--no-shuffle", action="store_true", help="Run jobs in scenario order instead of a randomized order.")
+    parser.add_argument("--warmup", type=int, default=0, help="Untimed warmup runs before measuring each configuration.")
+    parser.add_argument("--repeat", type=int, default=1, help="Measured runs per configuration (the maximum when --ci-target is set).")
+    parser.add_argument("--min-repeat", type=int, default=3, help="Measured runs before --ci-target may stop early.")
+    parser.add_argument("--ci-target", type=float,
+                        help="Stop repeating once the 95%% CI of the median time is narrower than this fraction of the median, e.g. 0.05.")
+    parser.add_argument("--profile", action="append", choices=sorted(BUILD_PROFILES),
+                        help=f"Build profile for the compiled languages (default {DEFAULT_PROFILE}). Repeat to benchmark several.")
+    parser.add_argument("--moves", type=int, choices=[4, 8], default=4,
+                        help="4: straight moves only; 8: diagonal moves too, at cost sqrt(2) and without cutting corners.")
+    parser.add_argument("--per-bucket", type=int, metavar="N",
+                        help="Run only the first N scenarios of each bucket (difficulty level) of every .scen file, "
+                             "so a scaling sweep covers every path length without running whole files.")
+    parser.add_argument("--heuristics", type=int, nargs="+", choices=sorted(HEURISTIC_NAMES),
+                        help="Heuristics to run: " + ", ".join(f"{k} {v}" for k, v in HEURISTIC_NAMES.items()) +
+                             ". Default 0 1 with --moves 4 and 0 2 with --moves 8.")
+    parser.add_argument("--strict", action="store_true", help="Exit with status 1 if any run returned a wrong path length.")
+    parser.add_argument("--map-format", choices=["text", "binary"], default="text",
+                        help="binary: convert each map once to a cached .grid file that the implementations load without parsing.")
+    parser.add_argument("--components", action="store_true",
+                        help="Build a connected-component index per map so queries with no path are answered without "
+                             "searching. Implies --map-format binary.")
+    parser.add_argument("--languages", nargs="+", choices=list(LANGUAGES), metavar="LANGUAGE",
+                        help="Series to benchmark (default: every one that builds here): " + ", ".join(LANGUAGES) + ".")
+    parser.add_argument("--rebuild", action="store_true", help="Recompile even if the build cache is up to date.")
     args = parser.parse_args()
+    profiles = args.profile or [DEFAULT_PROFILE]
+    if args.parquet and pyarrow is None:
+        parser.error("--parquet needs pyarrow (pip install pyarrow)")
+    if args.peak_rss and args.mode != "cold":
+        parser.error("--peak-rss only applies to cold mode; the other modes read their runners' peak memory")
+    trials = {"warmup": args.warmup, "repeat": max(1, args.repeat), "min_repeat": args.min_repeat, "ci_target": args.ci_target}
+    replan = {"changes": max(0, args.changes), "change_size": max(1, args.change_size)}
+    if args.heuristics is None:
+        args.heuristics = DEFAULT_HEURISTICS[args.moves]
+    elif args.moves == 8 and 1 in args.heuristics:
+        print("Warning: the manhattan heuristic overestimates diagonal moves, so with --moves 8 its paths "
+              "may not be the shortest and such runs can be recorded as invalid.")
 
-    if not os.path.exists(args.map_file):
-        print(f"Error: Map file '{args.map_file}' not found.")
-        return
-    if not os.path.exists(args.scen_file):
-        print(f"Error: Scenario file '{args.scen_file}' not found.")
+    if args.map_dir:
+        scen_dir = args.scen_dir or args.map_dir
+        if not os.path.isdir(args.map_dir) or not os.path.isdir(scen_dir):
+            print(f"Error: Map directory '{args.map_dir}' or scenario directory '{scen_dir}' not found.")
+            return
+        scen_files = find_scen_files(args.scen_glob or os.path.join(scen_dir, "*.scen"))
+        pairs = find_map_scenarios(args.map_dir, scen_files)
+    else:
+        if not args.map_file or not (args.scen_file or args.scen_glob):
+            parser.error("map_file with scen_file or --scen-glob, or --map-dir, is required")
+        if not os.path.exists(args.map_file):
+            print(f"Error: Map file '{args.map_file}' not found.")
+            return
+        scen_files = find_scen_files(args.scen_glob) if args.scen_glob else [args.scen_file]
+        missing = [scen_file for scen_file in scen_files if not os.path.exists(scen_file)]
+        if not scen_files or missing:
+            print(f"Error: Scenario file(s) not found: {missing or args.scen_glob}")
+            return
+        pairs = [(args.map_file, scen_files)]
+
+    # Each mode only runs its own series, so only those are built by default
+    languages = args.languages or [name for name, language in LANGUAGES.items()
+                                   if language.replan == (args.mode == "replan")]
+    print("Compiling executables...")
+    builds = []
+    for profile in profiles:
+        executables = compile_executables(profile, args.rebuild, languages)
+        if builds:
+            # Interpreted languages are the same under every profile; run them once
+            executables = {lang: exe for lang, exe in executables.items() if profile_label(lang, profile) != "-"}
+        builds.append((profile, executables))
+
+    load_files = {}
+    if args.map_format == "binary" or args.components:
+        print("Converting maps...")
+        for map_file, _ in pairs:
+            load_files[map_file] = binary_map(map_file, args.rebuild)
+            converted = load_files[map_file] != map_file
+            comp_file = a_star.components_file(load_files[map_file])
+            if args.components:
+                # The index sits next to the .grid file, so only maps that converted can use it
+                if not converted or not component_index(map_file, args.rebuild):
+                    print(f"Warning: no component index for {map_file}.")
+            elif converted and os.path.exists(comp_file):
+                # The implementations use any index next to the map they load, so
+                # drop one left behind by an earlier --components run
+                os.remove(comp_file)
+
+    # Offline steps of the series that need one, e.g. the distance oracles
+    precomputes = {LANGUAGES[lang].precompute for _, executables in builds for lang in executables} - {None}
+    if precomputes:
+        print("Precomputing...")
+        for map_file, _ in pairs:
+            for precompute in precomputes:
+                if not precompute(map_file, args.moves, args.rebuild):
+                    print(f"Warning: precompute step failed for {map_file}.")
+
+    try:
+        writer = ResultWriter(args.output, args.resume)
+    except ValueError as e:
+        print(f"Error: {e}")
         return
 
-    print("Loading map and scenarios...")
-    results = benchmark_languages(args.map_file, args.scen_file)
+    seed = None if args.no_shuffle else args.seed
+    try:
+        for profile, executables in builds:
+            for map_file, scen_files in pairs:
+                print(f"Benchmarking {map_file} with {len(scen_files)} scenario file(s), profile {profile}...")
+                for rows in benchmark_languages(map_file, scen_files, executables, args.mode, args.workers, seed,
+                                               writer.done, trials, profile, args.heuristics, args.moves,
+                                               load_files.get(map_file), args.timeout, args.per_bucket, replan,
+                                               args.peak_rss):
+                    writer.write(rows)
+    finally:
+        writer.close()
 
-    print(results)
-    print(f"Saving results to {args.output}...")
-    save_to_csv(results, args.output)
+    print(f"Sorting results in {args.output}...")
+    sort_results_file(args.output, {lang: idx for idx, lang in enumerate(builds[0][1])})
+    if trials["repeat"] > 1:
+        summary_file = os.path.splitext(args.output)[0] + "_summary.csv"
+        print(f"Writing per-configuration statistics to {summary_file}...")
+        summarize_results(args.output, summary_file)
+    if args.parquet:
+        print(f"Writing the Parquet dataset {args.parquet}...")
+        export_parquet(args.output, args.parquet, run_metadata(args, profiles))
+    invalid = report_invalid(args.output)
     print("Benchmarking complete!")
+    if args.strict and invalid:
+        sys.exit(1)
 
 
 if __name__ == "__main__":
@@ -0,0 +1,113 @@
+# Shared fixtures for the tests. The implementations, the harness and the
+# analysis script are scripts rather than an installed package, so they are
+# imported from where they live
+import math
+import os
+import random
+import sys
+
+import pytest
+
+TESTS_DIR = os.path.dirname(os.path.abspath(__file__))
+DATA_GATHERING_DIR = os.path.dirname(TESTS_DIR)
+sys.path.insert(0, os.path.join(DATA_GATHERING_DIR, "language_implementations"))
+sys.path.insert(0, DATA_GATHERING_DIR)
+sys.path.insert(0, os.path.dirname(DATA_GATHERING_DIR))
+
+import a_star
+import run_tests
+
+# The series that answer plain queries over the harness's protocol
+SERIES = ["Python", "Python-NumPy", "Python-JPS", "Python-Bidir", "Python-ctypes", "C++", "C++-JPS", "C++-Bidir",
+          "Rust", "Rust-JPS", "Rust-Bidir", "JavaScript", "Java"]
+
+
+# A rows x cols grid with about density of its cells blocked, the same for
+# the same seed
+def random_grid(rows, cols, density, seed):
+    rng = random.Random(seed)
+    return [[0 if rng.random() < density else 1 for _ in range(cols)] for _ in range(rows)]
+
+
+# Grids that exercise the searches differently: open ground, scattered
+# obstacles, and a wall that splits the map into two components
+def sample_grids():
+    walled = random_grid(24, 30, 0.1, 3)
+    for row in walled:
+        row[14] = 0
+    return {
+        "open": [[1] * 20 for _ in range(16)],
+        "random": random_grid(32, 32, 0.25, 1),
+        "walled": walled,
+    }
+
+
+@pytest.fixture(params=sorted(sample_grids()))
+def grid(request):
+    return sample_grids()[request.param]
+
+
+# Random (start, goal) pairs of passable cells, plus one that starts on a
+# blocked cell when the grid has one
+def random_queries(grid, count, seed):
+    rng = random.Random(seed)
+    free = [(row, col) for row in range(len(grid)) for col in range(len(grid[0])) if grid[row][col]]
+    queries = [(rng.choice(free), rng.choice(free)) for _ in range(count)]
+    blocked = [(row, col) for row in range(len(grid)) for col in range(len(grid[0])) if not grid[row][col]]
+    if blocked:
+        queries.append((blocked[0], free[0]))
+    return queries
+
+
+# The optimal cost of every query by Dijkstra, -1 where there is no path
+def reference_costs(grid, queries, moves):
+    cols = len(grid[0])
+    distances = {}
+    costs = []
+    for src, dest in queries:
+        if not (grid[src[0]][src[1]] and grid[dest[0]][dest[1]]):
+            costs.append(-1.0)
+            continue
+        if src not in distances:
+            distances[src] = a_star.grid_distances(grid, src[0] * cols + src[1], moves)
+        cost = distances[src][dest[0] * cols + dest[1]]
+        costs.append(-1.0 if math.isinf(cost) else cost)
+    return costs
+
+
+# Write a grid as a Moving-AI .map file
+def write_map(grid, filename):
+    with open(filename, "w") as f:
+        f.write(f"type octile\nheight {len(grid)}\nwidth {len(grid[0])}\nmap\n")
+        for row in grid:
+            f.write("".join("." if cell else "@" for cell in row) + "\n")
+
+
+# Every series that builds here, by name. The harness builds and runs
+# everything relative to data_gathering
+@pytest.fixture(scope="session")
+def executables():
+    cwd = os.getcwd()
+    os.chdir(DATA_GATHERING_DIR)
+    try:
+        yield run_tests.compile_executables()
+    finally:
+        os.chdir(cwd)
+
+
+# A runner for a series on map_file, or a skip if the series does not build here
+def start_series(lang, executables, map_file):
+    if lang not in executables:
+        pytest.skip(f"{lang} does not build here")
+    kind = run_tests.InProcessRunner if run_tests.LANGUAGES[lang].in_process else run_tests.PersistentRunner
+    return kind(executables[lang], lang, map_file)
+
+
+# Point the harness's build cache and map cache at a temporary directory, so
+# the cached conversions it writes in a test are its own
+@pytest.fixture
+def map_cache(tmp_path, monkeypatch):
+    monkeypatch.setattr(run_tests, "BUILD_DIR", str(tmp_path))
+    monkeypatch.setattr(run_tests, "BUILD_CACHE", str(tmp_path / "cache.json"))
+    monkeypatch.setattr(run_tests, "MAP_CACHE_DIR", str(tmp_path / "maps"))
+    return run_tests.MAP_CACHE_DIR
@@ -0,0 +1,115 @@
+# D* Lite must keep its plan optimal as cells change: after the first plan
+# and after every repair its cost is the one Dijkstra finds on the map as it
+# is at that point
+import os
+import random
+
+import pytest
+
+import a_star
+import run_tests
+from conftest import DATA_GATHERING_DIR, random_queries, reference_costs
+
+MOVES = sorted(run_tests.CONSISTENT_HEURISTICS)
+
+
+# A session: a query and a sequence of cell changes, each a few cells blocked
+# or freed at random, never the start or the goal
+def change_sequence(grid, src, dest, steps, seed):
+    rng = random.Random(seed)
+    rows, cols = len(grid), len(grid[0])
+    sequence = []
+    for _ in range(steps):
+        changes = []
+        while len(changes) < 3:
+            cell = (rng.randrange(rows), rng.randrange(cols))
+            if cell not in (src, dest):
+                changes.append((cell[0], cell[1], rng.random() < 0.4))
+        sequence.append(changes)
+    return sequence
+
+
+def apply_changes(grid, changes):
+    for row, col, passable in changes:
+        grid[row][col] = 1 if passable else 0
+
+
+# The expected cost of each answer of a session: after the plan, then after each change
+def session_costs(grid, src, dest, sequence, moves):
+    grid = [list(row) for row in grid]
+    costs = reference_costs(grid, [(src, dest)], moves)
+    for changes in sequence:
+        apply_changes(grid, changes)
+        costs += reference_costs(grid, [(src, dest)], moves)
+    return costs
+
+
+@pytest.mark.parametrize("moves", MOVES)
+def test_replanning_matches_dijkstra(grid, moves):
+    for number, (src, dest) in enumerate(random_queries(grid, 6, seed=moves)[:6]):
+        sequence = change_sequence(grid, src, dest, 8, seed=number)
+        for heuristic in sorted(run_tests.CONSISTENT_HEURISTICS[moves]):
+            planner = a_star.DStarLite(grid, src, dest, heuristic, moves)
+            costs = []
+            stats = {}
+            planner.plan(stats)
+            costs.append(stats["path_cost"])
+            for changes in sequence:
+                planner.update_cells(changes)
+                planner.plan(stats)
+                costs.append(stats["path_cost"])
+            assert costs == pytest.approx(session_costs(grid, src, dest, sequence, moves), abs=1e-6)
+
+
+# Manhattan overestimates diagonal moves, so with moves 8 the g values need
+# not lead to the goal; the path walk must still end
+def test_inconsistent_heuristic_terminates(grid):
+    for src, dest in random_queries(grid, 10, seed=2):
+        planner = a_star.DStarLite(grid, src, dest, 1, 8)
+        length = planner.plan()
+        assert length == -1 or length >= 1
+
+
+@pytest.mark.parametrize("lang", ["Python-DStarLite", "Rust-DStarLite"])
+def test_replan_series_match_dijkstra(lang, executables, monkeypatch):
+    if lang not in executables:
+        pytest.skip(f"{lang} does not build here")
+    monkeypatch.chdir(DATA_GATHERING_DIR)
+    map_file = os.path.join("maps", "random-64-64-20.map")
+    grid = a_star.load_map(map_file)
+    runner = run_tests.ReplanRunner(executables[lang], lang, map_file, timeout=60)
+    try:
+        for moves in MOVES:
+            for number, (src, dest) in enumerate(random_queries(grid, 4, seed=moves)[:4]):
+                sequence = change_sequence(grid, src, dest, 5, seed=number)
+                expected = session_costs(grid, src, dest, sequence, moves)
+                for heuristic in sorted(run_tests.LANGUAGES[lang].heuristics[moves]):
+                    costs = [runner.plan(src, dest, heuristic, moves)["path_cost"]]
+                    costs += [runner.update(changes)["path_cost"] for changes in sequence]
+                    assert costs == pytest.approx(expected, abs=1e-6)
+    finally:
+        runner.close()
+
+
+# A line the planner cannot apply gets the no-path answer and the session
+# goes on with the same planner: an update before any plan, a field that is
+# not an integer, or another verb. A plan with a cell off the map also gets
+# it, and leaves no planner to update
+@pytest.mark.parametrize("lang", ["Python-DStarLite", "Rust-DStarLite"])
+def test_replan_series_answer_bad_lines(lang, executables, monkeypatch):
+    if lang not in executables:
+        pytest.skip(f"{lang} does not build here")
+    monkeypatch.chdir(DATA_GATHERING_DIR)
+    map_file = os.path.join("maps", "random-64-64-20.map")
+    grid = a_star.load_map(map_file)
+    (src, dest), = random_queries(grid, 1, seed=24)[:1]
+    plan = f"plan {src[0]} {src[1]} {dest[0]} {dest[1]} 0 8"
+    expected = reference_costs(grid, [(src, dest)], 8)[0]
+    lines = ["update 1 1 0", plan, "update x 1 0", "replan 1 2", "update -5 -5 0",
+             f"plan -1 {src[1]} {dest[0]} {dest[1]} 0 8", "update 1 1 1", "plan 1 1", plan]
+    runner = run_tests.ReplanRunner(executables[lang], lang, map_file, timeout=60)
+    try:
+        costs = [runner.request(line)["path_cost"] for line in lines]
+    finally:
+        runner.close()
+    assert costs == pytest.approx([-1, expected, -1, -1, expected, -1, -1, -1, expected], abs=1e-6)
@@ -0,0 +1,99 @@
+# Both kinds of distance oracle must answer every query with the cost
+# Dijkstra finds, and with the length of a shortest path
+import os
+
+import pytest
+
+import a_star
+import distance_oracle
+import run_tests
+from conftest import DATA_GATHERING_DIR, random_queries, reference_costs, sample_grids, start_series, write_map
+
+KINDS = ["table", "hubs"]
+
+
+def build(grid, tmp_path, moves, kind):
+    filename = distance_oracle.oracle_file(str(tmp_path / "test.map"), moves)
+    distance_oracle.build_oracle(grid, filename, moves, kind)
+    return distance_oracle.DistanceOracle(filename)
+
+
+@pytest.mark.parametrize("kind", KINDS)
+@pytest.mark.parametrize("moves", [4, 8])
+def test_lookups_match_dijkstra(grid, tmp_path, kind, moves):
+    oracle = build(grid, tmp_path, moves, kind)
+    assert oracle.table == (kind == "table")
+    queries = random_queries(grid, 60, seed=25)
+    lookups = [oracle.lookup(src, dest) for src, dest in queries]
+    assert [cost for _, cost in lookups] == pytest.approx(reference_costs(grid, queries, moves), abs=1e-6)
+
+    # Every shortest path has the same number of cells, so the oracle's
+    # length is the one A* reports
+    for (src, dest), (length, _) in zip(queries, lookups):
+        assert length == a_star.aStarSearch(grid, src, dest, 0, moves=moves)
+
+
+@pytest.mark.parametrize("kind", KINDS)
+def test_lookup_edge_cases(grid, tmp_path, kind):
+    oracle = build(grid, tmp_path, 8, kind)
+    free = next((row, col) for row in range(len(grid)) for col in range(len(grid[0])) if grid[row][col])
+    assert oracle.lookup(free, free) == (1, 0)
+    assert oracle.lookup((-1, 0), free) == (-1, -1)
+    assert oracle.lookup(free, (len(grid), 0)) == (-1, -1)
+
+    stats = {}
+    assert oracle.search(free, free, 3, stats, 8) == 1
+    assert stats == {"expanded": 0, "pushed": 0, "path_cost": 0}
+    with pytest.raises(ValueError):
+        oracle.search(free, free, 0, stats, 4)
+
+
+def test_oracle_file_errors(grid, tmp_path):
+    oracle = build(grid, tmp_path, 4, "table")
+    truncated = tmp_path / "truncated.oracle"
+    truncated.write_bytes(open(oracle.filename, "rb").read()[:-2])
+    with pytest.raises(ValueError):
+        distance_oracle.DistanceOracle(str(truncated))
+    other = tmp_path / "other.oracle"
+    other.write_bytes(b"GRID" + bytes(40))
+    with pytest.raises(ValueError):
+        distance_oracle.DistanceOracle(str(other))
+    with pytest.raises(ValueError):
+        distance_oracle.build_oracle(grid, str(tmp_path / "x.oracle"), 4, "tree")
+
+
+def test_oracle_search_picks_the_movement_model(grid, tmp_path):
+    map_file = str(tmp_path / "test.map")
+    with pytest.raises(FileNotFoundError):
+        distance_oracle.oracle_search(map_file)
+    for moves in (4, 8):
+        distance_oracle.build_oracle(grid, distance_oracle.oracle_file(map_file, moves), moves)
+    search = distance_oracle.oracle_search(map_file)
+    queries = random_queries(grid, 20, seed=26)
+    for moves in (4, 8):
+        costs = []
+        for src, dest in queries:
+            stats = {}
+            search(src, dest, 0, stats, moves)
+            costs.append(stats["path_cost"])
+        assert costs == pytest.approx(reference_costs(grid, queries, moves), abs=1e-6)
+
+
+# The harness precomputes the oracle into its map cache, and the
+# Python-Oracle series answers from it over the query protocol
+def test_oracle_series_match_dijkstra(executables, tmp_path, map_cache, monkeypatch):
+    monkeypatch.chdir(DATA_GATHERING_DIR)
+    grid = sample_grids()["walled"]
+    map_file = str(tmp_path / "test.map")
+    write_map(grid, map_file)
+    queries = random_queries(grid, 30, seed=27)
+    for moves in (4, 8):
+        assert run_tests.oracle_index(map_file, moves)
+        assert os.path.exists(distance_oracle.oracle_file(map_file, moves, map_cache))
+    runner = start_series("Python-Oracle", executables, map_file)
+    try:
+        for moves in (4, 8):
+            costs = [runner.query(src, dest, 0, moves)["path_cost"] for src, dest in queries]
+            assert costs == pytest.approx(reference_costs(grid, queries, moves), abs=1e-6)
+    finally:
+        runner.close()
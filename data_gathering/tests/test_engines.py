@@ -0,0 +1,146 @@
+# Every search engine must return the optimal cost that Dijkstra finds, with
+# each heuristic that is consistent for the movement model
+import os
+
+import pytest
+
+import a_star
+import run_tests
+from conftest import DATA_GATHERING_DIR, SERIES, random_queries, reference_costs, start_series
+
+ENGINES = ["classic", "numpy", "jps", "bidir"]
+MOVES = sorted(run_tests.CONSISTENT_HEURISTICS)
+
+
+def assert_costs(costs, expected):
+    assert costs == pytest.approx(expected, abs=1e-6)
+
+
+@pytest.mark.parametrize("engine", ENGINES)
+@pytest.mark.parametrize("moves", MOVES)
+def test_engine_matches_dijkstra(grid, engine, moves):
+    queries = random_queries(grid, 40, seed=moves)
+    expected = reference_costs(grid, queries, moves)
+    search = a_star.make_search(grid, engine)
+    for heuristic in sorted(run_tests.CONSISTENT_HEURISTICS[moves]):
+        costs = []
+        for src, dest in queries:
+            stats = {}
+            length = search(src, dest, heuristic, stats, moves)
+            assert (length == -1) == (stats["path_cost"] == -1)
+            costs.append(stats["path_cost"])
+        assert_costs(costs, expected)
+
+
+# The landmark heuristic is consistent for both movement models
+@pytest.mark.parametrize("engine", ENGINES)
+def test_landmark_heuristic_is_optimal(grid, engine):
+    queries = random_queries(grid, 20, seed=4)
+    for moves in MOVES:
+        search = a_star.make_search(grid, engine)
+        costs = []
+        for src, dest in queries:
+            stats = {}
+            search(src, dest, a_star.LANDMARK_HEURISTIC, stats, moves)
+            costs.append(stats["path_cost"])
+        assert_costs(costs, reference_costs(grid, queries, moves))
+
+
+# With a component index, queries across components are answered without a
+# search and the others are unchanged
+@pytest.mark.parametrize("engine", ENGINES)
+def test_components_keep_costs(grid, engine):
+    queries = random_queries(grid, 30, seed=7)
+    components = a_star.component_labels(grid)
+    search = a_star.make_search(grid, engine, components)
+    for moves in MOVES:
+        costs = []
+        for src, dest in queries:
+            stats = {}
+            search(src, dest, 0, stats, moves)
+            costs.append(stats["path_cost"])
+        assert_costs(costs, reference_costs(grid, queries, moves))
+
+
+@pytest.mark.parametrize("share_source", [False, True])
+def test_solve_many_matches_dijkstra(grid, share_source):
+    queries = random_queries(grid, 30, seed=11)
+    # Several goals per source, for the shared search trees
+    queries += [(queries[0][0], dest) for _, dest in queries[1:6]]
+    for moves in MOVES:
+        results = a_star.solve_many(grid, [(src, dest, 0) for src, dest in queries], moves, share_source)
+        assert_costs([result.path_cost for result in results], reference_costs(grid, queries, moves))
+
+
+# The compiled and scripted series answer the harness's query protocol with
+# the same costs
+@pytest.mark.parametrize("lang", SERIES)
+def test_series_match_dijkstra(lang, executables, monkeypatch):
+    monkeypatch.chdir(DATA_GATHERING_DIR)
+    map_file = os.path.join("maps", "random-64-64-20.map")
+    grid = a_star.load_map(map_file)
+    queries = random_queries(grid, 25, seed=5)
+    runner = start_series(lang, executables, map_file)
+    try:
+        for moves in MOVES:
+            expected = reference_costs(grid, queries, moves)
+            heuristics = run_tests.CONSISTENT_HEURISTICS[moves] & run_tests.LANGUAGES[lang].heuristics[moves]
+            for heuristic in sorted(heuristics):
+                costs = [runner.query(src, dest, heuristic, moves)["path_cost"] for src, dest in queries]
+                assert_costs(costs, expected)
+    finally:
+        runner.close()
+
+
+# A query off the map has no path: every series answers it with the no-path
+# line and keeps serving
+@pytest.mark.parametrize("lang", SERIES)
+def test_series_answer_off_map_queries(lang, executables, monkeypatch):
+    monkeypatch.chdir(DATA_GATHERING_DIR)
+    map_file = os.path.join("maps", "random-64-64-20.map")
+    grid = a_star.load_map(map_file)
+    (src, dest), = random_queries(grid, 1, seed=12)[:1]
+    runner = start_series(lang, executables, map_file)
+    try:
+        for off_map in ((-1, 2), (2, -1), (len(grid), 0), (0, len(grid[0]))):
+            for query in ((off_map, dest), (src, off_map)):
+                result = runner.query(*query, 0, 8)
+                assert (result["path_length"], result["path_cost"]) == (-1, -1)
+        result = runner.query(src, dest, 0, 8)
+        assert result["path_cost"] == pytest.approx(reference_costs(grid, [(src, dest)], 8)[0], abs=1e-6)
+    finally:
+        runner.close()
+
+
+# So does a line that is not a query: a field that is not an integer, or too
+# few fields
+@pytest.mark.parametrize("lang", SERIES)
+def test_series_answer_malformed_queries(lang, executables, monkeypatch):
+    if run_tests.LANGUAGES[lang].in_process:
+        pytest.skip(f"{lang} is called in-process rather than sent query lines")
+    monkeypatch.chdir(DATA_GATHERING_DIR)
+    map_file = os.path.join("maps", "random-64-64-20.map")
+    grid = a_star.load_map(map_file)
+    (src, dest), = random_queries(grid, 1, seed=1)[:1]
+    runner = start_series(lang, executables, map_file)
+    try:
+        for line in ("x 1 2 3 0", "1 1", f"{src[0]} {src[1]} {dest[0]} {dest[1]} 0 z"):
+            result = runner.request(line)
+            assert (result["path_length"], result["path_cost"]) == (-1, -1)
+        result = runner.query(src, dest, 0, 8)
+        assert result["path_cost"] == pytest.approx(reference_costs(grid, [(src, dest)], 8)[0], abs=1e-6)
+    finally:
+        runner.close()
+
+
+# In cold mode the query is the command line of a fresh process, which must
+# answer an off-map one the same way
+@pytest.mark.parametrize("lang", SERIES)
+def test_series_answer_off_map_queries_cold(lang, executables, monkeypatch):
+    if lang not in executables:
+        pytest.skip(f"{lang} does not build here")
+    monkeypatch.chdir(DATA_GATHERING_DIR)
+    map_file = os.path.join("maps", "random-64-64-20.map")
+    (_, dest), = random_queries(a_star.load_map(map_file), 1, seed=12)[:1]
+    result = run_tests.run_astar_executable(executables[lang], lang, map_file, (-1, 2), dest, 0, 8)
+    assert (result["path_length"], result["path_cost"]) == (-1, -1)
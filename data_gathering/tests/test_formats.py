@@ -0,0 +1,151 @@
+# The map formats written by the harness must read back as the grid they
+# were written from, in Python and in every implementation
+import os
+
+import numpy as np
+import pytest
+
+import a_star
+import a_star_native
+import run_tests
+from conftest import DATA_GATHERING_DIR, SERIES, random_queries, reference_costs, sample_grids, start_series, write_map
+
+
+def test_text_map_round_trip(grid, tmp_path):
+    map_file = str(tmp_path / "test.map")
+    write_map(grid, map_file)
+    assert a_star.load_map(map_file) == grid
+
+
+def test_text_map_errors(tmp_path):
+    no_size = tmp_path / "no_size.map"
+    no_size.write_text("type octile\nmap\n...\n")
+    with pytest.raises(ValueError):
+        a_star.load_map(str(no_size))
+    short_row = tmp_path / "short_row.map"
+    short_row.write_text("type octile\nheight 2\nwidth 3\nmap\n...\n..\n")
+    with pytest.raises(ValueError):
+        a_star.load_map(str(short_row))
+
+
+def test_grid_file_round_trip(grid, tmp_path):
+    grid_file = str(tmp_path / "test.grid")
+    a_star.write_binary_map(grid, grid_file)
+    with open(grid_file, "rb") as f:
+        magic, height, width = a_star.GRID_HEADER.unpack(f.read(a_star.GRID_HEADER.size))
+        cells = f.read()
+    assert (magic, height, width) == (a_star.GRID_MAGIC, len(grid), len(grid[0]))
+    assert len(cells) == height * width
+
+    # load_map recognises the magic; the rows are views of the mapped file
+    assert [list(row) for row in a_star.load_map(grid_file)] == grid
+    assert run_tests.load_map(grid_file) == a_star.load_map(grid_file)
+    assert np.array_equal(a_star_native.load_grid(grid_file), np.array(grid, dtype=np.uint8))
+
+
+def test_truncated_grid_file(grid, tmp_path):
+    grid_file = tmp_path / "test.grid"
+    a_star.write_binary_map(grid, str(grid_file))
+    grid_file.write_bytes(grid_file.read_bytes()[:-1])
+    with pytest.raises(ValueError):
+        a_star.load_binary_map(str(grid_file))
+    grid_file.write_bytes(grid_file.read_bytes()[:a_star.GRID_HEADER.size - 1])
+    for load in (a_star.load_binary_map, a_star_native.load_grid):
+        with pytest.raises(ValueError):
+            load(str(grid_file))
+
+
+# A file cut short inside its header has no size to check the cells against:
+# every series must refuse it rather than read a header past the end
+@pytest.mark.parametrize("lang", SERIES)
+def test_series_refuse_truncated_grid_header(lang, executables, tmp_path, monkeypatch):
+    monkeypatch.chdir(DATA_GATHERING_DIR)
+    grid_file = tmp_path / "test.grid"
+    a_star.write_binary_map(sample_grids()["open"], str(grid_file))
+    header = grid_file.read_bytes()[:a_star.GRID_HEADER.size]
+    for size in (4, 8, a_star.GRID_HEADER.size - 1):
+        grid_file.write_bytes(header[:size])
+        with pytest.raises((ValueError, RuntimeError, OSError)):
+            start_series(lang, executables, str(grid_file)).close()
+
+def test_binary_map_conversion(grid, tmp_path, map_cache):
+    map_file = str(tmp_path / "test.map")
+    write_map(grid, map_file)
+    grid_file = run_tests.binary_map(map_file)
+    assert grid_file == os.path.join(map_cache, "test.grid")
+    assert [list(row) for row in a_star.load_map(grid_file)] == grid
+
+
+# Every series answers the same on a map's .grid copy as on the text map
+@pytest.mark.parametrize("lang", SERIES)
+def test_series_read_grid_files(lang, executables, tmp_path, monkeypatch):
+    monkeypatch.chdir(DATA_GATHERING_DIR)
+    map_file = os.path.join("maps", "random-64-64-20.map")
+    grid = a_star.load_map(map_file)
+    grid_file = str(tmp_path / "test.grid")
+    a_star.write_binary_map(grid, grid_file)
+    queries = random_queries(grid, 20, seed=14)
+    answers = []
+    for load_file in (map_file, grid_file):
+        runner = start_series(lang, executables, load_file)
+        try:
+            answers.append([(result["path_length"], result["path_cost"])
+                            for result in (runner.query(src, dest, 0, 8) for src, dest in queries)])
+        finally:
+            runner.close()
+    assert answers[0] == answers[1]
+
+
+# Two cells share a component label exactly when there is a path between
+# them, for either movement model
+def test_component_labels_match_reachability(grid):
+    labels = a_star.component_labels(grid)
+    cols = len(grid[0])
+    for src, dest in random_queries(grid, 40, seed=15):
+        if not (grid[src[0]][src[1]] and grid[dest[0]][dest[1]]):
+            assert not labels[src[0] * cols + src[1]] or not labels[dest[0] * cols + dest[1]]
+            continue
+        for moves in (4, 8):
+            reachable = a_star.grid_distances(grid, src[0] * cols + src[1], moves)[dest[0] * cols + dest[1]] < np.inf
+            assert a_star.same_component(labels, cols, src, dest) == reachable
+
+
+def test_components_file_round_trip(grid, tmp_path):
+    grid_file = str(tmp_path / "test.grid")
+    comp_file = a_star.components_file(grid_file)
+    assert comp_file == str(tmp_path / "test.comp")
+    a_star.write_components(grid, comp_file)
+    assert list(a_star.load_components(comp_file, grid)) == a_star.component_labels(grid)
+    assert a_star.find_components(grid_file, grid) is not None
+    assert np.array_equal(a_star_native.load_components(grid_file, (len(grid), len(grid[0]))).ravel(),
+                          a_star.component_labels(grid))
+
+    # An index for a map of another size is refused
+    other = [row + [1] for row in grid]
+    with pytest.raises(ValueError):
+        a_star.load_components(comp_file, other)
+    with pytest.raises(ValueError):
+        a_star_native.load_components(grid_file, (len(other), len(other[0])))
+
+
+# With an index next to the map, every series answers a query across
+# components with -1 and nothing expanded, and the others as before
+@pytest.mark.parametrize("lang", SERIES)
+def test_series_use_component_index(lang, executables, tmp_path, monkeypatch):
+    monkeypatch.chdir(DATA_GATHERING_DIR)
+    grid = sample_grids()["walled"]
+    grid_file = str(tmp_path / "walled.grid")
+    a_star.write_binary_map(grid, grid_file)
+    a_star.write_components(grid, a_star.components_file(grid_file))
+    left = next((row, 0) for row in range(len(grid)) if grid[row][0])
+    right = next((row, len(grid[0]) - 1) for row in range(len(grid)) if grid[row][-1])
+    queries = random_queries(grid, 20, seed=16)
+    runner = start_series(lang, executables, grid_file)
+    try:
+        for moves in (4, 8):
+            result = runner.query(left, right, 0, moves)
+            assert (result["path_length"], result["path_cost"], result["expanded"]) == (-1, -1, 0)
+            costs = [runner.query(src, dest, 0, moves)["path_cost"] for src, dest in queries]
+            assert costs == pytest.approx(reference_costs(grid, queries, moves), abs=1e-6)
+    finally:
+        runner.close()
@@ -0,0 +1,150 @@
+# How the harness runs a series in each mode, and records and resumes its results
+import asyncio
+import csv
+import os
+import sys
+
+import pytest
+
+import a_star
+import run_tests
+from conftest import DATA_GATHERING_DIR, random_queries, reference_costs
+
+
+# The in-process series is called in the harness in warm mode, but in cold
+# mode every query starts a fresh interpreter, as the other series do
+def test_ctypes_series_runs_cold_in_a_fresh_process(executables, monkeypatch):
+    if "Python-ctypes" not in executables:
+        pytest.skip("Python-ctypes does not build here")
+    monkeypatch.chdir(DATA_GATHERING_DIR)
+    map_file = os.path.join("maps", "random-64-64-20.map")
+    grid = a_star.load_map(map_file)
+    (src, dest), = random_queries(grid, 1, seed=13)[:1]
+    expected = reference_costs(grid, [(src, dest)], 8)[0]
+    selected = {"Python-ctypes": executables["Python-ctypes"]}
+
+    warm = run_tests.BenchmarkWorker(selected, map_file, "warm")
+    cold = run_tests.BenchmarkWorker(selected, map_file, "cold")
+    try:
+        assert isinstance(warm.runners["Python-ctypes"], run_tests.InProcessRunner)
+        assert not cold.runners
+        warm_result = warm.measure("Python-ctypes", src, dest, 0, 8)
+        cold_result = cold.measure("Python-ctypes", src, dest, 0, 8)
+    finally:
+        warm.close()
+        cold.close()
+    assert warm_result["path_cost"] == pytest.approx(expected, abs=1e-6)
+    assert cold_result["path_cost"] == pytest.approx(expected, abs=1e-6)
+    # Starting the interpreter is part of every cold query
+    assert cold_result["startup_time"] > 10 * warm_result["search_time"]
+
+
+# Cold runs are timed untraced, so their peak memory is only measured, in an
+# untimed rerun, when asked for; it is the child's own and not the harness's
+def test_cold_peak_rss_is_opt_in(executables, monkeypatch):
+    if "C++" not in executables:
+        pytest.skip("C++ does not build here")
+    if run_tests.PTRACE is None:
+        pytest.skip("ptrace is not available here")
+    monkeypatch.chdir(DATA_GATHERING_DIR)
+    map_file = os.path.join("maps", "random-64-64-20.map")
+    (src, dest), = random_queries(a_star.load_map(map_file), 1, seed=6)[:1]
+    plain = run_tests.run_astar_executable(executables["C++"], "C++", map_file, src, dest, 0, 8)
+    traced = run_tests.run_astar_executable(executables["C++"], "C++", map_file, src, dest, 0, 8, peak_rss=True)
+    assert plain["peak_rss_kb"] == ""
+    assert 0 < traced["peak_rss_kb"] < run_tests.vm_hwm_kb(os.getpid())
+    assert traced["path_cost"] == plain["path_cost"]
+
+
+# The rows of one configuration's repetitions, as benchmark_languages yields them
+def configuration_rows(instance_num, reps=2):
+    rows = []
+    for rep in range(reps):
+        row = {field: 0 for field in run_tests.RESULT_FIELDS}
+        row.update({"language": "C++", "profile": "O2", "map": "test.map", "scen_file": "test.scen",
+                    "instance_num": instance_num, "heuristic": 0, "moves": 8, "rep": rep, "time": 0.5 + rep})
+        rows.append(row)
+    return rows
+
+
+def read_results(results_file):
+    with open(results_file, newline="") as f:
+        return list(csv.DictReader(f))
+
+
+# A sweep that died mid-write leaves a partial last row: resuming drops it,
+# skips the configurations the file completes, and appends the rest after them
+def test_result_writer_resumes(tmp_path):
+    results_file = str(tmp_path / "results.csv")
+    writer = run_tests.ResultWriter(results_file)
+    for instance_num in (1, 2):
+        writer.write(configuration_rows(instance_num))
+    writer.close()
+    complete = read_results(results_file)
+    with open(results_file, "a", newline="") as f:
+        line = ",".join(str(value) for value in configuration_rows(3)[0].values())
+        f.write(line[:len(line) // 2])
+
+    writer = run_tests.ResultWriter(results_file, resume=True)
+    assert writer.done == {run_tests.result_key(row) for row in complete}
+    assert {key[2] for key in writer.done} == {1, 2}
+    assert read_results(results_file) == complete
+    writer.write(configuration_rows(3))
+    writer.close()
+    rows = read_results(results_file)
+    assert rows[:len(complete)] == complete
+    assert [(int(row["instance_num"]), int(row["rep"])) for row in rows] == [(1, 0), (1, 1), (2, 0), (2, 1), (3, 0), (3, 1)]
+
+    # Without resume the file starts again, and a file of other columns cannot be resumed
+    run_tests.ResultWriter(results_file).close()
+    writer = run_tests.ResultWriter(results_file, resume=True)
+    writer.close()
+    assert not writer.done
+    with open(results_file, "w") as f:
+        f.write("time,language\n0.5,C++\n")
+    with pytest.raises(ValueError):
+        run_tests.ResultWriter(results_file, resume=True)
+
+
+# A --serve runner that notes each start in a file and answers every query
+# with a one-step path, or with "hang" never answers
+FAKE_RUNNER = """import sys, time
+with open(sys.argv[2], "a") as f:
+    f.write("started\\n")
+print("READY 0.0", flush=True)
+for line in sys.stdin:
+    if line.strip() == "quit":
+        break
+    if sys.argv[1] == "hang":
+        time.sleep(60)
+    print("2 0.000001 1 1 1.000000000", flush=True)
+"""
+
+
+# A lane kills a runner that misses the timeout and starts it again for the
+# next query, up to MAX_RESTARTS times; then it gives that series up, and
+# goes on with the others
+def test_async_lane_restarts_a_hanging_runner(tmp_path, monkeypatch, capsys):
+    script = tmp_path / "runner.py"
+    script.write_text(FAKE_RUNNER)
+    starts = {}
+    for name, mode in (("Hanging", "hang"), ("Answering", "answer")):
+        starts[name] = tmp_path / f"{name}.starts"
+        command = lambda exe, map_file, mode=mode, name=name: [exe, str(script), mode, str(starts[name])]
+        monkeypatch.setitem(run_tests.LANGUAGES, name, run_tests.Language(name, None, command))
+    jobs = [("test.scen", 0, instance_num, (0, 0), (0, 1), 1.0, True, lang, 0, 4)
+            for instance_num in range(1, 7) for lang in ("Hanging", "Answering")]
+    emitted = []
+    asyncio.run(run_tests.async_benchmark(jobs, {name: sys.executable for name in starts}, "test.map", 1,
+                                          run_tests.DEFAULT_TRIALS, run_tests.DEFAULT_PROFILE, None, 0.5,
+                                          emitted.append))
+
+    rows = [row for rows in emitted for row in rows]
+    assert len(emitted) == len(jobs)
+    assert sorted(row["instance_num"] for row in rows if row["language"] == "Answering") == list(range(1, 7))
+    assert all(row["language"] == "Answering" and row["valid"] for row in rows)
+    assert starts["Hanging"].read_text().count("started") == run_tests.MAX_RESTARTS + 1
+    assert starts["Answering"].read_text().count("started") == 1
+    output = capsys.readouterr().out
+    assert output.count("restarting it") == run_tests.MAX_RESTARTS
+    assert output.count("giving Hanging up") == 1
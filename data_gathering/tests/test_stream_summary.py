@@ -0,0 +1,114 @@
+# The streaming summary (stat_test_extended.py --stream) keeps only running
+# aggregates per group, read chunk by chunk; they must agree with the same
+# statistics computed on the whole file at once
+import numpy as np
+import pandas as pd
+import pytest
+
+import run_tests
+
+stat_test_extended = pytest.importorskip("stat_test_extended")
+
+
+# A results file: times by language, profile and heuristic, with some invalid runs
+def results_frame(rows=3000, seed=18, heuristics=(0, 1, 2)):
+    rng = np.random.default_rng(seed)
+    languages = rng.choice(["C++", "Python", "Rust"], rows)
+    frame = pd.DataFrame({field: 0 for field in run_tests.RESULT_FIELDS}, index=range(rows))
+    frame["language"] = languages
+    frame["profile"] = np.where(languages == "Python", "-", rng.choice(["O2", "O3-native"], rows))
+    frame["heuristic"] = rng.choice(heuristics, rows)
+    frame["time"] = rng.lognormal(np.where(languages == "Python", -3.0, -6.0), 0.5)
+    frame["valid"] = rng.random(rows) > 0.05
+    frame["reachable"] = True
+    frame["map"] = "test.map"
+    frame["scen_file"] = "test.scen"
+    return frame
+
+
+def test_running_stats_match_numpy():
+    values = np.random.default_rng(1).lognormal(0.0, 1.0, 20_000)
+    whole = stat_test_extended.RunningStats()
+    halves = [stat_test_extended.RunningStats(), stat_test_extended.RunningStats()]
+    for number, chunk in enumerate(np.array_split(values, 37)):
+        whole.add(chunk)
+        halves[number % 2].add(chunk)
+    halves[0].merge(halves[1])
+    for stats in (whole, halves[0]):
+        assert stats.count == values.size
+        assert stats.mean == pytest.approx(values.mean(), rel=1e-12)
+        assert stats.var == pytest.approx(values.var(ddof=1), rel=1e-9)
+        assert (stats.digest.min, stats.digest.max) == (values.min(), values.max())
+
+
+def test_tdigest_quantiles():
+    values = np.random.default_rng(2).lognormal(0.0, 1.0, 100_000)
+    digest = stat_test_extended.TDigest()
+    for chunk in np.array_split(values, 100):
+        digest.add(chunk)
+    # The digest stays small however many values it has seen
+    assert digest.means.size < digest.compression
+    for q in stat_test_extended.STREAM_QUANTILES:
+        assert digest.quantile(q) == pytest.approx(np.quantile(values, q), rel=0.01)
+    assert (digest.quantile(0.0), digest.quantile(1.0)) == (values.min(), values.max())
+    assert np.isnan(stat_test_extended.TDigest().quantile(0.5))
+
+
+def test_welch_anova_matches_pingouin():
+    pingouin = pytest.importorskip("pingouin")
+    frame = results_frame()
+    groups = []
+    for _, times in frame.groupby("language")["time"]:
+        groups.append(stat_test_extended.RunningStats())
+        groups[-1].add(times.to_numpy())
+    f_stat, p_value = stat_test_extended.welch_anova_from_stats(groups)
+    expected = pingouin.welch_anova(data=frame, dv="time", between="language")
+    assert f_stat == pytest.approx(expected["F"].iloc[0], rel=1e-9)
+    assert p_value == pytest.approx(expected["p_unc"].iloc[0], rel=1e-6, abs=1e-300)
+
+
+def expected_summary(frame):
+    frame = frame[frame["valid"] & (frame["time"] > 0)]
+    # Languages run under several profiles are told apart by profile
+    label = frame["language"].where(frame["profile"] == "-", frame["language"] + " " + frame["profile"])
+    return frame.assign(language=label).groupby(["language", "heuristic"])["time"].agg(["mean", "std", "count"])
+
+
+def check_summary(summary, frame):
+    expected = expected_summary(frame)
+    summary = summary.set_index(["language", "heuristic"]).sort_index()
+    assert list(summary.index) == list(expected.index)
+    assert summary["count"].tolist() == expected["count"].tolist()
+    assert summary["mean"].to_numpy() == pytest.approx(expected["mean"].to_numpy(), rel=1e-6)
+    assert summary["std"].to_numpy() == pytest.approx(expected["std"].to_numpy(), rel=1e-5)
+
+
+@pytest.mark.parametrize("chunksize", [97, 1_000_000])
+def test_stream_summary_of_csv(tmp_path, chunksize):
+    frame = results_frame()
+    results_file = tmp_path / "results.csv"
+    frame.to_csv(results_file, index=False)
+    _, heuristic_summary = stat_test_extended.stream_summary(str(results_file), chunksize=chunksize)
+    check_summary(heuristic_summary, frame)
+
+
+# A file with a single heuristic has no pairs of heuristics to test
+def test_stream_summary_of_one_heuristic(tmp_path, capsys):
+    frame = results_frame(heuristics=(2,))
+    results_file = tmp_path / "results.csv"
+    frame.to_csv(results_file, index=False)
+    _, heuristic_summary = stat_test_extended.stream_summary(str(results_file), chunksize=500)
+    check_summary(heuristic_summary, frame)
+    assert "t-test" not in capsys.readouterr().out
+
+
+# The same results exported as a Parquet dataset summarise the same
+def test_stream_summary_of_parquet(tmp_path):
+    pytest.importorskip("pyarrow.dataset")
+    frame = results_frame()
+    results_file = tmp_path / "results.csv"
+    frame.to_csv(results_file, index=False)
+    dataset_dir = tmp_path / "results"
+    run_tests.export_parquet(str(results_file), str(dataset_dir), {})
+    _, heuristic_summary = stat_test_extended.stream_summary(str(dataset_dir), chunksize=500)
+    check_summary(heuristic_summary, frame)
@@ -6,6 +6,7 @@ import matplotlib.pyplot as plt
 import seaborn
 from sklearn.neighbors import LocalOutlierFactor
 from statsmodels.stats.multicomp import pairwise_tukeyhsd
+import statsmodels.api as sm
 from scipy.stats import levene
 from pingouin import welch_anova, pairwise_gameshowell
 from sklearn.linear_model import LinearRegression
@@ -17,63 +18,429 @@ from sklearn.neighbors import KNeighborsClassifier
 from sklearn.tree import DecisionTreeClassifier
 from sklearn.ensemble import RandomForestClassifier
 from sklearn.model_selection import GridSearchCV
+import itertools
 import os
 
-def main(in_directory):
+try:
+    import pyarrow.dataset  # only needed to read Parquet datasets (run_tests.py --parquet)
+except ImportError:
+    pyarrow = None
+
+
+# Results are a CSV file or a Parquet dataset directory written by
+# run_tests.py --parquet. A dataset is read with column projection, and a
+# language filter skips the other languages' partitions without opening them
+def open_dataset(in_directory):
+    if pyarrow is None:
+        raise ImportError("Reading a Parquet dataset requires pyarrow")
+    partitioning = pyarrow.dataset.partitioning(pyarrow.schema([
+        ('map', pyarrow.string()), ('language', pyarrow.string()), ('heuristic', pyarrow.int8())]), flavor='hive')
+    return pyarrow.dataset.dataset(in_directory, format='parquet', partitioning=partitioning)
+
+
+def language_filter(languages):
+    return pyarrow.dataset.field('language').isin(languages) if languages else None
+
+
+def result_columns(in_directory):
+    if os.path.isdir(in_directory):
+        return open_dataset(in_directory).schema.names
+    return list(pd.read_csv(in_directory, nrows=0).columns)
+
+
+def load_results(in_directory, columns=None, languages=None):
+    if os.path.isdir(in_directory):
+        dataset = open_dataset(in_directory)
+        return dataset.to_table(columns=columns, filter=language_filter(languages)).to_pandas()
+    df = pd.read_csv(in_directory, usecols=columns)
+    return df[df['language'].isin(languages)].reset_index(drop=True) if languages else df
+
+
+# The results in DataFrames of at most chunksize rows, with the given dtypes
+def read_chunks(in_directory, columns, dtypes, chunksize, languages=None):
+    if not os.path.isdir(in_directory):
+        for chunk in pd.read_csv(in_directory, usecols=columns, dtype=dtypes, chunksize=chunksize):
+            yield chunk[chunk['language'].isin(languages)] if languages else chunk
+        return
+    dataset = open_dataset(in_directory)
+    for batch in dataset.to_batches(columns=columns, filter=language_filter(languages), batch_size=chunksize):
+        yield batch.to_pandas().astype(dtypes)
+
+
+# Streaming analysis (--stream): the results file is read in chunks with
+# compact dtypes and only per-group running aggregates are kept, so memory
+# does not grow with the number of rows. Every row counts as one sample;
+# repeated trials are not reduced to their median first, as that would need
+# every row of a configuration at once
+STREAM_DTYPES = {'language': 'category', 'profile': 'category', 'heuristic': 'int8', 'time': 'float32',
+                 'valid': 'boolean'}
+STREAM_QUANTILES = [0.5, 0.9, 0.99]
+
+
+# Merging t-digest: a sorted set of weighted centroids that summarises a
+# distribution for quantile estimates. Centroids are formed with the k1 scale
+# function, which keeps them small (accurate) near the tails, so the size
+# stays around compression / 2 centroids however many values are added
+class TDigest:
+    def __init__(self, compression=500):
+        self.compression = compression
+        self.means = np.empty(0)
+        self.weights = np.empty(0)
+        self.min = np.inf
+        self.max = -np.inf
+
+    def scale(self, q):
+        return self.compression / (2 * np.pi) * np.arcsin(2 * np.clip(q, 0.0, 1.0) - 1)
+
+    def add(self, values, weights=None):
+        values = np.asarray(values, dtype=np.float64)
+        if values.size == 0:
+            return
+        weights = np.ones(values.size) if weights is None else np.asarray(weights, dtype=np.float64)
+        self.min = min(self.min, values.min())
+        self.max = max(self.max, values.max())
+
+        means = np.concatenate([self.means, values])
+        weights = np.concatenate([self.weights, weights])
+        order = np.argsort(means, kind='stable')
+        means = means[order]
+        weights = weights[order]
+
+        # Points whose cumulative weight falls in the same unit interval of
+        # the scale function are merged into one centroid
+        before = np.cumsum(weights) - weights
+        bins = np.floor(self.scale(before / weights.sum()) - self.scale(0.0)).astype(np.int64)
+        starts = np.flatnonzero(np.diff(bins, prepend=-1))
+        self.weights = np.add.reduceat(weights, starts)
+        self.means = np.add.reduceat(means * weights, starts) / self.weights
+
+    def merge(self, other):
+        self.add(other.means, other.weights)
+        self.min = min(self.min, other.min)
+        self.max = max(self.max, other.max)
+
+    def quantile(self, q):
+        if self.weights.size == 0:
+            return np.nan
+        # Interpolate between centroid centres, anchored at the exact min and max
+        centres = np.cumsum(self.weights) - self.weights / 2
+        total = self.weights.sum()
+        return float(np.interp(q * total, np.concatenate([[0.0], centres, [total]]),
+                               np.concatenate([[self.min], self.means, [self.max]])))
+
+
+# Count, mean, variance (Welford's M2, combined chunk by chunk with Chan's
+# parallel update), min, max and a t-digest of one group's times
+class RunningStats:
+    def __init__(self):
+        self.count = 0
+        self.mean = 0.0
+        self.m2 = 0.0
+        self.digest = TDigest()
+
+    def add(self, values):
+        values = np.asarray(values, dtype=np.float64)
+        if values.size == 0:
+            return
+        mean = values.mean()
+        self.combine(values.size, mean, ((values - mean) ** 2).sum())
+        self.digest.add(values)
+
+    def combine(self, count, mean, m2):
+        total = self.count + count
+        delta = mean - self.mean
+        self.mean += delta * count / total
+        self.m2 += m2 + delta * delta * self.count * count / total
+        self.count = total
+
+    def merge(self, other):
+        if other.count:
+            self.combine(other.count, other.mean, other.m2)
+            self.digest.merge(other.digest)
+
+    @property
+    def var(self):
+        return self.m2 / (self.count - 1) if self.count > 1 else np.nan
+
+    @property
+    def std(self):
+        return np.sqrt(self.var)
+
+    def row(self):
+        row = {'mean': self.mean, 'std': self.std, 'min': self.digest.min, 'max': self.digest.max,
+               'count': self.count}
+        for q in STREAM_QUANTILES:
+            row[f'p{round(q * 100)}'] = self.digest.quantile(q)
+        return row
+
+
+# Welch's ANOVA from per-group count/mean/variance alone
+def welch_anova_from_stats(groups):
+    groups = [g for g in groups if g.count > 1 and g.var > 0]
+    k = len(groups)
+    if k < 2:
+        return np.nan, np.nan
+    n = np.array([g.count for g in groups], dtype=np.float64)
+    means = np.array([g.mean for g in groups])
+    w = n / np.array([g.var for g in groups])
+    grand_mean = (w * means).sum() / w.sum()
+    a = (w * (means - grand_mean) ** 2).sum() / (k - 1)
+    tmp = ((1 - w / w.sum()) ** 2 / (n - 1)).sum()
+    f_stat = a / (1 + 2 * (k - 2) / (k * k - 1) * tmp)
+    return f_stat, stats.f.sf(f_stat, k - 1, (k * k - 1) / (3 * tmp))
+
+
+def stream_summary(in_directory, include_invalid=False, chunksize=1_000_000, languages=None):
+    columns = result_columns(in_directory)
+    usecols = [col for col in ['language', 'profile', 'heuristic', 'time', 'valid'] if col in columns]
+    dtypes = {col: dtype for col, dtype in STREAM_DTYPES.items() if col in usecols}
+
+    # Running stats by (language, profile, heuristic); the labels are only
+    # settled at the end, once it is known which languages ran several profiles
+    groups = {}
+    excluded = {}
+    for chunk in read_chunks(in_directory, usecols, dtypes, chunksize, languages):
+        if 'valid' in chunk.columns and not include_invalid:
+            invalid = ~chunk['valid'].fillna(False).astype(bool)
+            for language, count in chunk.loc[invalid, 'language'].value_counts().items():
+                if count:
+                    excluded[language] = excluded.get(language, 0) + count
+            chunk = chunk[~invalid]
+        chunk = chunk[chunk['time'] > 0.0]
+        if 'profile' not in chunk.columns:
+            chunk = chunk.assign(profile='-')
+        chunk['profile'] = chunk['profile'].astype(object).fillna('-')
+        for key, times in chunk.groupby(['language', 'profile', 'heuristic'], observed=True, sort=False)['time']:
+            groups.setdefault(key, RunningStats()).add(times.to_numpy())
+
+    if excluded:
+        print(f"Excluding {sum(excluded.values())} invalid runs:")
+        print(pd.Series(excluded, name='count').to_string())
+
+    profiles = {}
+    for language, profile, _ in groups:
+        if profile != '-':
+            profiles.setdefault(language, set()).add(profile)
+    by_language = {}
+    by_heuristic = {}
+    for (language, profile, heuristic), group in groups.items():
+        if profile != '-' and len(profiles[language]) > 1:
+            language = f'{language} {profile}'
+        by_language.setdefault(language, RunningStats()).merge(group)
+        by_heuristic.setdefault((language, heuristic), RunningStats()).merge(group)
+
+    stats_summary = pd.DataFrame([{'language': language, **group.row()} for language, group in sorted(by_language.items())])
+    print("Calculating common statistics for the algorithm implementations...")
+    print(stats_summary)
+    print("\n")
+    heuristic_summary = pd.DataFrame([{'language': language, 'heuristic': heuristic, **group.row()}
+                                      for (language, heuristic), group in sorted(by_heuristic.items())])
+    print("Statistics by language and heuristic...")
+    print(heuristic_summary)
+
+    f_stat, p_value = welch_anova_from_stats(by_language.values())
+    print("\n\nPerforming Welch ANOVA...")
+    print(f"F: {f_stat:.4f}, p-value: {p_value:.10e}")
+
+    pairs = heuristic_pairs({heuristic for _, heuristic in by_heuristic})
+    if pairs:
+        print("\nPerforming t-test for different heuristics for every language")
+    for language in sorted(by_language):
+        for first, second in pairs:
+            a = by_heuristic.get((language, first))
+            b = by_heuristic.get((language, second))
+            if a is None or b is None:
+                continue
+            t_stat, p_value = stats.ttest_ind_from_stats(a.mean, a.std, a.count, b.mean, b.std, b.count, equal_var=True)
+            print(f"Language: {language} ({heuristic_name(first)} vs. {heuristic_name(second)})")
+            print(f"T-Statistic: {t_stat:.4f}, P-Value: {p_value:.4f}\n")
+    return stats_summary, heuristic_summary
+
+
+# Names of the heuristic numbers recorded by run_tests.py
+HEURISTIC_NAMES = {0: 'Euclidean', 1: 'Manhattan', 2: 'Octile', 3: 'Chebyshev', 4: 'Landmark'}
+
+
+def heuristic_name(heuristic):
+    return HEURISTIC_NAMES.get(heuristic, f'Heuristic {heuristic}')
+
+
+# The pairs of heuristics the pairwise tests compare: every pair of those
+# present, so none when a file has fewer than two
+def heuristic_pairs(heuristics):
+    return list(itertools.combinations(sorted(heuristics), 2))
+
+
+# Runs that did not return the optimal path length would compare a wrong
+# answer against right ones, so they are left out unless asked for
+def drop_invalid(df, include_invalid=False):
+    if 'valid' in df.columns and not include_invalid:
+        invalid = ~df['valid'].astype(bool)
+        if invalid.any():
+            print(f"Excluding {invalid.sum()} invalid runs:")
+            print(df.loc[invalid, 'language'].value_counts().to_string())
+        df = df[~invalid]
+    return df
+
+
+# Builds of one language under several profiles (run_tests.py --profile) are
+# compared as separate series
+def label_profiles(df):
+    if 'profile' in df.columns:
+        profiled = df['profile'].fillna('-') != '-'
+        if df.loc[profiled].groupby('language')['profile'].nunique().gt(1).any():
+            df = df.copy()
+            df.loc[profiled, 'language'] = df.loc[profiled, 'language'] + ' ' + df.loc[profiled, 'profile']
+    return df
+
+
+# Scaling report (--scaling): how time grows with query difficulty. Runs are
+# grouped by series and heuristic, and time is fitted by ordinary least squares
+# against the optimal path length and against the number of expanded nodes,
+# with 95% confidence intervals on the coefficients and confidence bands in the
+# plots. A log-log fit against the length gives the growth exponent
+# Predictors with their axis label and the unit a slope is per
+SCALING_PREDICTORS = {'optimal': ('Optimal path length', 'unit of length'), 'expanded': ('Expanded nodes', 'node')}
+
+
+def fit_line(x, y):
+    # OLS fit of y = intercept + slope * x, with 95% confidence intervals
+    model = sm.OLS(y, sm.add_constant(x, has_constant='add')).fit()
+    (intercept_low, intercept_high), (slope_low, slope_high) = model.conf_int(0.05)
+    return model, {'slope': model.params[1], 'slope_low': slope_low, 'slope_high': slope_high,
+                   'intercept': model.params[0], 'intercept_low': intercept_low, 'intercept_high': intercept_high,
+                   'r2': model.rsquared, 'n': int(model.nobs)}
+
+
+# A predictor that never varies within a series, like the expansions of the
+# oracle (always 0), has no slope to fit and makes the regression singular
+def constant(values):
+    return values.nunique() < 2
+
+
+def scaling_report(in_directory, include_invalid=False, languages=None, metric='time'):
+    plots_dir = "plots"
+    os.makedirs(plots_dir, exist_ok=True)
+    columns = result_columns(in_directory)
+    needed = ['language', 'heuristic', 'optimal', metric]
+    if any(col not in columns for col in needed):
+        print(f"A scaling report needs the columns {needed}; rerun the benchmarks with the current run_tests.py")
+        return None
+    wanted = needed + ['profile', 'valid', 'reachable', 'bucket', 'expanded']
+    df = load_results(in_directory, columns=[col for col in wanted if col in columns], languages=languages)
+    df = label_profiles(drop_invalid(df, include_invalid))
+
+    # Only queries with a path have a length to scale with
+    df = df[(df['optimal'] > 0) & (df[metric] > 0)]
+    if 'reachable' in df.columns:
+        df = df[df['reachable'].astype(bool)]
+
+    if 'bucket' in df.columns:
+        buckets = df.groupby(['language', 'heuristic', 'bucket']).agg(
+            count=(metric, 'size'), optimal=('optimal', 'mean'), median=(metric, 'median'),
+            p90=(metric, lambda t: t.quantile(0.9))).reset_index()
+        buckets.to_csv(os.path.join(plots_dir, 'scaling_buckets.csv'), index=False)
+        print(f"Median {metric} by bucket...")
+        print(buckets.pivot_table(index='bucket', columns=['language', 'heuristic'], values='median').to_string())
+
+    fits = []
+    predictors = [col for col in SCALING_PREDICTORS if col in df.columns]
+    for (language, heuristic), group in df.groupby(['language', 'heuristic']):
+        if len(group) < 3:
+            continue
+        for predictor in predictors:
+            if constant(group[predictor]):
+                continue
+            _, fit = fit_line(group[predictor].to_numpy(np.float64), group[metric].to_numpy(np.float64))
+            fits.append({'language': language, 'heuristic': heuristic, 'predictor': predictor, **fit})
+        # time ~ length ** exponent
+        _, power = fit_line(np.log(group['optimal'].to_numpy(np.float64)), np.log(group[metric].to_numpy(np.float64)))
+        fits.append({'language': language, 'heuristic': heuristic, 'predictor': 'log optimal (exponent)', **power})
+    fits = pd.DataFrame(fits)
+    if fits.empty:
+        print("Not enough runs with a path to fit.")
+        return fits
+    fits.to_csv(os.path.join(plots_dir, 'scaling_fits.csv'), index=False)
+    print(f"\nFits of {metric} (seconds) per language and heuristic, with 95% confidence intervals...")
+    with pd.option_context('display.max_rows', None, 'display.width', 200):
+        print(fits.to_string(index=False, float_format=lambda v: f'{v:.4g}'))
+
+    # One figure per predictor and heuristic: the runs, each language's fitted
+    # line and its 95% confidence band
+    seaborn.set()
+    for predictor in predictors:
+        label, unit = SCALING_PREDICTORS[predictor]
+        for heuristic, runs in df.groupby('heuristic'):
+            plt.figure(figsize=(10, 6))
+            for idx, (language, group) in enumerate(runs.groupby('language')):
+                color = plt.cm.tab10(idx % 10)
+                x = group[predictor].to_numpy(np.float64)
+                y = group[metric].to_numpy(np.float64)
+                plt.scatter(x, y, s=8, alpha=0.3, color=color)
+                if len(group) < 3 or constant(group[predictor]):
+                    continue
+                model, fit = fit_line(x, y)
+                grid_x = np.linspace(x.min(), x.max(), 100)
+                band = model.get_prediction(sm.add_constant(grid_x, has_constant='add')).conf_int(alpha=0.05)
+                plt.plot(grid_x, fit['intercept'] + fit['slope'] * grid_x, color=color,
+                         label=f"{language}: {fit['slope']:.3g} s per {unit}")
+                plt.fill_between(grid_x, band[:, 0], band[:, 1], color=color, alpha=0.2)
+            plt.title(f"{metric} vs. {label.lower()} (heuristic {heuristic})")
+            plt.xlabel(label)
+            plt.ylabel(f"{metric} (seconds)")
+            plt.legend(title="Language", loc='upper left')
+            plt.tight_layout()
+            plt.savefig(os.path.join(plots_dir, f'scaling_{metric}_vs_{predictor}_h{heuristic}.png'), dpi=150)
+            plt.close()
+    print(f"\nScaling plots and tables saved in {plots_dir}")
+    return fits
+
+
+def main(in_directory, include_invalid=False, languages=None):
     # Create a directory for plots if it doesn't exist
     plots_dir = "plots"
     os.makedirs(plots_dir, exist_ok=True)
     
-    df = pd.read_csv(in_directory)
+    df = load_results(in_directory, languages=languages)
+    df = label_profiles(drop_invalid(df, include_invalid))
+
+    # Repeated trials (run_tests.py --repeat) give several rows per configuration;
+    # test on the median time of each so every configuration counts once
+    if 'rep' in df.columns and df['rep'].max() > 1:
+        config_cols = [col for col in ['map', 'scen_file', 'instance_num', 'language', 'heuristic'] if col in df.columns]
+        df = df.groupby(config_cols, as_index=False).median(numeric_only=True)
+
+    # Sweeps over several maps/scenario files restart instance_num in every file,
+    # so number the scenarios across the whole sweep instead
+    scenario_cols = [col for col in ['map', 'scen_file', 'instance_num'] if col in df.columns]
+    if len(scenario_cols) > 1:
+        df['instance_num'] = df.groupby(scenario_cols, sort=True).ngroup() + 1
   
     # Data cleaning
     df = df[df['time'] > 0.0]
-    # Heuristic == 0
-    df_heuristic_0 = df[df['heuristic'] == 0]
-    df_heuristic_0_pivot = df_heuristic_0.pivot(index='instance_num', columns='language', values='time')
-    df_heuristic_0_pivot = df_heuristic_0_pivot.dropna()
-    model_0 = LocalOutlierFactor(n_neighbors=20)
-    y_heuristic_0 = model_0.fit_predict(df_heuristic_0_pivot.values)
-    df_heuristic_0_pivot['lof_outlier'] = y_heuristic_0
-    df_heuristic_0_pivot['is_anomaly'] = df_heuristic_0_pivot['lof_outlier'] == -1
-
-    # Heuristic == 1
-    df_heuristic_1 = df[df['heuristic'] == 1]
-    df_heuristic_1_pivot = df_heuristic_1.pivot(index='instance_num', columns='language', values='time')
-    df_heuristic_1_pivot = df_heuristic_1_pivot.dropna()
-    model_1 = LocalOutlierFactor(n_neighbors=20)
-    y_heuristic_1 = model_1.fit_predict(df_heuristic_1_pivot.values)
-    df_heuristic_1_pivot['lof_outlier'] = y_heuristic_1
-    df_heuristic_1_pivot['is_anomaly'] = df_heuristic_1_pivot['lof_outlier'] == -1
-
-    # Combine the results
-    df_heuristic_0_cleaned = df_heuristic_0_pivot.reset_index()
-    df_heuristic_1_cleaned = df_heuristic_1_pivot.reset_index()
-
-    # Melt the data for each heuristic
-    df_heuristic_0_melted = df_heuristic_0_cleaned.melt(
-        id_vars=['instance_num', 'is_anomaly'], 
-        value_vars=[col for col in df_heuristic_0_cleaned.columns if col not in ['lof_outlier', 'is_anomaly', 'instance_num']],
-        var_name='language', 
-        value_name='time'
-    )
-
-    df_heuristic_1_melted = df_heuristic_1_cleaned.melt(
-        id_vars=['instance_num', 'is_anomaly'], 
-        value_vars=[col for col in df_heuristic_1_cleaned.columns if col not in ['lof_outlier', 'is_anomaly', 'instance_num']],
-        var_name='language', 
-        value_name='time'
-    )
-
-    # Combine the cleaned and melted data
-    df_cleaned_combined = pd.concat([df_heuristic_0_melted, df_heuristic_1_melted])
-
-    # Merge the heuristic column to the cleaned data
-    df_cleaned_combined = df_cleaned_combined.merge(
-        df[['instance_num', 'heuristic']].drop_duplicates(),
-        on='instance_num', 
-        how='left'
-    )
+    # Outliers by Local Outlier Factor, separately for each heuristic, on the
+    # times of every language for each scenario
+    melted = []
+    for heuristic in sorted(df['heuristic'].unique()):
+        pivot = df[df['heuristic'] == heuristic].pivot(index='instance_num', columns='language', values='time')
+        pivot = pivot.dropna()
+        if len(pivot) > 1:
+            model = LocalOutlierFactor(n_neighbors=min(20, len(pivot) - 1))
+            pivot['is_anomaly'] = model.fit_predict(pivot.values) == -1
+        else:
+            pivot['is_anomaly'] = False
+        cleaned = pivot.reset_index()
+        melted.append(cleaned.melt(
+            id_vars=['instance_num', 'is_anomaly'],
+            value_vars=[col for col in cleaned.columns if col not in ['is_anomaly', 'instance_num']],
+            var_name='language',
+            value_name='time'
+        ).assign(heuristic=heuristic))
+
+    # Each melted frame already knows its heuristic; merging it back on
+    # instance_num alone would pair every row with every heuristic of that
+    # instance and multiply the rows
+    df_cleaned_combined = pd.concat(melted, ignore_index=True)
 
     # Now plot again
     seaborn.set()
@@ -109,8 +476,10 @@ def main(in_directory):
     plt.savefig(os.path.join(plots_dir, 'exec_time_vs_instance_num_with_anomalies.png'), dpi=300)
     plt.close()
 
-    #update df to remove anomalies
-    df = df[df_cleaned_combined['is_anomaly'] == False]
+    #update df to remove anomalies, matching rows by scenario, language and heuristic
+    anomaly_keys = ['instance_num', 'language', 'heuristic']
+    df = df.merge(df_cleaned_combined[anomaly_keys + ['is_anomaly']], on=anomaly_keys, how='left')
+    df = df[df['is_anomaly'] == False]
     
     # Combined histogram for all languages
     languages = df['language'].unique()
@@ -143,18 +512,16 @@ def main(in_directory):
     heuristic_means = df.groupby(['language', 'heuristic'])['time'].mean().unstack()
 
     # Plot bar chart
-    ax = heuristic_means.plot(kind='bar', figsize=(10, 6), color=['#1f77b4', '#ff7f0e'], edgecolor='black')
+    ax = heuristic_means.plot(kind='bar', figsize=(10, 6), edgecolor='black')
     plt.title('Average Execution Time by Language and Heuristic')
     plt.xlabel('Language')
     plt.ylabel('Average Execution Time')
     plt.xticks(rotation=0)
-    plt.legend(['Euclidean', 'Manhattan'], title='Heuristic', loc='upper right')
+    plt.legend([heuristic_name(heuristic) for heuristic in heuristic_means.columns], title='Heuristic', loc='upper right')
 
     # Add averages on top of the bars
-    for i, language in enumerate(heuristic_means.index):
-        for j, heuristic in enumerate(heuristic_means.columns):
-            value = heuristic_means.loc[language, heuristic]
-            ax.text(i + j * 0.2 - 0.1, value + 0.001, f'{value:.5f}', ha='center', va='bottom', fontsize=9)  # Slight offset
+    for bars in ax.containers:
+        ax.bar_label(bars, fmt='%.5f', fontsize=9)
 
     # Save bar chart
     plt.savefig(os.path.join(plots_dir, 'heuristic_comparison_bar_chart.png'))
@@ -162,7 +529,7 @@ def main(in_directory):
     
     
     # Scatterplot of execution time vs instance num
-    random_sample_df = df.groupby('language').apply(lambda x: x.sample(n = 250, random_state=23)).reset_index(drop=True) # randomly sample 250 points
+    random_sample_df = df.groupby('language').sample(n = 250, random_state=23).reset_index(drop=True) # randomly sample 250 points
     seaborn.set()
     plt.figure(figsize=(10, 6))
     seaborn.scatterplot(data=random_sample_df, x='instance_num', y='time', hue='language')
@@ -225,57 +592,63 @@ def main(in_directory):
     
     
     # statistics for heuristics
+    heuristics = sorted(df['heuristic'].unique())
     print("\nCalculating average executino time for different heuristics for every language...")
     for language in df['language'].unique():
-        euclidean = df[(df['heuristic'] == 0) & (df['language'] == language)]['time']
-        manhattan = df[(df['heuristic'] == 1) & (df['language'] == language)]['time']
-        
-        euclidean_mean = euclidean.mean()
-        manhattan_mean = manhattan.mean()
         print(f"Language: {language}")
-        print(f"    Average Time (Euclidean): {euclidean_mean:.5f}")
-        print(f"    Average Time (Manhattan): {manhattan_mean:.5f}\n")
-    
-    
-    print("\nPerforming Levene test for different heuristics for every language...")
+        for heuristic in heuristics:
+            mean = df[(df['heuristic'] == heuristic) & (df['language'] == language)]['time'].mean()
+            print(f"    Average Time ({heuristic_name(heuristic)}): {mean:.5f}")
+        print()
+
+    # Pairwise tests between heuristics, when the file has more than one
+    pairs = heuristic_pairs(heuristics)
+    if pairs:
+        print("\nPerforming Levene test for different heuristics for every language...")
     for language in df['language'].unique():
-        euclidean = df[(df['heuristic'] == 0) & (df['language'] == language)]['time']
-        manhattan = df[(df['heuristic'] == 1) & (df['language'] == language)]['time']
-        
-        levene_stat, levene_pvalue = stats.levene(euclidean, manhattan)
-        print(f"Language: {language}")
-        print(f"Levene's Test Statistic: {levene_stat:.4f}, P-Value: {levene_pvalue:.4f}\n")
-        
-        
-    print("\nPerforming t-test for different heuristics for every language")
+        for first, second in pairs:
+            a = df[(df['heuristic'] == first) & (df['language'] == language)]['time']
+            b = df[(df['heuristic'] == second) & (df['language'] == language)]['time']
+            if len(a) < 2 or len(b) < 2:
+                continue
+            levene_stat, levene_pvalue = stats.levene(a, b)
+            print(f"Language: {language} ({heuristic_name(first)} vs. {heuristic_name(second)})")
+            print(f"Levene's Test Statistic: {levene_stat:.4f}, P-Value: {levene_pvalue:.4f}\n")
+
+    if pairs:
+        print("\nPerforming t-test for different heuristics for every language")
     for language in df['language'].unique():
-        euclidean = df[(df['heuristic'] == 0) & (df['language'] == language)]['time']
-        manhattan = df[(df['heuristic'] == 1) & (df['language'] == language)]['time']
-        
-        t_stat, p_value = stats.ttest_ind(euclidean, manhattan, equal_var=True)
-        print(f"Language: {language}")
-        print(f"T-Statistic: {t_stat:.4f}, P-Value: {p_value:.4f}\n")
-        
-        
-    # is execution time affected by instance_num?
-    # we perform linear regression to see the relationship of the them
-    print("\n\nPerforming linear regression on execution time vs instance_num...")
-    X = df['instance_num'].values.reshape(-1,1)
-    y = df['time']
+        for first, second in pairs:
+            a = df[(df['heuristic'] == first) & (df['language'] == language)]['time']
+            b = df[(df['heuristic'] == second) & (df['language'] == language)]['time']
+            if len(a) < 2 or len(b) < 2:
+                continue
+            t_stat, p_value = stats.ttest_ind(a, b, equal_var=True)
+            print(f"Language: {language} ({heuristic_name(first)} vs. {heuristic_name(second)})")
+            print(f"T-Statistic: {t_stat:.4f}, P-Value: {p_value:.4f}\n")
+
+
+    # is execution time affected by how long the path is? (instance_num only
+    # numbers the scenarios, so it is the fallback for files without optimal)
+    predictor = 'optimal' if 'optimal' in df.columns else 'instance_num'
+    print(f"\n\nPerforming linear regression on execution time vs {predictor}...")
+    regression_df = df[df['optimal'] > 0] if predictor == 'optimal' else df
+    X = regression_df[predictor].values.reshape(-1,1)
+    y = regression_df['time']
     model = LinearRegression()
     model.fit(X,y)
     
-    print(f"Slope: {model.coef_[0]}")   # we get a really small slope, implying little to no relationship
+    print(f"Slope: {model.coef_[0]}")   # against instance_num we get a really small slope, implying little to no relationship
     print(f"Intercept: {model.intercept_}")
 
 
 
     # we want to predict what language it is based on heuristics and execution time (machine learning)
     print("\n\nPerforming Machine Learning Techniques to predict language...")
-    heuristics = df['heuristic'].values.reshape(-1,1)
+    heuristic_column = df['heuristic'].values.reshape(-1,1)
     time = df['time'].values.reshape(-1,1)
 
-    X = np.hstack((heuristics, time))
+    X = np.hstack((heuristic_column, time))
     y = df['language']
     
     X_train, X_valid, y_train, y_valid = train_test_split(X, y)
@@ -296,7 +669,24 @@ def main(in_directory):
 
 if __name__ == '__main__':
     parser = argparse.ArgumentParser()
-    parser.add_argument('in_directory', type=str)
+    parser.add_argument('in_directory', type=str, help='Results CSV file, or Parquet dataset directory')
+    parser.add_argument('--include-invalid', action='store_true',
+                        help='Keep runs whose path length did not match the optimal one')
+    parser.add_argument('--stream', action='store_true',
+                        help='Only print the summary tables, reading the file in chunks with bounded memory')
+    parser.add_argument('--chunksize', type=int, default=1_000_000,
+                        help='Rows per chunk with --stream')
+    parser.add_argument('--scaling', action='store_true',
+                        help='Write the scaling report: time against optimal path length and expanded nodes')
+    parser.add_argument('--metric', choices=['time', 'search_time'], default='time',
+                        help='Timing column the scaling report fits')
+    parser.add_argument('--language', action='append', dest='languages',
+                        help='Only analyse this language (repeat for several)')
     args = parser.parse_args()
-    main(args.in_directory)
+    if args.scaling:
+        scaling_report(args.in_directory, args.include_invalid, args.languages, args.metric)
+    elif args.stream:
+        stream_summary(args.in_directory, args.include_invalid, args.chunksize, args.languages)
+    else:
+        main(args.in_directory, args.include_invalid, args.languages)
 